@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
 from app.core.database import supabase, supabase_admin
 from app.schemas.user import (
     UserRegister, 
@@ -9,7 +10,12 @@ from app.schemas.user import (
     TokenResponse,
     MessageResponse
 )
-from app.utils.dependencies import get_current_active_user
+from app.utils.dependencies import (
+    get_current_active_user,
+    revoke_token,
+    invalidate_user_cache,
+    security
+)
 import uuid
 from datetime import datetime
 
@@ -21,7 +27,7 @@ async def register_user(user_data: UserRegister):
     
     try:
         # Register user with Supabase Auth
-        auth_response = supabase.auth.sign_up({
+        auth_response = await supabase.auth.sign_up({
             "email": user_data.email,
             "password": user_data.password,
             "options": {
@@ -42,7 +48,7 @@ async def register_user(user_data: UserRegister):
         user_id = auth_response.user.id
         
         # Check if profile already exists (created by trigger)
-        existing_profile = supabase.table("profiles").select("*").eq("id", user_id).execute()
+        existing_profile = await supabase.table("profiles").select("*").eq("id", user_id).execute()
         
         if existing_profile.data:
             # Update existing profile with additional data
@@ -53,7 +59,7 @@ async def register_user(user_data: UserRegister):
                 "updated_at": datetime.utcnow().isoformat()
             }
             
-            result = supabase.table("profiles").update(profile_data).eq("id", user_id).execute()
+            result = await supabase.table("profiles").update(profile_data).eq("id", user_id).execute()
             profile = result.data[0] if result.data else existing_profile.data[0]
         else:
             # Create profile manually if trigger didn't work
@@ -65,7 +71,7 @@ async def register_user(user_data: UserRegister):
                 "phone": user_data.phone
             }
             
-            result = supabase.table("profiles").insert(profile_data).execute()
+            result = await supabase.table("profiles").insert(profile_data).execute()
             profile = result.data[0]
         
         return UserResponse(
@@ -89,7 +95,7 @@ async def login_user(login_data: UserLogin):
     
     try:
         # Authenticate with Supabase
-        auth_response = supabase.auth.sign_in_with_password({
+        auth_response = await supabase.auth.sign_in_with_password({
             "email": login_data.email,
             "password": login_data.password
         })
@@ -103,7 +109,7 @@ async def login_user(login_data: UserLogin):
         user_id = auth_response.user.id
         
         # Get user profile from database
-        result = supabase.table("profiles").select("*").eq("id", user_id).execute()
+        result = await supabase.table("profiles").select("*").eq("id", user_id).execute()
         
         if not result.data:
             raise HTTPException(
@@ -135,11 +141,16 @@ async def login_user(login_data: UserLogin):
         )
 
 @router.post("/logout", response_model=MessageResponse)
-async def logout_user(current_user: UserProfile = Depends(get_current_active_user)):
+async def logout_user(
+    current_user: UserProfile = Depends(get_current_active_user),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
     """Logout user (invalidate session)"""
     
+    # The session must stop authenticating even if sign-out fails
+    revoke_token(credentials.credentials)
     try:
-        supabase.auth.sign_out()
+        await supabase.auth.sign_out()
         return MessageResponse(message="Successfully logged out")
     except Exception:
         return MessageResponse(message="Successfully logged out")
@@ -163,7 +174,7 @@ async def update_current_user(
         update_data = user_update.model_dump(exclude_unset=True)
         update_data["updated_at"] = datetime.utcnow().isoformat()
         
-        result = supabase.table("profiles").update(update_data).eq("id", str(current_user.id)).execute()
+        result = await supabase.table("profiles").update(update_data).eq("id", str(current_user.id)).execute()
         
         if not result.data:
             raise HTTPException(
@@ -171,6 +182,8 @@ async def update_current_user(
                 detail="User profile not found"
             )
         
+        invalidate_user_cache(current_user.id)
+        
         return UserProfile(**result.data[0])
         
     except HTTPException:
@@ -187,7 +200,7 @@ async def refresh_token(current_user: UserProfile = Depends(get_current_active_u
     
     try:
         # Refresh token with Supabase
-        session = supabase.auth.refresh_session()
+        session = await supabase.auth.refresh_session()
         
         if not session.session:
             raise HTTPException(
@@ -225,14 +238,14 @@ async def reset_password_request(email_data: dict):
             )
         
         # Check if user exists
-        result = supabase.table("profiles").select("*").eq("email", email).execute()
+        result = await supabase.table("profiles").select("*").eq("email", email).execute()
         
         if not result.data:
             # Don't reveal if email exists or not for security
             return MessageResponse(message="If an account with that email exists, a reset link has been sent.")
         
         # Use Supabase Auth to send reset email
-        reset_response = supabase.auth.reset_password_email(email)
+        reset_response = await supabase.auth.reset_password_email(email)
         
         return MessageResponse(message="If an account with that email exists, a reset link has been sent.")
         
@@ -265,10 +278,11 @@ async def update_password_with_token(password_data: dict):
         
         # Use Supabase to update password
         # Note: This requires the access_token from the reset email
-        supabase.auth.update_user(
+        await supabase.auth.update_user(
             {"password": new_password},
             access_token=access_token
         )
+        revoke_token(access_token)
         
         return MessageResponse(message="Password updated successfully")
         
@@ -284,7 +298,8 @@ async def update_password_with_token(password_data: dict):
 @router.put("/change-password", response_model=MessageResponse)
 async def change_password(
     password_data: dict,
-    current_user: UserProfile = Depends(get_current_active_user)
+    current_user: UserProfile = Depends(get_current_active_user),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     """Change password for authenticated user"""
     
@@ -305,7 +320,7 @@ async def change_password(
             )
         
         # Verify current password by attempting login
-        auth_check = supabase.auth.sign_in_with_password({
+        auth_check = await supabase.auth.sign_in_with_password({
             "email": current_user.email,
             "password": current_password
         })
@@ -317,7 +332,9 @@ async def change_password(
             )
         
         # Update password
-        supabase.auth.update_user({"password": new_password})
+        await supabase.auth.update_user({"password": new_password})
+        invalidate_user_cache(current_user.id)
+        revoke_token(credentials.credentials)
         
         return MessageResponse(message="Password changed successfully")
         
@@ -1,63 +1,81 @@
 # app/api/routes/business.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
-from typing import Optional, List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
+from typing import Any, Dict, Optional, List
 from datetime import datetime
+import asyncio
 import uuid
 import os
 from pathlib import Path
-from decimal import Decimal
 
 from datetime import datetime, timedelta
 from datetime import timezone
 
 from app.core.database import supabase, supabase_admin
+from app.core.storage import storage_client, StorageUploadError
+from app.utils.claim_tokens import (
+    CLAIM_TOKEN_ALGORITHM, extract_claim_token, get_claim_token_public_key, verify_claim_token
+)
+from app.utils.pagination import apply_keyset, count_method, next_page
+from app.utils.offer_index import offer_search_index
+from app.utils.nearby_index import nearby_offer_index
+from app.utils.response_cache import OFFERS_TAG, product_tag, response_cache
+from app.utils.serialization import ORJSONResponse, to_jsonable
+from app.utils.offer_display import compute_display_fields
+from app.utils.image_variants import (
+    IMAGE_VARIANT_FORMATS, ORIGINAL_IMAGE_NAME, add_image_variants, image_variant_urls
+)
 from app.core.config import settings 
 from app.schemas.business import (
     BusinessCreate, BusinessUpdate, BusinessResponse, BusinessListResponse,
     ProductCreate, ProductUpdate, ProductResponse, ProductListResponse,
     OfferCreate, OfferUpdate, OfferResponse, OfferListResponse,
-    CategoryResponse, MessageResponse, BusinessUserRegistration
+    CategoryResponse, MessageResponse, BusinessUserRegistration,
+    BulkRedemptionRequest, BulkRedemptionResult, BulkRedemptionResponse,
+    ScanRedemptionRequest, ScanRedemptionResponse, RedemptionReceipt,
+    OfflineRedemptionRequest, OfflineRedemptionResult, OfflineRedemptionResponse,
+    BusinessProductPage, BusinessOfferPage
 )
 from app.schemas.user import UserProfile, UserResponse
-from app.utils.dependencies import get_current_active_user, get_current_business_user
+from app.utils.dependencies import (
+    get_current_active_user, get_current_business_user, get_current_business,
+    invalidate_user_cache, invalidate_business_cache
+)
 
 router = APIRouter(prefix="/business", tags=["Business"])
 
 
-def convert_decimals_to_float(data):
-    """Convert Decimal fields to float in a dictionary or list"""
-    if isinstance(data, dict):
-        return {key: convert_decimals_to_float(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [convert_decimals_to_float(item) for item in data]
-    elif isinstance(data, Decimal):
-        return float(data)
-    else:
-        return data
-
-
-def prepare_data_for_supabase(data):
-    """Convert UUID and Decimal objects to JSON-serializable types"""
-    if isinstance(data, dict):
-        return {key: prepare_data_for_supabase(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [prepare_data_for_supabase(item) for item in data]
-    elif isinstance(data, uuid.UUID):
-        return str(data)
-    elif isinstance(data, Decimal):
-        return float(data)
-    else:
-        return data
-
 # ============================================================================
 # PRODUCT MANAGEMENT WITH PAGINATION AND SEARCH
 # ============================================================================
 
-@router.get("/products", response_model=dict)
+def business_product_payload(product: Dict[str, Any], business_name: str) -> Dict[str, Any]:
+    """A products row (with categories) as a ProductResponse (updated in place)"""
+    product_data = add_image_variants(product)
+    
+    # Add business info to each product
+    product_data["business"] = {
+        "business_name": business_name
+    }
+    
+    # Ensure category data is properly structured
+    if product_data.get("categories"):
+        # If categories is returned as object, keep it
+        product_data["category"] = product_data["categories"]
+    elif not product_data.get("category"):
+        # If no category, set default
+        product_data["category"] = None
+        product_data["categories"] = None
+    
+    return product_data
+
+
+@router.get("/products", response_model=BusinessProductPage)
 async def list_my_products(
-    current_user: UserProfile = Depends(get_current_business_user),
-    page: int = Query(1, ge=1),
+    business: dict = Depends(get_current_business),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    page: int = Query(1, ge=1, description="Deprecated: use cursor"),
     limit: int = Query(10, ge=1, le=100),
+    include_total: bool = Query(False, description="Exact total instead of an estimate"),
     search: Optional[str] = Query(None),
     sortBy: str = Query("created_at", regex="^(created_at|name|price|updated_at)$"),
     sortOrder: str = Query("desc", regex="^(asc|desc)$")
@@ -65,84 +83,63 @@ async def list_my_products(
     """List products for the current business with pagination and search"""
     
     try:
-        # Get user's business
-        business_result = supabase_admin.table("businesses").select("id, business_name").eq("user_id", str(current_user.id)).execute()
-        
-        if not business_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Business not found"
-            )
-        
-        business_id = business_result.data[0]["id"]
-        business_name = business_result.data[0]["business_name"]
+        business_id = business["id"]
+        business_name = business["business_name"]
         
         # Build query with proper category join
         query = supabase_admin.table("products").select(
             "*, categories(*)", 
-            count="exact"
+            count=count_method(include_total)
         ).eq("business_id", business_id)
         
         # Apply search filter
         if search:
             query = query.or_(f"name.ilike.%{search}%,description.ilike.%{search}%")
         
-        # Apply sorting
-        desc_order = sortOrder == "desc"
-        query = query.order(sortBy, desc=desc_order)
-        
-        # Apply pagination
-        offset = (page - 1) * limit
-        query = query.range(offset, offset + limit - 1)
+        # Apply sorting and keyset pagination
+        query = apply_keyset(
+            query, sortBy, sortOrder == "desc", limit,
+            cursor=cursor, offset=(page - 1) * limit
+        )
         
-        result = query.execute()
+        result = await query.execute()
+        rows, next_cursor = next_page(result.data or [], limit, sortBy)
         
-        if not result.data:
-            return {
+        if not rows:
+            return ORJSONResponse({
                 "success": True,
                 "products": [],
                 "pagination": {
                     "page": page,
                     "limit": limit,
                     "total": 0,
-                    "pages": 0
+                    "pages": 0,
+                    "total_is_estimate": not include_total,
+                    "has_next": False,
+                    "next_cursor": None
                 }
-            }
+            })
         
         # Process products and ensure category data is properly formatted
-        processed_products = []
-        for product in result.data:
-            product_data = convert_decimals_to_float(product)
-            
-            # Add business info to each product
-            product_data["business"] = {
-                "business_name": business_name
-            }
-            
-            # Ensure category data is properly structured
-            if product_data.get("categories"):
-                # If categories is returned as object, keep it
-                product_data["category"] = product_data["categories"]
-            elif not product_data.get("category"):
-                # If no category, set default
-                product_data["category"] = None
-                product_data["categories"] = None
-            
-            processed_products.append(product_data)
+        processed_products = [business_product_payload(product, business_name) for product in rows]
         
         total = result.count if result.count else 0
         pages = (total + limit - 1) // limit
         
-        return {
+        # Returned as-is: encoded once by orjson, no response_model pass
+        return ORJSONResponse({
             "success": True,
             "products": processed_products,
             "pagination": {
                 "page": page,
                 "limit": limit,
                 "total": total,
-                "pages": pages
+                "pages": pages,
+                "total_is_estimate": not include_total,
+                "has_next": next_cursor is not None,
+                "next_cursor": next_cursor
             }
-        }
+        })
         
     except HTTPException:
         raise
@@ -157,7 +154,8 @@ async def list_my_products(
 @router.post("/products", response_model=dict)
 async def create_product(
     product_data: ProductCreate,
-    current_user: UserProfile = Depends(get_current_business_user)
+    current_user: UserProfile = Depends(get_current_business_user),
+    business: dict = Depends(get_current_business)
 ):
     """Create a new product for the current business"""
     
@@ -165,21 +163,12 @@ async def create_product(
         print(f"Creating product for user: {current_user.id}")
         print(f"Product data: {product_data}")
         
-        # Get user's business
-        business_result = supabase_admin.table("businesses").select("id").eq("user_id", str(current_user.id)).execute()
-        
-        if not business_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Business not found. Please register your business first."
-            )
-        
-        business_id = business_result.data[0]["id"]
+        business_id = business["id"]
         print(f"Business ID: {business_id}")
         
         # Validate category exists if provided
         if product_data.category_id:
-            category_check = supabase_admin.table("categories").select("id").eq("id", str(product_data.category_id)).execute()
+            category_check = await supabase_admin.table("categories").select("id").eq("id", str(product_data.category_id)).execute()
             if not category_check.data:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -199,13 +188,13 @@ async def create_product(
         if "price" in product_dict and product_dict["price"] is not None:
             product_dict["price"] = float(product_dict["price"])
         
-        # Convert UUID objects to strings for Supabase
-        product_dict = prepare_data_for_supabase(product_dict)
+        # Convert UUID/Decimal values to JSON types for Supabase
+        product_dict = to_jsonable(product_dict)
         
         print(f"Inserting product: {product_dict}")
         
         # Use admin client to bypass RLS for business operations
-        result = supabase_admin.table("products").insert(product_dict).execute()
+        result = await supabase_admin.table("products").insert(product_dict).execute()
         
         if not result.data:
             raise HTTPException(
@@ -215,13 +204,12 @@ async def create_product(
         
         print(f"Product created: {result.data[0]}")
         
-        # Get product with category info and convert any Decimal fields
-        product_with_category = supabase_admin.table("products").select(
+        # Get product with category info
+        product_with_category = await supabase_admin.table("products").select(
             "*, categories(*)"
         ).eq("id", result.data[0]["id"]).execute()
         
-        # Convert Decimal fields to float for JSON serialization
-        product_data = convert_decimals_to_float(product_with_category.data[0])
+        product_data = product_with_category.data[0]
         
         return {"product": ProductResponse(**product_data)}
         
@@ -240,24 +228,15 @@ async def create_product(
 @router.get("/products/{product_id}", response_model=dict)
 async def get_product(
     product_id: str,
-    current_user: UserProfile = Depends(get_current_business_user)
+    business: dict = Depends(get_current_business)
 ):
     """Get a specific product owned by the current business"""
     
     try:
-        # Get user's business
-        business_result = supabase_admin.table("businesses").select("id").eq("user_id", str(current_user.id)).execute()
-        
-        if not business_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Business not found"
-            )
-        
-        business_id = business_result.data[0]["id"]
+        business_id = business["id"]
         
         # Get product
-        result = supabase_admin.table("products").select(
+        result = await supabase_admin.table("products").select(
             "*, categories(*)"
         ).eq("id", product_id).eq("business_id", business_id).execute()
         
@@ -267,8 +246,7 @@ async def get_product(
                 detail="Product not found"
             )
         
-        # Convert Decimal fields to float for JSON serialization
-        product_data = convert_decimals_to_float(result.data[0])
+        product_data = result.data[0]
         
         return {"product": ProductResponse(**product_data)}
         
@@ -285,30 +263,21 @@ async def get_product(
 async def update_product(
     product_id: str,
     product_update: ProductUpdate,
-    current_user: UserProfile = Depends(get_current_business_user)
+    business: dict = Depends(get_current_business)
 ):
     """Update a product owned by the current business"""
     
     try:
-        # Get user's business
-        business_result = supabase_admin.table("businesses").select("id").eq("user_id", str(current_user.id)).execute()
-        
-        if not business_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Business not found"
-            )
-        
-        business_id = business_result.data[0]["id"]
+        business_id = business["id"]
         
         # Update product
         update_data = product_update.model_dump(exclude_unset=True)
         update_data["updated_at"] = datetime.utcnow().isoformat()
         
-        # Convert UUID objects to strings for Supabase
-        update_data = prepare_data_for_supabase(update_data)
+        # Convert UUID/Decimal values to JSON types for Supabase
+        update_data = to_jsonable(update_data)
         
-        result = supabase_admin.table("products").update(update_data).eq("id", product_id).eq("business_id", business_id).execute()
+        result = await supabase_admin.table("products").update(update_data).eq("id", product_id).eq("business_id", business_id).execute()
         
         if not result.data:
             raise HTTPException(
@@ -316,13 +285,15 @@ async def update_product(
                 detail="Product not found"
             )
         
+        # Offer listings embed product data
+        await response_cache.invalidate(OFFERS_TAG, product_tag(product_id))
+        
         # Get updated product with category info
-        product_with_category = supabase_admin.table("products").select(
+        product_with_category = await supabase_admin.table("products").select(
             "*, categories(*)"
         ).eq("id", result.data[0]["id"]).execute()
         
-        # Convert Decimal fields to float for JSON serialization
-        product_data = convert_decimals_to_float(product_with_category.data[0])
+        product_data = product_with_category.data[0]
         
         return {"product": ProductResponse(**product_data)}
         
@@ -338,24 +309,15 @@ async def update_product(
 @router.delete("/products/{product_id}", response_model=MessageResponse)
 async def delete_product(
     product_id: str,
-    current_user: UserProfile = Depends(get_current_business_user)
+    business: dict = Depends(get_current_business)
 ):
     """Delete a product owned by the current business"""
     
     try:
-        # Get user's business
-        business_result = supabase_admin.table("businesses").select("id").eq("user_id", str(current_user.id)).execute()
-        
-        if not business_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Business not found"
-            )
-        
-        business_id = business_result.data[0]["id"]
+        business_id = business["id"]
         
         # Check if product has any active offers
-        offers_result = supabase_admin.table("offers").select("id").eq("product_id", product_id).eq("is_active", True).execute()
+        offers_result = await supabase_admin.table("offers").select("id").eq("product_id", product_id).eq("is_active", True).execute()
         
         if offers_result.data:
             raise HTTPException(
@@ -364,7 +326,7 @@ async def delete_product(
             )
         
         # Delete product
-        result = supabase_admin.table("products").delete().eq("id", product_id).eq("business_id", business_id).execute()
+        result = await supabase_admin.table("products").delete().eq("id", product_id).eq("business_id", business_id).execute()
         
         if not result.data:
             raise HTTPException(
@@ -372,6 +334,8 @@ async def delete_product(
                 detail="Product not found"
             )
         
+        await response_cache.invalidate(OFFERS_TAG, product_tag(product_id))
+        
         return MessageResponse(message="Product deleted successfully")
         
     except HTTPException:
@@ -389,6 +353,7 @@ async def delete_product(
 @router.post("/products/upload-image", response_model=dict)
 async def upload_product_image(
     image: UploadFile = File(...),
+    product_id: Optional[str] = Form(None, description="Product whose image this replaces"),
     current_user: UserProfile = Depends(get_current_business_user)
 ):
     """Upload product image with automatic compression and validation"""
@@ -405,21 +370,35 @@ async def upload_product_image(
                 detail="Invalid file type. Only JPEG, PNG, GIF, and WEBP are allowed."
             )
         
-        # Read file content
-        original_data = await image.read()
+        # Read file content in chunks, refusing anything over the upload limit
+        chunks = []
+        total_read = 0
+        while chunk := await image.read(settings.storage_upload_chunk_size):
+            total_read += len(chunk)
+            if total_read > settings.max_image_upload_bytes:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Image too large. Maximum upload size is {settings.max_image_upload_bytes // (1024 * 1024)}MB."
+                )
+            chunks.append(chunk)
+        original_data = b"".join(chunks)
+        del chunks
         print(f"Read {len(original_data)} bytes from uploaded file")
         
         # Import image utilities
         try:
-            from app.utils.image_utils import validate_image_file, compress_image, get_image_info
+            from app.utils.image_utils import validate_image_file, get_image_info, process_product_image
+            from app.utils.image_worker import run_image_task
         except ImportError as e:
             print(f"Failed to import image utilities: {e}")
             # Fallback: proceed without compression
             file_content = original_data
+            variants = {}
             compression_info = {"message": "Image utilities not available, using original"}
         else:
             # Validate the actual image data
-            is_valid, validation_message = validate_image_file(original_data)
+            # Decoding/encoding is CPU-bound, so it runs in the image worker pool
+            is_valid, validation_message = await run_image_task(validate_image_file, original_data)
             if not is_valid:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -433,24 +412,19 @@ async def upload_product_image(
             # Set size limit for Supabase (5MB max, but compress to 2MB for better performance)
             max_size = 2 * 1024 * 1024  # 2MB
             
-            # Compress image if necessary
-            if len(original_data) > max_size or original_info.get('width', 0) > 1920:
-                print(f"Compressing image from {len(original_data)} bytes...")
-                file_content, compression_info = compress_image(
-                    original_data, 
-                    max_size_bytes=max_size,
-                    quality=85,
-                    max_dimension=1920
-                )
-                print(f"Compression info: {compression_info}")
-            else:
-                file_content = original_data
-                compression_info = {
-                    "original_size": len(original_data),
-                    "compressed_size": len(original_data),
-                    "compression_ratio": 0,
-                    "message": "No compression needed"
-                }
+            # Compress image if necessary, and build the responsive variants
+            # (all widths, WebP + JPEG) in the same worker task from one decode
+            compress = len(original_data) > max_size or original_info.get('width', 0) > 1920
+            print(f"Processing image of {len(original_data)} bytes (compress={compress})...")
+            file_content, compression_info, variants = await run_image_task(
+                process_product_image,
+                original_data,
+                compress,
+                max_size_bytes=max_size,
+                quality=85,
+                max_dimension=1920
+            )
+            print(f"Compression info: {compression_info}")
         
         # Final size check
         if len(file_content) > 5 * 1024 * 1024:  # Supabase hard limit
@@ -464,39 +438,41 @@ async def upload_product_image(
         if not file_extension:
             file_extension = ".jpg"
             
-        unique_filename = f"businesses/{str(current_user.id)}/{uuid.uuid4()}{file_extension}"
+        # With variants: businesses/{user}/{id}/original.jpg next to {width}.{format}
+        base_path = f"businesses/{str(current_user.id)}/{uuid.uuid4()}"
+        if variants:
+            unique_filename = f"{base_path}/{ORIGINAL_IMAGE_NAME}{file_extension}"
+        else:
+            unique_filename = f"{base_path}{file_extension}"
         
         print(f"Uploading: {unique_filename} ({len(file_content)} bytes)")
         
-        # Upload using requests library for better error handling
+        # Stream to Supabase Storage over the shared async connection pool
+        content_type = "image/jpeg" if compression_info.get("final_format") == "JPEG" else image.content_type
         try:
-            import requests
-            
-            upload_url = f"{settings.supabase_url}/storage/v1/object/product-images/{unique_filename}"
-            
-            headers = {
-                "Authorization": f"Bearer {settings.supabase_service_role_key}",
-                "Content-Type": image.content_type,
-                "Cache-Control": "3600"
-            }
-            
-            print(f"Making upload request to: {upload_url}")
-            response = requests.post(upload_url, data=file_content, headers=headers, timeout=30)
-            
-            print(f"Upload response: {response.status_code}")
-            if response.status_code not in [200, 201]:
-                print(f"Upload failed with response: {response.text}")
-                raise Exception(f"Upload failed: {response.status_code} - {response.text}")
-            
-            print("✅ Upload successful!")
-            
-        except requests.RequestException as e:
-            print(f"❌ Upload request failed: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Upload failed: {str(e)}"
-            )
-        except Exception as upload_error:
+            upload_paths = [unique_filename]
+            uploads = [storage_client.upload("product-images", unique_filename, file_content, content_type)]
+            for variant_name, variant_data in variants.items():
+                variant_type = IMAGE_VARIANT_FORMATS[variant_name.rsplit(".", 1)[1]]
+                upload_paths.append(f"{base_path}/{variant_name}")
+                uploads.append(storage_client.upload(
+                    "product-images", upload_paths[-1], variant_data, variant_type, cache_control="31536000"
+                ))
+            # Let every upload finish so the ones that did succeed can be removed
+            results = await asyncio.gather(*uploads, return_exceptions=True)
+            failures = [result for result in results if isinstance(result, BaseException)]
+            if failures:
+                uploaded = [path for path, result in zip(upload_paths, results) if not isinstance(result, BaseException)]
+                try:
+                    await storage_client.remove("product-images", uploaded)
+                except Exception as cleanup_error:
+                    print(f"Failed to remove partial upload {uploaded}: {cleanup_error}")
+                raise failures[0]
+            print(f"✅ Upload successful! ({len(variants)} variants)")
+            if product_id:
+                # Cached product pages and offer listings show the product image
+                await response_cache.invalidate(OFFERS_TAG, product_tag(product_id))
+        except StorageUploadError as upload_error:
             print(f"❌ Upload failed: {upload_error}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -504,12 +480,13 @@ async def upload_product_image(
             )
         
         # Generate public URL
-        public_url = f"{settings.supabase_url}/storage/v1/object/public/product-images/{unique_filename}"
+        public_url = storage_client.public_url("product-images", unique_filename)
         
         # Create response with detailed info
         response_data = {
             "path": unique_filename,
             "url": public_url,
+            "variants": image_variant_urls(public_url),
             "message": "Image uploaded successfully"
         }
         
@@ -549,7 +526,7 @@ async def get_business_profile(
     
     try:
         # Get business profile
-        result = supabase_admin.table("businesses").select(
+        result = await supabase_admin.table("businesses").select(
             "*, categories(*)"
         ).eq("user_id", str(current_user.id)).execute()
         
@@ -559,8 +536,7 @@ async def get_business_profile(
                 detail="Business profile not found"
             )
         
-        # Convert any problematic fields
-        business_data = convert_decimals_to_float(result.data[0])
+        business_data = result.data[0]
         
         return {"business": BusinessResponse(**business_data)}
         
@@ -583,7 +559,7 @@ async def register_business(
     
     try:
         # Check if user already has a business
-        existing_business = supabase_admin.table("businesses").select("id").eq("user_id", str(current_user.id)).execute()
+        existing_business = await supabase_admin.table("businesses").select("id").eq("user_id", str(current_user.id)).execute()
         
         if existing_business.data:
             raise HTTPException(
@@ -593,7 +569,7 @@ async def register_business(
         
         # Validate category exists if provided
         if business_data.category_id:
-            category_check = supabase_admin.table("categories").select("id").eq("id", str(business_data.category_id)).execute()
+            category_check = await supabase_admin.table("categories").select("id").eq("id", str(business_data.category_id)).execute()
             if not category_check.data:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -611,10 +587,10 @@ async def register_business(
         elif business_data.business_address:
             print(f"Business address provided without coordinates: {business_data.business_address}")
         
-        # Convert UUID objects to strings for Supabase
-        business_dict = prepare_data_for_supabase(business_dict)
+        # Convert UUID/Decimal values to JSON types for Supabase
+        business_dict = to_jsonable(business_dict)
         
-        result = supabase_admin.table("businesses").insert(business_dict).execute()
+        result = await supabase_admin.table("businesses").insert(business_dict).execute()
         
         if not result.data:
             raise HTTPException(
@@ -623,15 +599,16 @@ async def register_business(
             )
         
         # Update user to be a business user
-        supabase_admin.table("profiles").update({"is_business": True}).eq("id", str(current_user.id)).execute()
+        await supabase_admin.table("profiles").update({"is_business": True}).eq("id", str(current_user.id)).execute()
+        invalidate_user_cache(current_user.id)
+        invalidate_business_cache(current_user.id)
         
         # Get business with category info
-        business_with_category = supabase_admin.table("businesses").select(
+        business_with_category = await supabase_admin.table("businesses").select(
             "*, categories(*)"
         ).eq("id", result.data[0]["id"]).execute()
         
-        # Convert any problematic fields
-        business_data_response = convert_decimals_to_float(business_with_category.data[0])
+        business_data_response = business_with_category.data[0]
         
         return {"business": BusinessResponse(**business_data_response)}
         
@@ -652,7 +629,7 @@ async def register_business_user_complete(
         print(f"Complete registration request: {registration_data.email}")
         
         # Check if user already exists
-        existing_user = supabase_admin.table("profiles").select("email").eq("email", registration_data.email).execute()
+        existing_user = await supabase_admin.table("profiles").select("email").eq("email", registration_data.email).execute()
         
         if existing_user.data:
             raise HTTPException(
@@ -661,7 +638,7 @@ async def register_business_user_complete(
             )
         
         # Create user with Supabase Auth
-        auth_response = supabase_admin.auth.admin.create_user({
+        auth_response = await supabase_admin.auth.admin.create_user({
             "email": registration_data.email,
             "password": registration_data.password,
             "email_confirm": True
@@ -677,7 +654,7 @@ async def register_business_user_complete(
         print(f"✅ Supabase Auth user created: {user_id}")
         
         # Check if profile was auto-created by a trigger
-        existing_profile = supabase_admin.table("profiles").select("*").eq("id", user_id).execute()
+        existing_profile = await supabase_admin.table("profiles").select("*").eq("id", user_id).execute()
         
         if existing_profile.data:
             # Profile exists, update it instead of creating
@@ -690,7 +667,7 @@ async def register_business_user_complete(
                 "is_active": True
             }
             
-            user_result = supabase_admin.table("profiles").update(update_data).eq("id", user_id).execute()
+            user_result = await supabase_admin.table("profiles").update(update_data).eq("id", user_id).execute()
             print(f"✅ Profile updated: {user_result.data}")
         else:
             # Profile doesn't exist, create it
@@ -705,13 +682,13 @@ async def register_business_user_complete(
                 "is_active": True
             }
             
-            user_result = supabase_admin.table("profiles").insert(user_data).execute()
+            user_result = await supabase_admin.table("profiles").insert(user_data).execute()
             print(f"✅ Profile created: {user_result.data}")
         
         if not user_result.data:
             # Rollback: delete the auth user
             try:
-                supabase_admin.auth.admin.delete_user(user_id)
+                await supabase_admin.auth.admin.delete_user(user_id)
             except:
                 pass
             raise HTTPException(
@@ -721,7 +698,7 @@ async def register_business_user_complete(
         
         # Validate category if provided
         if registration_data.category_id:
-            category_check = supabase_admin.table("categories").select("id").eq("id", str(registration_data.category_id)).execute()
+            category_check = await supabase_admin.table("categories").select("id").eq("id", str(registration_data.category_id)).execute()
             if not category_check.data:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -752,8 +729,8 @@ async def register_business_user_complete(
         }
         
         print("Creating business...")
-        business_data = prepare_data_for_supabase(business_data)
-        business_result = supabase_admin.table("businesses").insert(business_data).execute()
+        business_data = to_jsonable(business_data)
+        business_result = await supabase_admin.table("businesses").insert(business_data).execute()
         print(f"✅ Business created: {business_result.data}")
         
         if not business_result.data:
@@ -761,6 +738,7 @@ async def register_business_user_complete(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to create business profile"
             )
+        invalidate_business_cache(user_id)
         
         # Generate token
         from app.core.security import create_access_token
@@ -802,7 +780,7 @@ async def get_business_location(
 ):
     """Get current business location"""
     try:
-        business_result = supabase_admin.table("businesses").select(
+        business_result = await supabase_admin.table("businesses").select(
             "latitude, longitude, business_address, formatted_address, place_id"
         ).eq("user_id", str(current_user.id)).execute()
         
@@ -842,7 +820,10 @@ async def update_business_location(
         # Remove None values
         update_data = {k: v for k, v in update_data.items() if v is not None}
         
-        result = supabase_admin.table("businesses").update(update_data).eq("user_id", str(current_user.id)).execute()
+        result = await supabase_admin.table("businesses").update(update_data).eq("user_id", str(current_user.id)).execute()
+        invalidate_business_cache(current_user.id)
+        # Offers keep their updated_at when the business moves
+        nearby_offer_index.request_rebuild()
         
         if not result.data:
             raise HTTPException(
@@ -866,11 +847,21 @@ async def update_business_location(
 # OFFER MANAGEMENT WITH PAGINATION AND SEARCH
 # ============================================================================
 
-@router.get("/offers", response_model=dict)
+def business_offer_payload(offer: Dict[str, Any]) -> Dict[str, Any]:
+    """An offers row (with products, businesses) as an OfferResponse (updated in place)"""
+    # Rename 'products' to 'product' for frontend consistency
+    if 'products' in offer:
+        offer['product'] = offer.pop('products')
+    return offer
+
+
+@router.get("/offers", response_model=BusinessOfferPage)
 async def list_my_offers(
-    current_user: UserProfile = Depends(get_current_business_user),
-    page: int = Query(1, ge=1),
+    business: dict = Depends(get_current_business),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    page: int = Query(1, ge=1, description="Deprecated: use cursor"),
     limit: int = Query(10, ge=1, le=100),
+    include_total: bool = Query(False, description="Exact total instead of an estimate"),
     search: Optional[str] = Query(None),
     status: Optional[str] = Query(None, regex="^(active|inactive|expired|upcoming)$"),
     product_id: Optional[str] = Query(None),
@@ -880,22 +871,13 @@ async def list_my_offers(
     """List offers for the current business with pagination and search"""
     
     try:
-        # Get user's business
-        business_result = supabase_admin.table("businesses").select("id").eq("user_id", str(current_user.id)).execute()
-        
-        if not business_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Business not found"
-            )
-        
-        business_id = business_result.data[0]["id"]
+        business_id = business["id"]
         current_time = datetime.utcnow().isoformat()
         
         # Build query
         query = supabase_admin.table("offers").select(
             "*, products(*, categories(*)), businesses(business_name)", 
-            count="exact"
+            count=count_method(include_total)
         ).eq("business_id", business_id)
         
         # Apply search filter
@@ -917,38 +899,34 @@ async def list_my_offers(
         if product_id:
             query = query.eq("product_id", product_id)
         
-        # Apply sorting
-        desc_order = sortOrder == "desc"
-        query = query.order(sortBy, desc=desc_order)
-        
-        # Apply pagination
-        offset = (page - 1) * limit
-        query = query.range(offset, offset + limit - 1)
+        # Apply sorting and keyset pagination
+        query = apply_keyset(
+            query, sortBy, sortOrder == "desc", limit,
+            cursor=cursor, offset=(page - 1) * limit
+        )
         
-        result = query.execute()
+        result = await query.execute()
+        rows, next_cursor = next_page(result.data or [], limit, sortBy)
         
         total = result.count if result.count else 0
         total_pages = (total + limit - 1) // limit
         
-        # Convert any Decimal fields to float and fix structure
-        offers_data = []
-        for offer in result.data:
-            offer_data = convert_decimals_to_float(offer)
-            # Rename 'products' to 'product' for frontend consistency
-            if 'products' in offer_data:
-                offer_data['product'] = offer_data['products']
-                del offer_data['products']
-            offers_data.append(offer_data)
+        for offer in rows:
+            business_offer_payload(offer)
         
-        return {
-            "offers": offers_data,
+        # Returned as-is: encoded once by orjson, no response_model pass
+        return ORJSONResponse({
+            "offers": rows,
             "pagination": {
                 "page": page,
                 "limit": limit,
                 "total": total,
-                "totalPages": total_pages
+                "totalPages": total_pages,
+                "totalIsEstimate": not include_total,
+                "hasNext": next_cursor is not None,
+                "nextCursor": next_cursor
             }
-        }
+        })
         
     except HTTPException:
         raise
@@ -963,24 +941,15 @@ async def list_my_offers(
 @router.post("/offers", response_model=dict)
 async def create_offer(
     offer_data: dict,
-    current_user: UserProfile = Depends(get_current_business_user)
+    business: dict = Depends(get_current_business)
 ):
     """Create a new offer with proper validation for all discount types"""
     
     try:
-        # Get user's business
-        business_result = supabase_admin.table("businesses").select("id").eq("user_id", str(current_user.id)).execute()
-        
-        if not business_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Business not found"
-            )
-        
-        business_id = business_result.data[0]["id"]
+        business_id = business["id"]
         
         # Validate product exists and belongs to business
-        product_result = supabase_admin.table("products").select("*").eq("id", offer_data["product_id"]).eq("business_id", business_id).execute()
+        product_result = await supabase_admin.table("products").select("*").eq("id", offer_data["product_id"]).eq("business_id", business_id).execute()
         
         if not product_result.data:
             raise HTTPException(
@@ -1102,13 +1071,16 @@ async def create_offer(
         # Remove None values to avoid database issues
         offer_dict = {k: v for k, v in offer_dict.items() if v is not None}
         
+        # Display text/savings are stored so listings don't recompute them
+        offer_dict.update(compute_display_fields(offer_dict))
+        
         # Convert data for Supabase
-        offer_dict = prepare_data_for_supabase(offer_dict)
+        offer_dict = to_jsonable(offer_dict)
         
         print(f"Inserting offer with type {discount_type}: {offer_dict}")
         
         # Insert offer
-        result = supabase_admin.table("offers").insert(offer_dict).execute()
+        result = await supabase_admin.table("offers").insert(offer_dict).execute()
         
         if not result.data:
             raise HTTPException(
@@ -1116,8 +1088,12 @@ async def create_offer(
                 detail="Failed to create offer"
             )
         
+        offer_search_index.request_refresh()
+        nearby_offer_index.request_refresh()
+        await response_cache.invalidate(OFFERS_TAG)
+        
         # Get offer with product info
-        offer_with_product = supabase_admin.table("offers").select(
+        offer_with_product = await supabase_admin.table("offers").select(
             "*, products(*, categories(*)), businesses(business_name)"
         ).eq("id", result.data[0]["id"]).execute()
         
@@ -1140,24 +1116,15 @@ async def create_offer(
 @router.get("/offers/{offer_id}", response_model=dict)
 async def get_offer(
     offer_id: str,
-    current_user: UserProfile = Depends(get_current_business_user)
+    business: dict = Depends(get_current_business)
 ):
     """Get a specific offer owned by the current business"""
     
     try:
-        # Get user's business
-        business_result = supabase_admin.table("businesses").select("id").eq("user_id", str(current_user.id)).execute()
-        
-        if not business_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Business not found"
-            )
-        
-        business_id = business_result.data[0]["id"]
+        business_id = business["id"]
         
         # Get offer
-        result = supabase_admin.table("offers").select(
+        result = await supabase_admin.table("offers").select(
             "*, products(*, categories(*)), businesses(business_name)"
         ).eq("id", offer_id).eq("business_id", business_id).execute()
         
@@ -1167,8 +1134,8 @@ async def get_offer(
                 detail="Offer not found"
             )
         
-        # Convert and fix structure
-        offer_data = convert_decimals_to_float(result.data[0])
+        # Fix structure
+        offer_data = result.data[0]
         if 'products' in offer_data:
             offer_data['product'] = offer_data['products']
             del offer_data['products']
@@ -1190,24 +1157,15 @@ async def get_offer(
 async def update_offer(
     offer_id: str,
     offer_update: dict,  # Accept flexible dict for all offer types
-    current_user: UserProfile = Depends(get_current_business_user)
+    business: dict = Depends(get_current_business)
 ):
     """Update an offer owned by the current business - supports all offer types"""
     
     try:
-        # Get user's business
-        business_result = supabase_admin.table("businesses").select("id").eq("user_id", str(current_user.id)).execute()
-        
-        if not business_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Business not found"
-            )
-        
-        business_id = business_result.data[0]["id"]
+        business_id = business["id"]
         
         # Get current offer
-        current_offer = supabase_admin.table("offers").select("*, products(price)").eq("id", offer_id).eq("business_id", business_id).execute()
+        current_offer = await supabase_admin.table("offers").select("*, products(price)").eq("id", offer_id).eq("business_id", business_id).execute()
         
         if not current_offer.data:
             raise HTTPException(
@@ -1322,13 +1280,16 @@ async def update_offer(
         # Remove None values
         update_data = {k: v for k, v in update_data.items() if v is not None}
         
+        # Recompute the stored display fields from the updated offer
+        update_data.update(compute_display_fields({**current_data, **update_data}))
+        
         # Convert data for Supabase
-        update_data = prepare_data_for_supabase(update_data)
+        update_data = to_jsonable(update_data)
         
         print(f"Updating offer {offer_id} with data: {update_data}")
         
         # Update offer
-        result = supabase_admin.table("offers").update(update_data).eq("id", offer_id).eq("business_id", business_id).execute()
+        result = await supabase_admin.table("offers").update(update_data).eq("id", offer_id).eq("business_id", business_id).execute()
         
         if not result.data:
             raise HTTPException(
@@ -1336,13 +1297,17 @@ async def update_offer(
                 detail="Offer not found"
             )
         
+        offer_search_index.request_refresh()
+        nearby_offer_index.request_refresh()
+        await response_cache.invalidate(OFFERS_TAG)
+        
         # Get updated offer with product info
-        offer_with_product = supabase_admin.table("offers").select(
+        offer_with_product = await supabase_admin.table("offers").select(
             "*, products(*, categories(*)), businesses(business_name)"
         ).eq("id", result.data[0]["id"]).execute()
         
-        # Convert and fix structure
-        offer_response = convert_decimals_to_float(offer_with_product.data[0])
+        # Fix structure
+        offer_response = offer_with_product.data[0]
         if 'products' in offer_response:
             offer_response['product'] = offer_response['products']
             del offer_response['products']
@@ -1363,7 +1328,7 @@ async def update_offer(
 @router.post("/offers/calculate", response_model=dict)
 async def calculate_offer_discount(
     calculation_request: dict,
-    current_user: UserProfile = Depends(get_current_business_user)
+    business: dict = Depends(get_current_business)
 ):
     """Calculate discount for an offer based on quantity and cart total"""
     
@@ -1378,19 +1343,10 @@ async def calculate_offer_discount(
                 detail="Offer ID is required"
             )
         
-        # Get user's business
-        business_result = supabase_admin.table("businesses").select("id").eq("user_id", str(current_user.id)).execute()
-        
-        if not business_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Business not found"
-            )
-        
-        business_id = business_result.data[0]["id"]
+        business_id = business["id"]
         
         # Get offer with product info
-        offer_result = supabase_admin.table("offers").select(
+        offer_result = await supabase_admin.table("offers").select(
             "*, products(price)"
         ).eq("id", offer_id).eq("business_id", business_id).execute()
         
@@ -1679,21 +1635,12 @@ def get_offer_display_text(offer_data: dict) -> str:
 async def update_offer_status(
     offer_id: str,
     status_data: dict,
-    current_user: UserProfile = Depends(get_current_business_user)
+    business: dict = Depends(get_current_business)
 ):
     """Update offer status (activate/deactivate)"""
     
     try:
-        # Get user's business
-        business_result = supabase_admin.table("businesses").select("id").eq("user_id", str(current_user.id)).execute()
-        
-        if not business_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Business not found"
-            )
-        
-        business_id = business_result.data[0]["id"]
+        business_id = business["id"]
         
         # Update offer status
         update_data = {
@@ -1701,7 +1648,7 @@ async def update_offer_status(
             "updated_at": datetime.utcnow().isoformat()
         }
         
-        result = supabase_admin.table("offers").update(update_data).eq("id", offer_id).eq("business_id", business_id).execute()
+        result = await supabase_admin.table("offers").update(update_data).eq("id", offer_id).eq("business_id", business_id).execute()
         
         if not result.data:
             raise HTTPException(
@@ -1709,13 +1656,17 @@ async def update_offer_status(
                 detail="Offer not found"
             )
         
+        offer_search_index.request_refresh()
+        nearby_offer_index.request_refresh()
+        await response_cache.invalidate(OFFERS_TAG)
+        
         # Get updated offer with product info
-        offer_with_product = supabase_admin.table("offers").select(
+        offer_with_product = await supabase_admin.table("offers").select(
             "*, products(*, categories(*)), businesses(business_name)"
         ).eq("id", result.data[0]["id"]).execute()
         
-        # Convert and fix structure
-        offer_response = convert_decimals_to_float(offer_with_product.data[0])
+        # Fix structure
+        offer_response = offer_with_product.data[0]
         if 'products' in offer_response:
             offer_response['product'] = offer_response['products']
             del offer_response['products']
@@ -1734,24 +1685,15 @@ async def update_offer_status(
 @router.delete("/offers/{offer_id}", response_model=MessageResponse)
 async def delete_offer(
     offer_id: str,
-    current_user: UserProfile = Depends(get_current_business_user)
+    business: dict = Depends(get_current_business)
 ):
     """Delete an offer owned by the current business"""
     
     try:
-        # Get user's business
-        business_result = supabase_admin.table("businesses").select("id").eq("user_id", str(current_user.id)).execute()
-        
-        if not business_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Business not found"
-            )
-        
-        business_id = business_result.data[0]["id"]
+        business_id = business["id"]
         
         # Delete offer
-        result = supabase_admin.table("offers").delete().eq("id", offer_id).eq("business_id", business_id).execute()
+        result = await supabase_admin.table("offers").delete().eq("id", offer_id).eq("business_id", business_id).execute()
         
         if not result.data:
             raise HTTPException(
@@ -1759,6 +1701,10 @@ async def delete_offer(
                 detail="Offer not found"
             )
         
+        offer_search_index.remove_offer(offer_id)
+        nearby_offer_index.remove_offer(offer_id)
+        await response_cache.invalidate(OFFERS_TAG)
+        
         return MessageResponse(message="Offer deleted successfully")
         
     except HTTPException:
@@ -1780,7 +1726,8 @@ async def delete_offer(
 @router.post("/redeem/verify", response_model=dict)
 async def verify_claim_for_redemption(
     verification_request: dict,  # {"claim_identifier": "CLAIM123", "verification_type": "claim_id|qr_code"}
-    current_user: UserProfile = Depends(get_current_business_user)
+    current_user: UserProfile = Depends(get_current_business_user),
+    business: dict = Depends(get_current_business)
 ):
     """Verify a claim for redemption by claim ID or QR code"""
     
@@ -1796,16 +1743,6 @@ async def verify_claim_for_redemption(
         
         print(f"Verifying claim: {claim_identifier} for business user: {current_user.id}")
         
-        # Get user's business
-        business_result = supabase_admin.table("businesses").select("id, business_name").eq("user_id", str(current_user.id)).execute()
-        
-        if not business_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Business not found"
-            )
-        
-        business = business_result.data[0]
         business_id = business["id"]
         business_name = business["business_name"]
         
@@ -1832,7 +1769,7 @@ async def verify_claim_for_redemption(
         print(f"Extracted claim ID: {claim_id}")
         
         # Find the claimed offer
-        claimed_offer_result = supabase_admin.table("claimed_offers").select(
+        claimed_offer_result = await supabase_admin.table("claimed_offers").select(
             "*, offers(*, products(*, categories(*)), businesses(id, business_name)), profiles!user_id(first_name, last_name, email)"
         ).eq("unique_claim_id", claim_id).execute()
         
@@ -1945,7 +1882,7 @@ async def verify_claim_for_redemption(
 @router.post("/redeem/complete", response_model=dict)
 async def complete_claim_redemption(
     redemption_request: dict,  # {"claim_id": "CLAIM123", "redemption_notes": "optional notes"}
-    current_user: UserProfile = Depends(get_current_business_user)
+    business: dict = Depends(get_current_business)
 ):
     """Complete the redemption of a verified claim"""
     
@@ -1961,20 +1898,10 @@ async def complete_claim_redemption(
         
         print(f"Completing redemption for claim: {claim_id}")
         
-        # Get user's business
-        business_result = supabase_admin.table("businesses").select("id, business_name").eq("user_id", str(current_user.id)).execute()
-        
-        if not business_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Business not found"
-            )
-        
-        business = business_result.data[0]
         business_id = business["id"]
         
         # Find and verify the claimed offer again (security check)
-        claimed_offer_result = supabase_admin.table("claimed_offers").select(
+        claimed_offer_result = await supabase_admin.table("claimed_offers").select(
             "*, offers(business_id, title, expiry_date), profiles!user_id(first_name, last_name, email)"
         ).eq("unique_claim_id", claim_id).execute()
         
@@ -2013,7 +1940,7 @@ async def complete_claim_redemption(
             "redemption_notes": redemption_notes or f"Redeemed by {business['business_name']}"
         }
         
-        update_result = supabase_admin.table("claimed_offers").update(redemption_update).eq("id", claimed_offer["id"]).execute()
+        update_result = await supabase_admin.table("claimed_offers").update(redemption_update).eq("id", claimed_offer["id"]).execute()
         
         if not update_result.data:
             raise HTTPException(
@@ -2050,11 +1977,337 @@ async def complete_claim_redemption(
         )
 
 
+# Error codes returned by redeem_claim() -> message
+SCAN_REDEMPTION_ERRORS = {
+    "CLAIM_NOT_FOUND": "Claim not found",
+    "UNAUTHORIZED_BUSINESS": "This claim does not belong to your business",
+    "ALREADY_REDEEMED": "This claim has already been redeemed",
+    "OFFER_EXPIRED": "This offer has expired",
+}
+
+# reconcile_offline_redemptions() status -> (error code, message) for rejected scans
+OFFLINE_REDEMPTION_CONFLICTS = {
+    "conflict": ("ALREADY_REDEEMED", "This claim has already been redeemed"),
+    "expired": ("OFFER_EXPIRED", "This offer has expired"),
+    "scanned_before_claim": ("INVALID_SCAN_TIME", "Scan time is before the claim was made"),
+}
+
+
+@router.post("/redeem/scan", response_model=ScanRedemptionResponse)
+async def scan_and_redeem_claim(
+    scan_request: ScanRedemptionRequest,
+    business: dict = Depends(get_current_business)
+):
+    """
+    Verify and redeem a claim in one round trip (checkout fast path).
+    Ownership, expiry and the is_redeemed = false condition are enforced in a
+    single conditional update, so concurrent scans cannot redeem twice.
+    """
+    
+    try:
+        from app.utils.claim_utils import parse_qr_code_content, generate_redemption_receipt_data
+        
+        claim_identifier = scan_request.claim_identifier.strip()
+        if scan_request.verification_type == "qr_code":
+            claim_id = parse_qr_code_content(claim_identifier)
+        else:
+            claim_id = claim_identifier
+        
+        if not claim_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid QR code format"
+            )
+        
+        redemption_notes = (scan_request.redemption_notes or "").strip() or f"Redeemed by {business['business_name']}"
+        
+        result = await supabase_admin.rpc("redeem_claim", {
+            "p_unique_claim_id": claim_id,
+            "p_business_id": business["id"],
+            "p_redemption_notes": redemption_notes
+        }).execute()
+        
+        claimed_offer = result.data or {"error_code": "CLAIM_NOT_FOUND"}
+        error_code = claimed_offer.get("error_code")
+        if error_code:
+            return ScanRedemptionResponse(
+                success=False,
+                message=SCAN_REDEMPTION_ERRORS.get(error_code, "Claim could not be redeemed"),
+                error_code=error_code,
+                redeemed_at=claimed_offer.get("redeemed_at"),
+                expiry_date=claimed_offer.get("expiry_date")
+            )
+        
+        print(f"Scan redemption complete for claim {claim_id}")
+        
+        # The redemption is committed; a receipt that can't be built must not
+        # turn it into an error the cashier would retry
+        try:
+            receipt_data = generate_redemption_receipt_data(claimed_offer, claimed_offer.get("businesses") or {})
+            receipt = RedemptionReceipt(**receipt_data)
+        except Exception as e:
+            print(f"Failed to build receipt for claim {claim_id}: {e}")
+            receipt = None
+        
+        return ScanRedemptionResponse(
+            success=True,
+            message="Claim redeemed successfully!",
+            claim_id=claimed_offer.get("unique_claim_id") or claim_id,
+            redeemed_at=claimed_offer.get("redeemed_at"),
+            receipt=receipt
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in scan redemption: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to redeem claim: {str(e)}"
+        )
+
+
+@router.get("/redeem/token-key", response_model=dict)
+async def get_claim_token_key(
+    business: dict = Depends(get_current_business)
+):
+    """Public key for verifying signed claim tokens on point-of-sale devices"""
+    public_key = get_claim_token_public_key()
+    return {
+        "enabled": public_key is not None,
+        "algorithm": CLAIM_TOKEN_ALGORITHM,
+        "public_key": public_key
+    }
+
+
+@router.post("/redeem/offline", response_model=OfflineRedemptionResponse)
+async def redeem_offline_claims(
+    offline_request: OfflineRedemptionRequest,
+    business: dict = Depends(get_current_business)
+):
+    """
+    Redeem a batch of scans from signed claim tokens. Tokens are verified
+    cryptographically without a database lookup; the scans that pass are
+    written with one reconcile_offline_redemptions() call, so a scan is only
+    reported as accepted once its redemption is stored.
+    """
+    
+    try:
+        business_id = str(business["id"])
+        default_notes = f"Redeemed by {business['business_name']} (offline)"
+        current_time = datetime.now(timezone.utc)
+        
+        results = []
+        redemptions = []
+        pending = {}  # claim id -> index of its result
+        for item in offline_request.redemptions:
+            token = extract_claim_token(item.claim_token)
+            token_data = verify_claim_token(token) if token else None
+            
+            if not token_data:
+                results.append(OfflineRedemptionResult(
+                    accepted=False, message="Invalid or unsigned claim token", error_code="INVALID_TOKEN"
+                ))
+                continue
+            
+            claim_id = token_data["claim_id"]
+            if token_data["business_id"] != business_id:
+                results.append(OfflineRedemptionResult(
+                    claim_id=claim_id, accepted=False,
+                    message="This claim does not belong to your business", error_code="UNAUTHORIZED_BUSINESS"
+                ))
+                continue
+            
+            # Device clocks can't date a redemption in the future, or further
+            # back than a device is expected to hold scans while offline
+            scanned_at = item.scanned_at or current_time
+            if scanned_at.tzinfo is None:
+                scanned_at = scanned_at.replace(tzinfo=timezone.utc)
+            scanned_at = min(scanned_at, current_time)
+            if scanned_at < current_time - timedelta(seconds=settings.offline_redemption_max_age_seconds):
+                results.append(OfflineRedemptionResult(
+                    claim_id=claim_id, accepted=False,
+                    message="This scan is too old to redeem", error_code="INVALID_SCAN_TIME"
+                ))
+                continue
+            if scanned_at > token_data["expires_at"]:
+                results.append(OfflineRedemptionResult(
+                    claim_id=claim_id, accepted=False, message="This offer has expired", error_code="OFFER_EXPIRED"
+                ))
+                continue
+            
+            if claim_id in pending:
+                results.append(OfflineRedemptionResult(
+                    claim_id=claim_id, accepted=False,
+                    message="This claim has already been redeemed", error_code="ALREADY_REDEEMED"
+                ))
+                continue
+            
+            pending[claim_id] = len(results)
+            results.append(None)
+            redemptions.append({
+                "unique_claim_id": claim_id,
+                "business_id": business_id,
+                "scanned_at": scanned_at.isoformat(),
+                "redemption_notes": (item.redemption_notes or "").strip() or default_notes
+            })
+        
+        if redemptions:
+            reconciled = await supabase_admin.rpc("reconcile_offline_redemptions", {
+                "p_redemptions": redemptions
+            }).execute()
+            outcomes = {row["unique_claim_id"]: row["status"] for row in reconciled.data or []}
+            
+            for claim_id, index in pending.items():
+                outcome = outcomes.get(claim_id, "conflict")
+                if outcome == "redeemed":
+                    results[index] = OfflineRedemptionResult(
+                        claim_id=claim_id, accepted=True, message="Redemption accepted"
+                    )
+                else:
+                    error_code, message = OFFLINE_REDEMPTION_CONFLICTS.get(outcome, OFFLINE_REDEMPTION_CONFLICTS["conflict"])
+                    results[index] = OfflineRedemptionResult(
+                        claim_id=claim_id, accepted=False, message=message, error_code=error_code
+                    )
+        
+        accepted = len([r for r in results if r.accepted])
+        return OfflineRedemptionResponse(
+            total_processed=len(results),
+            accepted=accepted,
+            rejected=len(results) - accepted,
+            results=results
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in offline redemption: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process offline redemptions: {str(e)}"
+        )
+
+
+@router.post("/redeem/bulk", response_model=BulkRedemptionResponse)
+async def bulk_redeem_claims(
+    bulk_request: BulkRedemptionRequest,
+    business: dict = Depends(get_current_business)
+):
+    """Redeem up to 50 claims at once: one lookup query and one update"""
+    
+    try:
+        business_id = business["id"]
+        claim_ids = list(dict.fromkeys(claim_id.strip() for claim_id in bulk_request.claim_ids if claim_id.strip()))
+        redemption_notes = (bulk_request.redemption_notes or "").strip() or f"Redeemed by {business['business_name']}"
+        
+        if not claim_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="At least one claim ID is required"
+            )
+        
+        print(f"Bulk redemption of {len(claim_ids)} claims for business: {business_id}")
+        
+        # Resolve every claim in one query
+        claims_result = await supabase_admin.table("claimed_offers").select(
+            "id, unique_claim_id, is_redeemed, offers(business_id, expiry_date)"
+        ).in_("unique_claim_id", claim_ids).execute()
+        
+        claims_by_code = {claim["unique_claim_id"]: claim for claim in claims_result.data or []}
+        current_time = datetime.now(timezone.utc)
+        
+        results = {}
+        eligible = {}
+        for claim_id in claim_ids:
+            claimed_offer = claims_by_code.get(claim_id)
+            if not claimed_offer:
+                results[claim_id] = BulkRedemptionResult(
+                    claim_id=claim_id, success=False, message="Claim not found", error_code="CLAIM_NOT_FOUND"
+                )
+                continue
+            
+            offer = claimed_offer["offers"] or {}
+            if offer.get("business_id") != business_id:
+                results[claim_id] = BulkRedemptionResult(
+                    claim_id=claim_id, success=False,
+                    message="This claim does not belong to your business", error_code="UNAUTHORIZED_BUSINESS"
+                )
+                continue
+            
+            if claimed_offer.get("is_redeemed", False):
+                results[claim_id] = BulkRedemptionResult(
+                    claim_id=claim_id, success=False,
+                    message="This claim has already been redeemed", error_code="ALREADY_REDEEMED"
+                )
+                continue
+            
+            try:
+                expiry_date = datetime.fromisoformat(offer["expiry_date"].replace('Z', '+00:00'))
+                if expiry_date.tzinfo is None:
+                    expiry_date = expiry_date.replace(tzinfo=timezone.utc)
+                if current_time > expiry_date:
+                    results[claim_id] = BulkRedemptionResult(
+                        claim_id=claim_id, success=False, message="This offer has expired", error_code="OFFER_EXPIRED"
+                    )
+                    continue
+            except (ValueError, KeyError, AttributeError) as e:
+                print(f"Error parsing expiry date for {claim_id}: {e}")
+                # Continue with redemption if date parsing fails
+            
+            eligible[claimed_offer["id"]] = claim_id
+        
+        # Mark all eligible claims redeemed in one set-based update. The
+        # is_redeemed guard means a claim redeemed concurrently elsewhere is
+        # not returned, and is reported as already redeemed.
+        redeemed_ids = set()
+        if eligible:
+            update_result = await supabase_admin.table("claimed_offers").update({
+                "is_redeemed": True,
+                "redeemed_at": current_time.isoformat(),
+                "redemption_notes": redemption_notes
+            }).in_("id", list(eligible.keys())).eq("is_redeemed", False).execute()
+            redeemed_ids = {row["id"] for row in update_result.data or []}
+        
+        for row_id, claim_id in eligible.items():
+            if row_id in redeemed_ids:
+                results[claim_id] = BulkRedemptionResult(
+                    claim_id=claim_id, success=True, message="Claim redeemed successfully"
+                )
+            else:
+                results[claim_id] = BulkRedemptionResult(
+                    claim_id=claim_id, success=False,
+                    message="This claim has already been redeemed", error_code="ALREADY_REDEEMED"
+                )
+        
+        ordered_results = [results[claim_id] for claim_id in claim_ids]
+        successful = len([r for r in ordered_results if r.success])
+        
+        print(f"Bulk redemption complete: {successful}/{len(ordered_results)} redeemed")
+        
+        return BulkRedemptionResponse(
+            total_processed=len(ordered_results),
+            successful_redemptions=successful,
+            failed_redemptions=len(ordered_results) - successful,
+            results=ordered_results
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in bulk redemption: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process bulk redemption: {str(e)}"
+        )
+
+
 @router.get("/redeem/history", response_model=dict)
 async def get_redemption_history(
-    current_user: UserProfile = Depends(get_current_business_user),
-    page: int = Query(1, ge=1),
+    business: dict = Depends(get_current_business),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    page: int = Query(1, ge=1, description="Deprecated: use cursor"),
     limit: int = Query(20, ge=1, le=100),
+    include_total: bool = Query(False, description="Exact total instead of an estimate"),
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     offer_id: Optional[str] = Query(None, description="Filter by specific offer"),
@@ -2063,21 +2316,12 @@ async def get_redemption_history(
     """Get redemption history for the business"""
     
     try:
-        # Get user's business
-        business_result = supabase_admin.table("businesses").select("id, business_name").eq("user_id", str(current_user.id)).execute()
-        
-        if not business_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Business not found"
-            )
-        
-        business_id = business_result.data[0]["id"]
+        business_id = business["id"]
         
         # Build query - get claims for offers belonging to this business
         query = supabase_admin.table("claimed_offers").select(
             "*, offers!inner(id, title, business_id, discount_type, discount_value, original_price, discounted_price, products(name)), profiles!user_id(first_name, last_name, email)",
-            count="exact"
+            count=count_method(include_total)
         ).eq("offers.business_id", business_id)
         
         if redeemed_only:
@@ -2113,12 +2357,15 @@ async def get_redemption_history(
                     detail="Invalid end_date format. Use YYYY-MM-DD"
                 )
         
-        # Apply pagination and sorting
-        offset = (page - 1) * limit
+        # Apply sorting and keyset pagination
         sort_field = "redeemed_at" if redeemed_only else "claimed_at"
-        query = query.order(sort_field, desc=True).range(offset, offset + limit - 1)
+        query = apply_keyset(
+            query, sort_field, True, limit,
+            cursor=cursor, offset=(page - 1) * limit
+        )
         
-        result = query.execute()
+        result = await query.execute()
+        rows, next_cursor = next_page(result.data or [], limit, sort_field)
         
         total = result.count if result.count else 0
         total_pages = (total + limit - 1) // limit
@@ -2127,7 +2374,7 @@ async def get_redemption_history(
         redemptions = []
         total_savings_provided = 0
         
-        for claim in result.data:
+        for claim in rows:
             offer = claim["offers"]
             customer = claim["profiles"]
             
@@ -2178,8 +2425,10 @@ async def get_redemption_history(
                 "limit": limit,
                 "total": total,
                 "total_pages": total_pages,
-                "has_next": page < total_pages,
-                "has_prev": page > 1
+                "total_is_estimate": not include_total,
+                "has_next": next_cursor is not None,
+                "has_prev": page > 1 or cursor is not None,
+                "next_cursor": next_cursor
             },
             "summary": {
                 "total_claims": total,
@@ -2204,33 +2453,25 @@ async def get_redemption_history(
 
 @router.get("/redeem/stats", response_model=dict)
 async def get_redemption_stats(
-    current_user: UserProfile = Depends(get_current_business_user),
+    business: dict = Depends(get_current_business),
     days: int = Query(30, ge=1, le=365, description="Number of days to include in stats")
 ):
     """Get redemption statistics for the business"""
     
     try:
-        # Get user's business
-        business_result = supabase_admin.table("businesses").select("id, business_name").eq("user_id", str(current_user.id)).execute()
-        
-        if not business_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Business not found"
-            )
-        
-        business_id = business_result.data[0]["id"]
+        business_id = business["id"]
         
         # Calculate date range
         end_date = datetime.now(timezone.utc)
         start_date = end_date - timedelta(days=days)
         
-        # Get claims data
-        claims_result = supabase_admin.table("claimed_offers").select(
-            "*, offers!inner(business_id, discount_type, discount_value, original_price)"
-        ).eq("offers.business_id", business_id).gte("claimed_at", start_date.isoformat()).execute()
+        # The incrementally maintained rollup, summed per (day, claim_type) in SQL
+        stats_result = await supabase_admin.rpc("get_redemption_rollup", {
+            "p_business_id": business_id,
+            "p_since": start_date.strftime("%Y-%m-%d")
+        }).execute()
         
-        if not claims_result.data:
+        if not stats_result.data:
             return {
                 "period_days": days,
                 "total_claims": 0,
@@ -2242,54 +2483,37 @@ async def get_redemption_stats(
                 "claim_types": {"in_store": 0, "online": 0}
             }
         
-        claims = claims_result.data
-        
         # Calculate stats
-        total_claims = len(claims)
-        redeemed_claims = [c for c in claims if c.get("is_redeemed")]
-        pending_claims = [c for c in claims if not c.get("is_redeemed")]
-        
-        total_redemptions = len(redeemed_claims)
-        pending_redemptions = len(pending_claims)
-        redemption_rate = (total_redemptions / total_claims * 100) if total_claims > 0 else 0
-        
-        # Calculate total savings provided
+        total_claims = 0
+        total_redemptions = 0
         total_savings = 0
-        for claim in redeemed_claims:
-            offer = claim["offers"]
-            if offer["discount_type"] == "percentage" and offer["original_price"]:
-                savings = float(offer["original_price"]) * (float(offer["discount_value"]) / 100)
-            elif offer["discount_type"] == "fixed":
-                savings = float(offer["discount_value"]) if offer["discount_value"] else 0
-            else:
-                savings = 0
-            total_savings += savings
-        
-        # Claim type breakdown
         claim_types = {"in_store": 0, "online": 0}
-        for claim in claims:
-            claim_type = claim.get("claim_type", "in_store")
-            claim_types[claim_type] = claim_types.get(claim_type, 0) + 1
+        daily_counts = {}
         
-        # Daily breakdown (last 7 days for chart)
-        daily_breakdown = []
-        for i in range(min(7, days)):
-            day_date = end_date - timedelta(days=i)
-            day_start = day_date.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-            
-            day_claims = [c for c in claims if day_start <= datetime.fromisoformat(c["claimed_at"].replace('Z', '+00:00')) <= day_end]
-            day_redemptions = [c for c in day_claims if c.get("is_redeemed")]
+        for row in stats_result.data:
+            total_claims += row["claims"]
+            total_redemptions += row["redemptions"]
+            total_savings += float(row["savings"] or 0)
+            claim_types[row["claim_type"]] = claim_types.get(row["claim_type"], 0) + row["claims"]
             
+            day_counts = daily_counts.setdefault(row["day"], {"claims": 0, "redemptions": 0})
+            day_counts["claims"] += row["claims"]
+            day_counts["redemptions"] += row["redemptions"]
+        
+        pending_redemptions = total_claims - total_redemptions
+        redemption_rate = (total_redemptions / total_claims * 100) if total_claims > 0 else 0
+        
+        # Daily breakdown (last 7 days for chart, oldest first)
+        daily_breakdown = []
+        for i in reversed(range(min(7, days))):
+            day = (end_date - timedelta(days=i)).strftime("%Y-%m-%d")
+            day_counts = daily_counts.get(day, {"claims": 0, "redemptions": 0})
             daily_breakdown.append({
-                "date": day_start.strftime("%Y-%m-%d"),
-                "claims": len(day_claims),
-                "redemptions": len(day_redemptions)
+                "date": day,
+                "claims": day_counts["claims"],
+                "redemptions": day_counts["redemptions"]
             })
         
-        # Reverse to show oldest first
-        daily_breakdown.reverse()
-        
         return {
             "period_days": days,
             "date_range": {
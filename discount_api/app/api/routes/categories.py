@@ -1,22 +1,41 @@
 # app/api/routes/categories.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
+from typing import List, Optional
+from app.core.config import settings
 from app.core.database import supabase
 from app.schemas.business import CategoryCreate, CategoryResponse, MessageResponse
 from app.schemas.user import UserProfile
+from app.utils.cache import etag_matches
+from app.utils.category_cache import category_cache
 from app.utils.dependencies import get_current_admin_user
 import uuid
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
+
+def category_cache_headers(etag: str) -> dict:
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.category_cache_max_age_seconds}"
+    }
+
+
 @router.get("/", response_model=List[CategoryResponse])
-async def list_categories():
-    """List all categories (public endpoint)"""
+async def list_categories(
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
+):
+    """List all categories (public endpoint, cached)"""
     
     try:
-        result = supabase.table("categories").select("*").order("name").execute()
+        categories, etag = await category_cache.list_all()
+        headers = category_cache_headers(etag)
+        
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
         
-        return [CategoryResponse(**category) for category in result.data]
+        response.headers.update(headers)
+        return [CategoryResponse(**category) for category in categories]
         
     except Exception as e:
         raise HTTPException(
@@ -26,19 +45,28 @@ async def list_categories():
 
 
 @router.get("/{category_id}", response_model=CategoryResponse)
-async def get_category(category_id: int): 
-    """Get a specific category by ID (public endpoint)"""
+async def get_category(
+    category_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
+): 
+    """Get a specific category by ID (public endpoint, cached)"""
     
     try:
-        result = supabase.table("categories").select("*").eq("id", category_id).execute()
+        category, etag = await category_cache.get(category_id)
         
-        if not result.data:
+        if not category:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Category not found"
             )
         
-        return CategoryResponse(**result.data[0])
+        headers = category_cache_headers(etag)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        response.headers.update(headers)
+        return CategoryResponse(**category)
         
     except HTTPException:
         raise
@@ -58,7 +86,7 @@ async def create_category(
     
     try:
         # Check if category name already exists
-        existing_category = supabase.table("categories").select("id").eq("name", category_data.name).execute()
+        existing_category = await supabase.table("categories").select("id").eq("name", category_data.name).execute()
         
         if existing_category.data:
             raise HTTPException(
@@ -70,7 +98,7 @@ async def create_category(
         category_dict = category_data.model_dump()
         category_dict["id"] = str(uuid.uuid4())
         
-        result = supabase.table("categories").insert(category_dict).execute()
+        result = await supabase.table("categories").insert(category_dict).execute()
         
         if not result.data:
             raise HTTPException(
@@ -78,6 +106,8 @@ async def create_category(
                 detail="Failed to create category"
             )
         
+        category_cache.invalidate()
+        
         return CategoryResponse(**result.data[0])
         
     except HTTPException:
@@ -99,7 +129,7 @@ async def update_category(
     
     try:
         # Check if category exists
-        existing_category = supabase.table("categories").select("*").eq("id", category_id).execute()
+        existing_category = await supabase.table("categories").select("*").eq("id", category_id).execute()
         
         if not existing_category.data:
             raise HTTPException(
@@ -109,7 +139,7 @@ async def update_category(
         
         # Check if new name conflicts with another category
         if category_data.name != existing_category.data[0]["name"]:
-            name_conflict = supabase.table("categories").select("id").eq("name", category_data.name).execute()
+            name_conflict = await supabase.table("categories").select("id").eq("name", category_data.name).execute()
             if name_conflict.data:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -117,7 +147,7 @@ async def update_category(
                 )
         
         # Update category
-        result = supabase.table("categories").update(category_data.model_dump()).eq("id", category_id).execute()
+        result = await supabase.table("categories").update(category_data.model_dump()).eq("id", category_id).execute()
         
         if not result.data:
             raise HTTPException(
@@ -125,6 +155,8 @@ async def update_category(
                 detail="Failed to update category"
             )
         
+        category_cache.invalidate()
+        
         return CategoryResponse(**result.data[0])
         
     except HTTPException:
@@ -145,8 +177,8 @@ async def delete_category(
     
     try:
         # Check if category is being used by businesses or products
-        business_usage = supabase.table("businesses").select("id").eq("category_id", category_id).limit(1).execute()
-        product_usage = supabase.table("products").select("id").eq("category_id", category_id).limit(1).execute()
+        business_usage = await supabase.table("businesses").select("id").eq("category_id", category_id).limit(1).execute()
+        product_usage = await supabase.table("products").select("id").eq("category_id", category_id).limit(1).execute()
         
         if business_usage.data or product_usage.data:
             raise HTTPException(
@@ -155,7 +187,7 @@ async def delete_category(
             )
         
         # Delete category
-        result = supabase.table("categories").delete().eq("id", category_id).execute()
+        result = await supabase.table("categories").delete().eq("id", category_id).execute()
         
         if not result.data:
             raise HTTPException(
@@ -163,6 +195,8 @@ async def delete_category(
                 detail="Category not found"
             )
         
+        category_cache.invalidate()
+        
         return MessageResponse(message="Category deleted successfully")
         
     except HTTPException:
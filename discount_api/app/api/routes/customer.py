@@ -1,5 +1,5 @@
 # app/api/routes/customer.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
 from typing import Optional, List
 from datetime import datetime
 from app.core.database import supabase
@@ -18,33 +18,47 @@ from app.schemas.customer import (
 )
 from app.schemas.user import UserProfile
 from app.utils.dependencies import get_current_active_user, get_current_user_optional
+from app.utils.product_loader import ProductLoader, get_product_loader
+from app.utils.image_variants import add_image_variants
+from app.utils.claim_tokens import token_for_claim, verify_claim_token
+from app.utils.response_cache import OFFERS_TAG, response_cache
+from app.utils.search import (
+    RELEVANCE_SORT, normalize_search_query, order_by_relevance, search_source, attach_search_highlights
+)
+from app.utils.pagination import (
+    apply_keyset, apply_offset, count_method, decode_offset_cursor, encode_offset_cursor,
+    next_offset_page, next_page
+)
+import hashlib
 import uuid
 from datetime import datetime, timezone
 from app.core.database import supabase, supabase_admin
+from postgrest.exceptions import APIError
 
 
 # Add this helper function at the top of your customer.py file (after imports)
-async def enrich_offers_with_product_data(offers_data):
-    """Fetch product data for offers and merge it"""
-    enriched_offers = []
+async def enrich_offers_with_product_data(offers_data, product_loader: Optional[ProductLoader] = None):
+    """Fetch product data for offers in one batched query and merge it"""
+    loader = product_loader or ProductLoader()
+    
+    try:
+        products = await loader.load_many(offer.get('product_id') for offer in offers_data)
+    except Exception as e:
+        print(f"Error fetching products for offers: {e}")
+        products = {}
     
     for offer in offers_data:
-        # Get the product data if product_id exists
-        if offer.get('product_id'):
-            try:
-                product_result = supabase.table("products").select(
-                    "*, categories(*)"
-                ).eq("id", offer['product_id']).execute()
-                
-                if product_result.data:
-                    offer['products'] = product_result.data[0]
-            except Exception as e:
-                print(f"Error fetching product for offer {offer.get('id')}: {e}")
-                offer['products'] = None
-        
-        enriched_offers.append(offer)
+        product_id = offer.get('product_id')
+        offer['product'] = products.get(str(product_id)) if product_id else None
     
-    return enriched_offers
+    return offers_data
+
+
+def with_product_image_variants(offer_data: Optional[dict], key: str = "product") -> Optional[dict]:
+    """Attach image_variants to the product embedded under `key` (copied, not mutated)"""
+    if offer_data and offer_data.get(key):
+        offer_data[key] = add_image_variants(dict(offer_data[key]))
+    return offer_data
 
 router = APIRouter(prefix="/customer", tags=["Customer"])
 
@@ -59,7 +73,7 @@ async def search_products(
     business_id: Optional[str] = Query(None, description="Filter by business"),
     min_price: Optional[float] = Query(None, ge=0, description="Minimum price"),
     max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
-    sort_by: str = Query("name", regex="^(name|price|created_at)$", description="Sort field"),
+    sort_by: Optional[str] = Query(None, regex="^(relevance|name|price|created_at)$", description="Sort field (default: relevance when searching, otherwise name)"),
     sort_order: str = Query("asc", regex="^(asc|desc)$", description="Sort order"),
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100)
@@ -67,17 +81,17 @@ async def search_products(
     """Search and filter products with advanced options"""
     
     try:
-        # Build query - only active products
-        query = supabase.table("products").select(
-            "*, categories(*), businesses!inner(business_name, is_verified, avatar_url)", 
-            count="exact"
+        q = normalize_search_query(q)
+        if not sort_by or (sort_by == RELEVANCE_SORT and not q):
+            sort_by = RELEVANCE_SORT if q else "name"
+        
+        # Build query - only active products; with a search query, rows come
+        # from the indexed full-text/fuzzy search ranked by relevance
+        query = search_source(
+            supabase, "products", q,
+            "*, categories(*), businesses!inner(business_name, is_verified, avatar_url)"
         ).eq("is_active", True)
         
-        # Apply search
-        if q:
-            # Search in product name and description
-            query = query.or_(f"name.ilike.%{q}%,description.ilike.%{q}%")
-        
         # Apply filters
         if category_id:
             query = query.eq("category_id", category_id)
@@ -91,19 +105,25 @@ async def search_products(
         if max_price is not None:
             query = query.lte("price", max_price)
         
-        # Apply sorting
-        sort_direction = "asc" if sort_order == "asc" else "desc"
-        query = query.order(sort_by, desc=(sort_direction == "desc"))
+        # Apply sorting (relevance is the search function's rank)
+        if sort_by == RELEVANCE_SORT:
+            query = order_by_relevance(query)
+        else:
+            sort_direction = "asc" if sort_order == "asc" else "desc"
+            query = query.order(sort_by, desc=(sort_direction == "desc"))
         
         # Apply pagination
         offset = (page - 1) * size
         query = query.range(offset, offset + size - 1)
         
-        result = query.execute()
+        result = await query.execute()
         
         total = result.count if result.count else 0
         has_next = (page * size) < total
         
+        if q:
+            await attach_search_highlights(supabase, "product", result.data, q)
+        
         # Transform data to include business info
         products = []
         for product in result.data:
@@ -111,7 +131,7 @@ async def search_products(
             if 'businesses' in product_data:
                 product_data['business'] = product_data['businesses']
                 del product_data['businesses']
-            products.append(ProductSearchResponse(**product_data))
+            products.append(ProductSearchResponse(**add_image_variants(product_data)))
         
         return ProductListResponse(
             products=products,
@@ -137,27 +157,28 @@ async def search_offers(
     min_discount: Optional[float] = Query(None, ge=0, description="Minimum discount value"),
     max_discount: Optional[float] = Query(None, ge=0, description="Maximum discount value"),
     available_only: bool = Query(True, description="Only show offers with available claims"),
-    sort_by: str = Query("discount_value", regex="^(discount_value|expiry_date|created_at)$", description="Sort field"),
+    sort_by: Optional[str] = Query(None, regex="^(relevance|discount_value|expiry_date|created_at)$", description="Sort field (default: relevance when searching, otherwise discount_value)"),
     sort_order: str = Query("desc", regex="^(asc|desc)$", description="Sort order"),
-    page: int = Query(1, ge=1),
-    size: int = Query(20, ge=1, le=100)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    page: int = Query(1, ge=1, description="Deprecated: use cursor"),
+    size: int = Query(20, ge=1, le=100),
+    include_total: bool = Query(False, description="Exact total instead of an estimate")
 ):
     """Search and filter offers with advanced options"""
     
     try:
         current_time = datetime.utcnow().isoformat()
-        
-        # Build query - only active offers within date range
-        query = supabase.table("offers").select(
-             "*, products!product_id(*, categories(*)), businesses!inner(business_name, is_verified, avatar_url)",  
-            count="exact"
+        q = normalize_search_query(q)
+        if not sort_by or (sort_by == RELEVANCE_SORT and not q):
+            sort_by = RELEVANCE_SORT if q else "discount_value"
+        
+        # Build query - only active offers within date range; with a search
+        # query, rows come from the indexed full-text/fuzzy search
+        query = search_source(
+            supabase, "offers", q,
+            "*, products!product_id(*, categories(*)), businesses!inner(business_name, is_verified, avatar_url)",
+            count=count_method(include_total)
         ).eq("is_active", True).gte("expiry_date", current_time).lte("start_date", current_time)
-
-        
-        # Apply search
-        if q:
-            # Search in offer title and description
-            query = query.or_(f"title.ilike.%{q}%,description.ilike.%{q}%")
         
         # Apply filters
         if category_id:
@@ -180,36 +201,48 @@ async def search_offers(
             # Only offers that haven't reached max claims
             query = query.or_("max_claims.is.null,current_claims.lt.max_claims")
         
-        # Apply sorting
-        sort_direction = "asc" if sort_order == "asc" else "desc"
-        query = query.order(sort_by, desc=(sort_direction == "desc"))
-        
-        # Apply pagination
-        offset = (page - 1) * size
-        query = query.range(offset, offset + size - 1)
-        
-        result = query.execute()
+        # Apply sorting and pagination; relevance is the search function's
+        # rank, which has no keyset cursor, so it pages by offset
+        if sort_by == RELEVANCE_SORT:
+            query, offset = apply_offset(order_by_relevance(query), size, cursor=cursor, offset=(page - 1) * size)
+            result = await query.execute()
+            rows, next_cursor = next_offset_page(result.data or [], size, offset)
+        else:
+            query = apply_keyset(
+                query, sort_by, sort_order == "desc", size,
+                cursor=cursor, offset=(page - 1) * size
+            )
+            result = await query.execute()
+            rows, next_cursor = next_page(result.data or [], size, sort_by)
         
         total = result.count if result.count else 0
-        has_next = (page * size) < total
+        
+        if q:
+            await attach_search_highlights(supabase, "offer", rows, q)
         
         # Transform data to include business info
         offers = []
-        for offer in result.data:
+        for offer in rows:
             offer_data = offer.copy()
             if 'businesses' in offer_data:
                 offer_data['business'] = offer_data['businesses']
                 del offer_data['businesses']
-            offers.append(OfferSearchResponse(**offer_data))
+            if 'products' in offer_data:
+                offer_data['product'] = offer_data.pop('products')
+            offers.append(OfferSearchResponse(**with_product_image_variants(offer_data)))
         
         return OfferListResponse(
             offers=offers,
             total=total,
             page=page,
             size=size,
-            has_next=has_next
+            has_next=next_cursor is not None,
+            next_cursor=next_cursor,
+            total_is_estimate=not include_total
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -220,7 +253,8 @@ async def search_offers(
 @router.get("/offers/trending", response_model=OfferListResponse)
 async def get_trending_offers(
     limit: int = Query(10, ge=1, le=50),
-    category_id: Optional[str] = None
+    category_id: Optional[str] = None,
+    product_loader: ProductLoader = Depends(get_product_loader)
 ):
     """Get trending offers based on claims"""
     
@@ -229,43 +263,16 @@ async def get_trending_offers(
         
         # Step 1: Get offers WITHOUT trying to join products
         query = supabase.table("offers").select(
-            "*, businesses!inner(business_name, is_verified, avatar_url)", 
-            count="exact"
+            "*, businesses!inner(business_name, is_verified, avatar_url)"
         ).eq("is_active", True).gte("expiry_date", current_time).lte("start_date", current_time)
         
         # Sort by current_claims descending to get most claimed offers
         query = query.order("current_claims", desc=True).limit(limit)
         
-        result = query.execute()
+        result = await query.execute()
         
-        # Step 2: Manually fetch product data for each offer
-        enriched_offers = []
-        for offer in result.data:
-            print(f"Processing offer {offer.get('id')} with product_id: {offer.get('product_id')}")
-            
-            # Get product data if product_id exists
-            if offer.get('product_id'):
-                try:
-                    product_result = supabase.table("products").select(
-                        "*, categories(*)"
-                    ).eq("id", offer['product_id']).execute()
-                    
-                    print(f"Product query result: {product_result.data}")
-                    
-                    if product_result.data:
-                        # Use 'products' (plural) to match your frontend
-                        offer['products'] = product_result.data[0]
-                        print(f"Added product data: {product_result.data[0].get('name')} with image: {product_result.data[0].get('image_url')}")
-                    else:
-                        offer['products'] = None
-                        print(f"No product found for ID: {offer['product_id']}")
-                except Exception as e:
-                    print(f"Error fetching product for offer {offer.get('id')}: {e}")
-                    offer['products'] = None
-            else:
-                offer['products'] = None
-            
-            enriched_offers.append(offer)
+        # Step 2: Fetch product data for all offers in one batched query
+        enriched_offers = await enrich_offers_with_product_data(result.data, product_loader)
         
         # Step 3: Transform data
         offers = []
@@ -274,11 +281,6 @@ async def get_trending_offers(
             if 'businesses' in offer_data:
                 offer_data['business'] = offer_data['businesses']
                 del offer_data['businesses']
-            
-            # Remove the null 'product' field and keep 'products'
-            if 'product' in offer_data:
-                del offer_data['product']
-                
             offers.append(OfferSearchResponse(**offer_data))
         
         return OfferListResponse(
@@ -299,7 +301,8 @@ async def get_trending_offers(
 @router.get("/offers/expiring-soon", response_model=OfferListResponse)
 async def get_expiring_offers(
     hours: int = Query(24, ge=1, le=168, description="Hours until expiry"),
-    limit: int = Query(10, ge=1, le=50)
+    limit: int = Query(10, ge=1, le=50),
+    product_loader: ProductLoader = Depends(get_product_loader)
 ):
     """Get offers expiring within specified hours"""
     
@@ -317,28 +320,10 @@ async def get_expiring_offers(
         # Sort by expiry date ascending (most urgent first)
         query = query.order("expiry_date", desc=False).limit(limit)
         
-        result = query.execute()
-        
-        # Step 2: Manually fetch product data
-        enriched_offers = []
-        for offer in result.data:
-            if offer.get('product_id'):
-                try:
-                    product_result = supabase.table("products").select(
-                        "*, categories(*)"
-                    ).eq("id", offer['product_id']).execute()
-                    
-                    if product_result.data:
-                        offer['products'] = product_result.data[0]
-                    else:
-                        offer['products'] = None
-                except Exception as e:
-                    print(f"Error fetching product for offer {offer.get('id')}: {e}")
-                    offer['products'] = None
-            else:
-                offer['products'] = None
-            
-            enriched_offers.append(offer)
+        result = await query.execute()
+        
+        # Step 2: Fetch product data for all offers in one batched query
+        enriched_offers = await enrich_offers_with_product_data(result.data, product_loader)
         
         # Step 3: Transform data
         offers = []
@@ -376,7 +361,7 @@ async def save_offer(
     
     try:
         # Check if offer exists and is active
-        offer_check = supabase.table("offers").select(
+        offer_check = await supabase.table("offers").select(
             "*, businesses(business_name)"
         ).eq("id", offer_id).eq("is_active", True).execute()
         
@@ -387,7 +372,7 @@ async def save_offer(
             )
         
         # Check if already saved
-        existing_save = supabase.table("saved_offers").select("id").eq("user_id", str(current_user.id)).eq("offer_id", offer_id).execute()
+        existing_save = await supabase.table("saved_offers").select("id").eq("user_id", str(current_user.id)).eq("offer_id", offer_id).execute()
         
         if existing_save.data:
             raise HTTPException(
@@ -402,7 +387,7 @@ async def save_offer(
             "offer_id": offer_id
         }
         
-        result = supabase.table("saved_offers").insert(save_data).execute()
+        result = await supabase.table("saved_offers").insert(save_data).execute()
         
         if not result.data:
             raise HTTPException(
@@ -411,7 +396,7 @@ async def save_offer(
             )
         
         # Get saved offer with full offer details
-        saved_offer = supabase.table("saved_offers").select(
+        saved_offer = await supabase.table("saved_offers").select(
             "*, offers(*, products(*, categories(*)), businesses(business_name, is_verified, avatar_url))"
         ).eq("id", result.data[0]["id"]).execute()
         
@@ -435,7 +420,7 @@ async def unsave_offer(
     
     try:
         # Delete the saved offer
-        result = supabase.table("saved_offers").delete().eq("user_id", str(current_user.id)).eq("offer_id", offer_id).execute()
+        result = await supabase.table("saved_offers").delete().eq("user_id", str(current_user.id)).eq("offer_id", offer_id).execute()
         
         if not result.data:
             raise HTTPException(
@@ -465,8 +450,8 @@ async def get_saved_offers(
     
     try:
         # Build query
-        query = supabase.table("offers").select(
-            "*, products!product_id(*, categories(*)), businesses!inner(business_name, is_verified, avatar_url))",
+        query = supabase.table("saved_offers").select(
+            "*, offers!inner(*, products(*, categories(*)), businesses(business_name, is_verified, avatar_url))",
             count="exact"
         ).eq("user_id", str(current_user.id))
         
@@ -478,12 +463,18 @@ async def get_saved_offers(
         offset = (page - 1) * size
         query = query.range(offset, offset + size - 1).order("saved_at", desc=True)
         
-        result = query.execute()
+        result = await query.execute()
         
         total = result.count if result.count else 0
         has_next = (page * size) < total
         
-        saved_offers = [SavedOfferResponse(**saved_offer) for saved_offer in result.data]
+        saved_offers = []
+        for saved_offer in result.data:
+            offer_data = saved_offer['offers']
+            if 'products' in offer_data:
+                offer_data['product'] = offer_data.pop('products')
+            with_product_image_variants(offer_data)
+            saved_offers.append(SavedOfferResponse(**saved_offer))
         
         return SavedOfferListResponse(
             saved_offers=saved_offers,
@@ -504,6 +495,17 @@ async def get_saved_offers(
 # OFFER CLAIMING
 # ============================================================================
 
+CLAIM_ID_MAX_ATTEMPTS = 5
+
+# claim_offer() error messages -> (status code, detail)
+CLAIM_OFFER_ERRORS = {
+    "offer_not_found": (status.HTTP_404_NOT_FOUND, "Offer not found or not active"),
+    "offer_not_started": (status.HTTP_400_BAD_REQUEST, "Offer has not started yet"),
+    "offer_expired": (status.HTTP_400_BAD_REQUEST, "Offer has expired"),
+    "offer_sold_out": (status.HTTP_400_BAD_REQUEST, "Offer has reached maximum claims"),
+    "already_claimed": (status.HTTP_400_BAD_REQUEST, "You have already claimed this offer"),
+}
+
 @router.post("/offers/{offer_id}/claim", response_model=dict)
 async def claim_offer(
     offer_id: str,
@@ -513,85 +515,12 @@ async def claim_offer(
     """Enhanced claim offer with support for online and in-store claims"""
     
     try:
-        # Use timezone-aware datetime for consistent comparisons
-        current_time = datetime.now(timezone.utc)
-        
         print(f"Processing claim for user: {current_user.id}, offer: {offer_id}")
         print(f"Claim type: {claim_data.claim_type}")
         
-        # Check if offer exists and is claimable
-        offer_check = supabase.table("offers").select("*").eq("id", offer_id).eq("is_active", True).execute()
-        
-        if not offer_check.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Offer not found or not active"
-            )
-        
-        offer = offer_check.data[0]
-        print(f"Found offer: {offer.get('title', 'No title')}")
-        
-        # Parse dates from database - handle both formats
-        try:
-            start_date_str = offer["start_date"]
-            expiry_date_str = offer["expiry_date"]
-            
-            # Remove 'Z' and add proper timezone info if needed
-            if start_date_str.endswith('Z'):
-                start_date_str = start_date_str[:-1] + '+00:00'
-            if expiry_date_str.endswith('Z'):
-                expiry_date_str = expiry_date_str[:-1] + '+00:00'
-            
-            start_date = datetime.fromisoformat(start_date_str)
-            expiry_date = datetime.fromisoformat(expiry_date_str)
-            
-            # Ensure dates are timezone-aware
-            if start_date.tzinfo is None:
-                start_date = start_date.replace(tzinfo=timezone.utc)
-            if expiry_date.tzinfo is None:
-                expiry_date = expiry_date.replace(tzinfo=timezone.utc)
-                
-        except (ValueError, KeyError) as e:
-            print(f"Error parsing offer dates: {e}")
-            print(f"Start date: {offer.get('start_date')}")
-            print(f"Expiry date: {offer.get('expiry_date')}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Invalid offer date format"
-            )
-        
-        # Check if offer is within valid date range
-        if current_time < start_date:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Offer has not started yet"
-            )
-        
-        if current_time > expiry_date:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Offer has expired"
-            )
-        
-        # Check if max claims reached
-        if offer["max_claims"] and offer["current_claims"] >= offer["max_claims"]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Offer has reached maximum claims"
-            )
-        
-        # Check if user already claimed this offer (using admin client for reliability)
-        existing_claim = supabase_admin.table("claimed_offers").select("id").eq("user_id", str(current_user.id)).eq("offer_id", offer_id).execute()
-        
-        if existing_claim.data:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="You have already claimed this offer"
-            )
-        
         # Import claim utilities
         try:
-            from app.utils.claim_utils import ensure_unique_claim_id, generate_qr_code, get_claim_display_info
+            from app.utils.claim_utils import ensure_unique_claim_id, qr_code_image_url, get_claim_display_info
         except ImportError as e:
             print(f"Import error for claim utilities: {e}")
             raise HTTPException(
@@ -599,92 +528,61 @@ async def claim_offer(
                 detail="Claim utilities not available"
             )
         
-        # Generate unique claim ID for all claims (using admin client for checking)
-        unique_claim_id = ensure_unique_claim_id(supabase_admin)
-        print(f"Generated unique claim ID: {unique_claim_id}")
-        
-        # Prepare claim data based on claim type
-        claim_record = {
-            "id": str(uuid.uuid4()),
-            "user_id": str(current_user.id),
-            "offer_id": offer_id,
-            "claim_type": claim_data.claim_type,
-            "unique_claim_id": unique_claim_id,
-            "claimed_at": current_time.isoformat()
-        }
-        
-        print(f"Prepared claim record: {claim_record}")
-        
-        # Generate QR code and verification URL for in-store claims
-        qr_code_data_url = None
-        verification_url = None
-        
-        if claim_data.claim_type == "in_store":
+        # Availability checks, the claim insert and the current_claims increment
+        # all happen inside the claim_offer function (migrations/001_claim_offer.sql)
+        # in one transaction, so this is a single round trip and max_claims holds
+        # under concurrent claims. Claim IDs are unique by construction; a
+        # collision with a legacy random ID is reported by the function and
+        # retried with the next ID.
+        claimed_offer_data = None
+        for _ in range(CLAIM_ID_MAX_ATTEMPTS):
+            unique_claim_id = await ensure_unique_claim_id(supabase_admin)
+            
             try:
-                qr_code_data_url, verification_url = generate_qr_code(unique_claim_id)
-                claim_record["qr_code_url"] = qr_code_data_url
-                print(f"Generated QR code and verification URL")
-            except Exception as e:
-                print(f"QR code generation failed: {e}")
-                # Continue without QR code - user can still use manual claim ID
-                claim_record["qr_code_url"] = None
-        
-        elif claim_data.claim_type == "online":
-            # For online claims, use the provided redirect URL or the offer's business website
-            redirect_url = getattr(claim_data, 'redirect_url', None)
-            if not redirect_url:
-                # Get business website from the offer's business
-                business_check = supabase_admin.table("businesses").select("business_website").eq("id", offer["business_id"]).execute()
-                if business_check.data and business_check.data[0]["business_website"]:
-                    redirect_url = business_check.data[0]["business_website"]
-                else:
-                    # Default dead link as mentioned
-                    redirect_url = "https://merchant-website-placeholder.com"
+                result = await supabase_admin.rpc("claim_offer", {
+                    "p_offer_id": offer_id,
+                    "p_user_id": str(current_user.id),
+                    "p_claim_type": claim_data.claim_type,
+                    "p_unique_claim_id": unique_claim_id,
+                    "p_redirect_url": claim_data.redirect_url
+                }).execute()
+            except APIError as e:
+                if e.message == "claim_id_conflict":
+                    print(f"Claim ID collision on {unique_claim_id}, retrying")
+                    continue
+                if e.message in CLAIM_OFFER_ERRORS:
+                    status_code, detail = CLAIM_OFFER_ERRORS[e.message]
+                    raise HTTPException(status_code=status_code, detail=detail)
+                raise
             
-            claim_record["merchant_redirect_url"] = redirect_url
-            print(f"Set redirect URL: {redirect_url}")
-        
-        # Insert the claim record using ADMIN CLIENT to bypass RLS
-        print("Inserting claim record using admin client...")
-        result = supabase_admin.table("claimed_offers").insert(claim_record).execute()
+            claimed_offer_data = result.data
+            break
         
-        if not result.data:
-            print("Failed to insert claim record")
+        if not claimed_offer_data:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to claim offer"
             )
         
-        print(f"Successfully inserted claim: {result.data[0]['id']}")
-        
-        # Increment offer claim count using admin client
-        update_result = supabase_admin.table("offers").update({
-            "current_claims": offer["current_claims"] + 1
-        }).eq("id", offer_id).execute()
-        
-        print(f"Updated offer claim count: {update_result.data}")
+        print(f"Successfully inserted claim: {claimed_offer_data['id']}")
+        # Listings show claim counts (current_claims, remaining claims)
+        await response_cache.invalidate(OFFERS_TAG)
+        claimed_at = claimed_offer_data["claimed_at"]
         
-        # Get claimed offer with full details using admin client
-        claimed_offer_result = supabase_admin.table("claimed_offers").select(
-            "*, offers(*, products(*, categories(*)), businesses(business_name, is_verified, avatar_url))"
-        ).eq("id", result.data[0]["id"]).execute()
-        
-        if not claimed_offer_result.data:
-            print("Failed to retrieve claimed offer details")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to retrieve claimed offer details"
-            )
-        
-        claimed_offer_data = claimed_offer_result.data[0]
-        print(f"Retrieved claimed offer data successfully")
+        # QR codes are rendered on demand from the claim ID, not stored
+        # In-store QR codes carry a signed token (when configured) so they can be verified offline
+        claim_token = None
+        qr_code_url = None
+        if claim_data.claim_type == "in_store":
+            claim_token = token_for_claim(unique_claim_id, claimed_offer_data["offers"])
+            qr_code_url = qr_code_image_url(unique_claim_id, token=claim_token)
         
         # Generate claim display information
         try:
             claim_display_info = get_claim_display_info(
                 claim_data.claim_type,
                 unique_claim_id,
-                qr_code_data_url
+                qr_code_url
             )
         except Exception as e:
             print(f"Error generating claim display info: {e}")
@@ -699,7 +597,7 @@ async def claim_offer(
             "success": True,
             "claim_type": claim_data.claim_type,
             "claim_id": unique_claim_id,
-            "claimed_at": current_time.isoformat(),
+            "claimed_at": claimed_at,
             "offer": claimed_offer_data["offers"],
             "claim_display": claim_display_info
         }
@@ -707,14 +605,15 @@ async def claim_offer(
         # Add type-specific data
         if claim_data.claim_type == "in_store":
             response_data.update({
-                "qr_code": qr_code_data_url,
-                "verification_url": verification_url,
+                "qr_code": qr_code_url,
+                "claim_token": claim_token,
+                "verification_url": claim_display_info.get("verification_url"),
                 "message": "Offer claimed successfully! Show the QR code or claim ID to the merchant for redemption."
             })
         
         elif claim_data.claim_type == "online":
             response_data.update({
-                "redirect_url": claim_record["merchant_redirect_url"],
+                "redirect_url": claimed_offer_data["merchant_redirect_url"],
                 "message": "Offer claimed successfully! You will be redirected to the merchant's website."
             })
         
@@ -734,6 +633,62 @@ async def claim_offer(
 
 
 
+@router.get("/claimed-offers/{claim_id}/qr.{image_format}")
+async def get_claim_qr_image(
+    claim_id: str,
+    image_format: str,
+    t: Optional[str] = Query(None, description="Signed claim token to embed"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Render the QR code image (png or svg) for a claim ID.
+    The image depends only on the claim ID, so it is served with a strong
+    ETag and immutable cache headers and without a database lookup.
+    """
+    from app.utils.claim_utils import QR_CODE_MEDIA_TYPES, render_qr_code, validate_claim_id_format
+    
+    if image_format not in QR_CODE_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unsupported QR code format"
+        )
+    
+    if not validate_claim_id_format(claim_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Claim not found"
+        )
+    
+    # Only embed tokens we signed for this claim
+    if t:
+        token_data = verify_claim_token(t)
+        if not token_data or token_data["claim_id"] != claim_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Invalid claim token"
+            )
+    
+    etag_suffix = f"-{hashlib.sha256(t.encode()).hexdigest()[:16]}" if t else ""
+    etag = f'"qr-{claim_id}-{image_format}{etag_suffix}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable"
+    }
+    
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    try:
+        content = render_qr_code(claim_id, image_format, t)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to generate QR code: {str(e)}"
+        )
+    
+    return Response(content=content, media_type=QR_CODE_MEDIA_TYPES[image_format], headers=headers)
+
+
 # Add new endpoint to get QR code for existing claims
 @router.get("/claimed-offers/{claim_id}/qr", response_model=dict)
 async def get_claim_qr_code(
@@ -744,8 +699,8 @@ async def get_claim_qr_code(
     
     try:
         # Get the claimed offer using admin client
-        claimed_offer = supabase_admin.table("claimed_offers").select(
-            "*, offers(title, business_id)"
+        claimed_offer = await supabase_admin.table("claimed_offers").select(
+            "id, claim_type, is_redeemed, claimed_at, offers(id, title, business_id, expiry_date)"
         ).eq("unique_claim_id", claim_id).eq("user_id", str(current_user.id)).execute()
         
         if not claimed_offer.data:
@@ -770,27 +725,8 @@ async def get_claim_qr_code(
                 detail="This claim has already been redeemed"
             )
         
-        # Get or generate QR code
-        qr_code_url = claim_data.get("qr_code_url")
-        
-        if not qr_code_url:
-            # Generate QR code if it doesn't exist
-            try:
-                from app.utils.claim_utils import generate_qr_code
-                qr_code_data_url, verification_url = generate_qr_code(claim_id)
-                
-                # Update the record with the generated QR code using admin client
-                supabase_admin.table("claimed_offers").update({
-                    "qr_code_url": qr_code_data_url
-                }).eq("id", claim_data["id"]).execute()
-                
-                qr_code_url = qr_code_data_url
-                
-            except Exception as e:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Failed to generate QR code: {str(e)}"
-                )
+        from app.utils.claim_utils import qr_code_image_url
+        qr_code_url = qr_code_image_url(claim_id, token=token_for_claim(claim_id, claim_data["offers"]))
         
         # Generate display information
         from app.utils.claim_utils import get_claim_display_info
@@ -819,8 +755,10 @@ async def get_claim_qr_code(
 @router.get("/claimed-offers", response_model=dict)
 async def get_claimed_offers(
     current_user: UserProfile = Depends(get_current_active_user),
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    page: int = Query(1, ge=1, description="Deprecated: use cursor"),
     size: int = Query(20, ge=1, le=100),
+    include_total: bool = Query(False, description="Exact total instead of an estimate"),
     redeemed_only: Optional[bool] = Query(None, description="Filter by redemption status"),
     claim_type: Optional[str] = Query(None, regex="^(online|in_store)$", description="Filter by claim type")
 ):
@@ -830,7 +768,7 @@ async def get_claimed_offers(
         # Build query
         query = supabase.table("claimed_offers").select(
             "*, offers(*, products(*, categories(*)), businesses(business_name, is_verified, avatar_url))",
-            count="exact"
+            count=count_method(include_total)
         ).eq("user_id", str(current_user.id))
         
         if redeemed_only is not None:
@@ -839,27 +777,33 @@ async def get_claimed_offers(
         if claim_type:
             query = query.eq("claim_type", claim_type)
         
-        # Apply pagination
-        offset = (page - 1) * size
-        query = query.range(offset, offset + size - 1).order("claimed_at", desc=True)
+        # Apply keyset pagination, newest first
+        query = apply_keyset(query, "claimed_at", True, size, cursor=cursor, offset=(page - 1) * size)
         
-        result = query.execute()
+        result = await query.execute()
+        rows, next_cursor = next_page(result.data or [], size, "claimed_at")
         
         total = result.count if result.count else 0
-        has_next = (page * size) < total
         
         # Process claimed offers with display information
         enhanced_claimed_offers = []
         
-        for claimed_offer in result.data:
+        for claimed_offer in rows:
             # Generate claim display info
             try:
-                from app.utils.claim_utils import get_claim_display_info
+                from app.utils.claim_utils import get_claim_display_info, qr_code_image_url
+                
+                qr_code_url = None
+                if claimed_offer.get("claim_type", "in_store") == "in_store" and claimed_offer.get("unique_claim_id"):
+                    qr_code_url = qr_code_image_url(
+                        claimed_offer["unique_claim_id"],
+                        token=token_for_claim(claimed_offer["unique_claim_id"], claimed_offer.get("offers"))
+                    )
                 
                 claim_display = get_claim_display_info(
                     claimed_offer.get("claim_type", "in_store"),
                     claimed_offer.get("unique_claim_id"),
-                    claimed_offer.get("qr_code_url")
+                    qr_code_url
                 )
                 
                 # Create enhanced response
@@ -873,9 +817,9 @@ async def get_claimed_offers(
                     "redemption_notes": claimed_offer.get("redemption_notes"),
                     "claim_type": claimed_offer.get("claim_type", "in_store"),
                     "unique_claim_id": claimed_offer.get("unique_claim_id"),
-                    "qr_code_url": claimed_offer.get("qr_code_url"),
+                    "qr_code_url": qr_code_url,
                     "merchant_redirect_url": claimed_offer.get("merchant_redirect_url"),
-                    "offer": claimed_offer["offers"],
+                    "offer": with_product_image_variants(claimed_offer["offers"], "products"),
                     "claim_display": claim_display
                 }
                 
@@ -889,9 +833,11 @@ async def get_claimed_offers(
         return {
             "claimed_offers": enhanced_claimed_offers,
             "total": total,
+            "total_is_estimate": not include_total,
             "page": page,
             "size": size,
-            "has_next": has_next,
+            "has_next": next_cursor is not None,
+            "next_cursor": next_cursor,
             "summary": {
                 "total_claims": total,
                 "in_store_claims": len([c for c in enhanced_claimed_offers if c.get("claim_type") == "in_store"]),
@@ -901,6 +847,8 @@ async def get_claimed_offers(
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error retrieving claimed offers: {e}")
         raise HTTPException(
@@ -918,7 +866,7 @@ async def get_offer_status(
     
     try:
         # Get basic offer info
-        offer_check = supabase.table("offers").select("*").eq("id", offer_id).eq("is_active", True).execute()
+        offer_check = await supabase.table("offers").select("*").eq("id", offer_id).eq("is_active", True).execute()
         
         if not offer_check.data:
             raise HTTPException(
@@ -980,11 +928,11 @@ async def get_offer_status(
             status_info["reason"] = "Maximum claims reached"
         
         # Check if saved
-        saved_check = supabase.table("saved_offers").select("id").eq("user_id", str(current_user.id)).eq("offer_id", offer_id).execute()
+        saved_check = await supabase.table("saved_offers").select("id").eq("user_id", str(current_user.id)).eq("offer_id", offer_id).execute()
         status_info["is_saved"] = bool(saved_check.data)
         
         # Check if claimed and get claim info
-        claimed_check = supabase.table("claimed_offers").select("*").eq("user_id", str(current_user.id)).eq("offer_id", offer_id).execute()
+        claimed_check = await supabase.table("claimed_offers").select("*").eq("user_id", str(current_user.id)).eq("offer_id", offer_id).execute()
         if claimed_check.data:
             claim = claimed_check.data[0]
             status_info["is_claimed"] = True
@@ -993,12 +941,19 @@ async def get_offer_status(
             
             # Include claim display information
             try:
-                from app.utils.claim_utils import get_claim_display_info
+                from app.utils.claim_utils import get_claim_display_info, qr_code_image_url
+                
+                qr_code_url = None
+                if claim.get("claim_type", "in_store") == "in_store" and claim.get("unique_claim_id"):
+                    qr_code_url = qr_code_image_url(
+                        claim["unique_claim_id"],
+                        token=token_for_claim(claim["unique_claim_id"], offer)
+                    )
                 
                 claim_display = get_claim_display_info(
                     claim.get("claim_type", "in_store"),
                     claim.get("unique_claim_id"),
-                    claim.get("qr_code_url")
+                    qr_code_url
                 )
                 
                 status_info["claimed_info"] = claim_display
@@ -1024,20 +979,22 @@ async def get_offer_status(
 # BUSINESS DISCOVERY
 # ============================================================================
 
-@router.get("/businesses", response_model=ProductListResponse)
+@router.get("/businesses", response_model=dict)
 async def discover_businesses(
     category_id: Optional[str] = None,
     verified_only: bool = Query(True, description="Only show verified businesses"),
     has_active_offers: bool = Query(False, description="Only businesses with active offers"),
     search: Optional[str] = None,
-    page: int = Query(1, ge=1),
-    size: int = Query(20, ge=1, le=100)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    page: int = Query(1, ge=1, description="Deprecated: use cursor"),
+    size: int = Query(20, ge=1, le=100),
+    include_total: bool = Query(False, description="Exact total instead of an estimate")
 ):
     """Discover businesses with filters"""
     
     try:
         # Build query
-        query = supabase.table("businesses").select("*, categories(*)", count="exact")
+        query = supabase.table("businesses").select("*, categories(*)", count=count_method(include_total))
         
         if verified_only:
             query = query.eq("is_verified", True)
@@ -1053,25 +1010,28 @@ async def discover_businesses(
             # This would need a join - simplified for now
             query = query.eq("is_verified", True)  # Placeholder logic
         
-        # Apply pagination
-        offset = (page - 1) * size
-        query = query.range(offset, offset + size - 1).order("business_name")
+        # Apply keyset pagination by name
+        query = apply_keyset(query, "business_name", False, size, cursor=cursor, offset=(page - 1) * size)
         
-        result = query.execute()
+        result = await query.execute()
+        rows, next_cursor = next_page(result.data or [], size, "business_name")
         
         total = result.count if result.count else 0
-        has_next = (page * size) < total
         
-        businesses = [BusinessResponse(**business) for business in result.data]
+        businesses = [BusinessResponse(**business) for business in rows]
         
         return {
             "businesses": businesses,
             "total": total,
+            "total_is_estimate": not include_total,
             "page": page,
             "size": size,
-            "has_next": has_next
+            "has_next": next_cursor is not None,
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1094,7 +1054,7 @@ async def get_product_by_id(product_id: str):
     """Get a single product by ID"""
     
     try:
-        result = supabase.table("products").select(
+        result = await supabase.table("products").select(
             "*, categories(*), businesses(business_name, is_verified, avatar_url)"
         ).eq("id", product_id).eq("is_active", True).execute()
         
@@ -1104,7 +1064,7 @@ async def get_product_by_id(product_id: str):
                 detail="Product not found"
             )
         
-        product = result.data[0]
+        product = add_image_variants(result.data[0])
         
         # Transform data to include business info
         if 'businesses' in product:
@@ -1124,83 +1084,69 @@ async def get_product_by_id(product_id: str):
 
 # offers nearby
 # In discount_api/app/api/routes/customer.py (or add to existing customer routes)
-from fastapi import APIRouter, Query, HTTPException, status
-from typing import Optional
+from fastapi import APIRouter, Query, HTTPException, status, Header, Response
+from typing import Optional, Dict, Any
 from app.core.database import supabase_admin
 from app.utils.dependencies import get_current_active_user
 from app.schemas.user import UserProfile
-from decimal import Decimal
-
-router = APIRouter(prefix="/customer", tags=["Customer"])
+from app.utils.nearby_index import nearby_offer_index
+from app.utils.geocoding import geocode_address
+from app.core.config import settings
+from app.utils.cache import etag_matches
+from app.utils.category_cache import category_cache
+from app.utils.serialization import ORJSONResponse
+from app.schemas.customer import NearbyOffersResponse
+from app.utils.offer_display import display_fields
 
-def convert_decimals_to_float(data):
-    """Convert Decimal fields to float in a dictionary or list"""
-    if isinstance(data, dict):
-        return {key: convert_decimals_to_float(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [convert_decimals_to_float(item) for item in data]
-    elif isinstance(data, Decimal):
-        return float(data)
+def nearby_offer_payload(offer: Dict[str, Any]) -> Dict[str, Any]:
+    """A nearby_offers row as a NearbyOffer (updated in place)"""
+    # savings_amount/discount_text are stored when the offer is saved
+    offer.update(display_fields(offer))
+    
+    # Calculate remaining claims
+    if offer["max_claims"]:
+        offer["remaining_claims"] = max(0, offer["max_claims"] - (offer["current_claims"] or 0))
+        offer["claim_percentage"] = (offer["current_claims"] or 0) / offer["max_claims"] * 100
     else:
-        return data
+        offer["remaining_claims"] = None
+        offer["claim_percentage"] = 0
+    
+    # Round distance
+    offer["distance_km"] = round(offer["distance_km"], 2)
+    return offer
+
 
-@router.get("/offers/nearby", response_model=dict)
+@router.get("/offers/nearby", response_model=NearbyOffersResponse)
 async def get_offers_nearby(
     lat: float = Query(..., description="User latitude", ge=-90, le=90),
     lng: float = Query(..., description="User longitude", ge=-180, le=180),
     radius: float = Query(10.0, description="Search radius in kilometers", gt=0, le=50),
     limit: int = Query(20, description="Maximum results", gt=0, le=100),
-    category_id: Optional[str] = Query(None, description="Filter by category")
+    category_id: Optional[int] = Query(None, description="Filter by business category")
 ):
     """Find offers near a location"""
     try:
         print(f"Searching offers near: {lat}, {lng} within {radius}km")
         
-        # Call the database function
-        result = supabase_admin.rpc('get_nearby_offers', {
-            'user_lat': lat,
-            'user_lng': lng,
-            'search_radius': radius,
-            'result_limit': limit
-        }).execute()
-        
-        offers = result.data or []
-        
-        # Filter by category if specified
-        if category_id and offers:
-            # Get businesses in this category
-            category_businesses = supabase_admin.table("businesses").select("id").eq("category_id", category_id).execute()
-            business_ids = [b["id"] for b in category_businesses.data] if category_businesses.data else []
-            
-            # Filter offers
-            offers = [offer for offer in offers if offer["business_id"] in business_ids]
-        
-        # Convert decimals to floats for JSON serialization
-        offers = convert_decimals_to_float(offers)
+        if nearby_offer_index.ready:
+            offers = nearby_offer_index.nearby(lat, lng, radius, limit, category_id)
+        else:
+            # Radius, category, active window and limit are applied in one
+            # indexed query (see migrations/011_nearby_offers.sql)
+            result = await supabase_admin.rpc('nearby_offers', {
+                'p_latitude': lat,
+                'p_longitude': lng,
+                'p_radius_km': radius,
+                'p_limit': limit,
+                'p_category_id': category_id
+            }).execute()
+            offers = result.data or []
         
         # Add additional computed fields
         for offer in offers:
-            # Calculate savings
-            if offer["discount_type"] == "percentage":
-                savings = (offer["original_price"] or 0) * (offer["discount_value"] or 0) / 100
-                offer["savings_amount"] = round(savings, 2)
-                offer["discount_text"] = f"{offer['discount_value']}% off"
-            else:
-                offer["savings_amount"] = offer["discount_value"] or 0
-                offer["discount_text"] = f"${offer['discount_value']} off"
-            
-            # Calculate remaining claims
-            if offer["max_claims"]:
-                offer["remaining_claims"] = max(0, offer["max_claims"] - (offer["current_claims"] or 0))
-                offer["claim_percentage"] = (offer["current_claims"] or 0) / offer["max_claims"] * 100
-            else:
-                offer["remaining_claims"] = None
-                offer["claim_percentage"] = 0
-            
-            # Round distance
-            offer["distance_km"] = round(offer["distance_km"], 2)
+            nearby_offer_payload(offer)
         
-        return {
+        return ORJSONResponse({
             "offers": offers,
             "search_location": {
                 "latitude": lat,
@@ -1209,8 +1155,10 @@ async def get_offers_nearby(
             "search_radius_km": radius,
             "total_found": len(offers),
             "message": f"Found {len(offers)} offers within {radius}km"
-        }
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error searching offers: {e}")
         import traceback
@@ -1235,10 +1183,7 @@ async def search_offers_by_address(
                 detail="Address is required"
             )
         
-        # Import geocoding utility (you'll need to create this)
-        from app.utils.geocoding import geocode_address
-        
-        # Geocode the address
+        # Geocode the address (cached per normalized address)
         location = await geocode_address(address)
         if not location:
             raise HTTPException(
@@ -1247,14 +1192,16 @@ async def search_offers_by_address(
             )
         
         # Search offers using the geocoded coordinates
-        result = supabase_admin.rpc('get_nearby_offers', {
-            'user_lat': location["latitude"],
-            'user_lng': location["longitude"],
-            'search_radius': radius,
-            'result_limit': limit
-        }).execute()
-        
-        offers = convert_decimals_to_float(result.data or [])
+        if nearby_offer_index.ready:
+            offers = nearby_offer_index.nearby(location["latitude"], location["longitude"], radius, limit)
+        else:
+            result = await supabase_admin.rpc('nearby_offers', {
+                'p_latitude': location["latitude"],
+                'p_longitude': location["longitude"],
+                'p_radius_km': radius,
+                'p_limit': limit
+            }).execute()
+            offers = result.data or []
         
         return {
             "offers": offers,
@@ -1275,32 +1222,30 @@ async def search_offers_by_address(
         )
 
 @router.get("/offers/categories", response_model=dict)
-async def get_offer_categories():
-    """Get all categories that have active offers"""
+async def get_offer_categories(
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get all categories that have active offers (cached)"""
     try:
-        # Get categories with active offers
-        result = supabase_admin.rpc('get_categories_with_offers').execute()
-        
-        if not result.data:
-            # Fallback: get all categories
-            categories_result = supabase_admin.table("categories").select("*").order("name").execute()
-            categories = categories_result.data or []
-        else:
-            categories = result.data
-        
-        return {
-            "categories": categories,
-            "total": len(categories)
-        }
-        
+        categories, etag = await category_cache.with_offers()
     except Exception as e:
         print(f"Error getting categories: {e}")
         # Fallback to simple category list
-        categories_result = supabase_admin.table("categories").select("*").order("name").execute()
-        return {
-            "categories": categories_result.data or [],
-            "total": len(categories_result.data or [])
-        }
+        categories, etag = await category_cache.list_all()
+    
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={int(settings.offer_categories_cache_ttl_seconds)}"
+    }
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    response.headers.update(headers)
+    return {
+        "categories": categories,
+        "total": len(categories)
+    }
     
 
 # app/api/routes/customer.py - Updated routes for new offer types
@@ -1312,10 +1257,91 @@ from app.core.database import supabase, supabase_admin
 from app.schemas.user import UserProfile
 from app.utils.dependencies import get_current_active_user
 from app.utils.offer_calculations import OfferCalculator
+from app.utils.offer_index import offer_search_index
+from app.utils.offer_display import calculation_examples, display_fields, offer_conditions_text
+from app.utils.serialization import ORJSONResponse
+from app.schemas.customer import OfferSearchPage
 
-router = APIRouter(prefix="/customer", tags=["Customer"])
+def search_offer_payload(offer_data: Dict[str, Any]) -> Dict[str, Any]:
+    """A search row (database or index) as an OfferSearchResult (updated in place)"""
+    # Fix structure for frontend
+    if 'products' in offer_data:
+        offer_data['product'] = offer_data.pop('products')
+    if 'businesses' in offer_data:
+        offer_data['business'] = offer_data.pop('businesses')
+    # Copied: index rows share their product dicts
+    with_product_image_variants(offer_data)
+    
+    # Stored when the offer is saved (computed once for older rows)
+    offer_data.update(display_fields(offer_data))
+    offer_data['conditions_text'] = offer_conditions_text(offer_data)
+    return offer_data
+
+
+async def _search_offers_in_database(
+    q: Optional[str],
+    category_id: Optional[str],
+    business_id: Optional[str],
+    discount_type: Optional[str],
+    min_discount: Optional[float],
+    max_discount: Optional[float],
+    available_only: bool,
+    sort_by: str,
+    sort_order: str,
+    cursor: Optional[str],
+    offset: int,
+    size: int,
+    include_total: bool
+):
+    """PostgREST version of the offer search; returns (total, offers, next_cursor)"""
+    current_time = datetime.utcnow().isoformat()
+    
+    # Build query - only active offers within date range; with a search
+    # query, rows come from the indexed full-text/fuzzy search
+    query = search_source(
+        supabase, "offers", q,
+        "*, products!product_id(*, categories(*)), businesses!inner(business_name, is_verified, avatar_url)",
+        count=count_method(include_total)
+    ).eq("is_active", True).gte("expiry_date", current_time).lte("start_date", current_time)
+
+    # Apply filters
+    if category_id:
+        query = query.or_(f"products.category_id.eq.{category_id},businesses.category_id.eq.{category_id}")
+    
+    if business_id:
+        query = query.eq("business_id", business_id)
+    
+    if discount_type:
+        query = query.eq("discount_type", discount_type)
+    
+    if min_discount is not None:
+        query = query.gte("discount_value", min_discount)
+    
+    if max_discount is not None:
+        query = query.lte("discount_value", max_discount)
+    
+    if available_only:
+        # Only show offers that still have claims available
+        query = query.or_("max_claims.is.null,current_claims.lt.max_claims")
+    
+    # Apply sorting and pagination; relevance is the search function's
+    # rank, which has no keyset cursor, so it pages by offset
+    if sort_by == RELEVANCE_SORT:
+        query, offset = apply_offset(order_by_relevance(query), size, cursor=cursor, offset=offset)
+        result = await query.execute()
+        rows, next_cursor = next_offset_page(result.data or [], size, offset)
+    else:
+        query = apply_keyset(query, sort_by, sort_order == "desc", size, cursor=cursor, offset=offset)
+        result = await query.execute()
+        rows, next_cursor = next_page(result.data or [], size, sort_by)
+    
+    if q:
+        await attach_search_highlights(supabase, "offer", rows, q)
+    
+    return result.count or 0, rows, next_cursor
 
-@router.get("/offers/search", response_model=dict)
+
+@router.get("/offers/search", response_model=OfferSearchPage)
 async def search_offers(
     q: Optional[str] = Query(None, description="Search query"),
     category_id: Optional[str] = Query(None, description="Filter by category"),
@@ -1324,98 +1350,84 @@ async def search_offers(
     min_discount: Optional[float] = Query(None, ge=0, description="Minimum discount value"),
     max_discount: Optional[float] = Query(None, ge=0, description="Maximum discount value"),
     available_only: bool = Query(True, description="Only show offers with available claims"),
-    sort_by: str = Query("discount_value", regex="^(discount_value|expiry_date|created_at)$", description="Sort field"),
+    sort_by: Optional[str] = Query(None, regex="^(relevance|discount_value|expiry_date|created_at)$", description="Sort field (default: relevance when searching, otherwise discount_value)"),
     sort_order: str = Query("desc", regex="^(asc|desc)$", description="Sort order"),
-    page: int = Query(1, ge=1),
-    size: int = Query(20, ge=1, le=100)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    page: int = Query(1, ge=1, description="Deprecated: use cursor"),
+    size: int = Query(20, ge=1, le=100),
+    include_total: bool = Query(False, description="Exact total instead of an estimate")
 ):
     """Search and filter offers with support for all discount types"""
     
     try:
-        current_time = datetime.utcnow().isoformat()
+        q = normalize_search_query(q)
+        if not sort_by or (sort_by == RELEVANCE_SORT and not q):
+            sort_by = RELEVANCE_SORT if q else "discount_value"
         
-        # Build query - only active offers within date range
-        query = supabase.table("offers").select(
-            "*, products!product_id(*, categories(*)), businesses!inner(business_name, is_verified, avatar_url)",  
-            count="exact"
-        ).eq("is_active", True).gte("expiry_date", current_time).lte("start_date", current_time)
-
-        # Apply search
-        if q:
-            query = query.or_(f"title.ilike.%{q}%,description.ilike.%{q}%")
-        
-        # Apply filters
-        if category_id:
-            query = query.or_(f"products.category_id.eq.{category_id},businesses.category_id.eq.{category_id}")
-        
-        if business_id:
-            query = query.eq("business_id", business_id)
-        
-        if discount_type:
-            query = query.eq("discount_type", discount_type)
-        
-        if min_discount is not None:
-            query = query.gte("discount_value", min_discount)
-        
-        if max_discount is not None:
-            query = query.lte("discount_value", max_discount)
-        
-        if available_only:
-            # Only show offers that still have claims available
-            query = query.or_("max_claims.is.null,current_claims.lt.max_claims")
-        
-        # Apply sorting
-        desc_order = sort_order == "desc"
-        query = query.order(sort_by, desc=desc_order)
-        
-        # Apply pagination
         offset = (page - 1) * size
-        query = query.range(offset, offset + size - 1)
-        
-        result = query.execute()
+        cursor_offset = decode_offset_cursor(cursor)
+        
+        # The index pages by offset, so keyset cursors issued by the database
+        # path keep being served from the database
+        if offer_search_index.ready and (cursor is None or cursor_offset is not None):
+            # Serve from the in-memory index without a database round trip
+            if cursor_offset is not None:
+                offset = cursor_offset
+            total, offers = offer_search_index.search(
+                q=q,
+                category_id=category_id,
+                business_id=business_id,
+                discount_type=discount_type,
+                min_discount=min_discount,
+                max_discount=max_discount,
+                available_only=available_only,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                offset=offset,
+                limit=size
+            )
+            next_cursor = encode_offset_cursor(offset + size) if offset + size < total else None
+            total_is_estimate = False
+        else:
+            total, offers, next_cursor = await _search_offers_in_database(
+                q, category_id, business_id, discount_type, min_discount, max_discount,
+                available_only, sort_by, sort_order, cursor, offset, size, include_total
+            )
+            total_is_estimate = not include_total
         
-        total = result.count if result.count else 0
         total_pages = (total + size - 1) // size
         
-        # Process offers and add display information
-        enhanced_offers = []
-        for offer in result.data:
-            offer_data = convert_decimals_to_float(offer)
-            
-            # Fix structure for frontend
-            if 'products' in offer_data:
-                offer_data['product'] = offer_data['products']
-                del offer_data['products']
-            if 'businesses' in offer_data:
-                offer_data['business'] = offer_data['businesses']
-                del offer_data['businesses']
-            
-            # Add display information
-            offer_data['display_text'] = OfferCalculator.get_offer_display_text(offer_data)
-            offer_data['conditions_text'] = get_offer_conditions_text(offer_data)
-            
-            enhanced_offers.append(offer_data)
+        # Add display information; rows are fresh dicts (or index copies),
+        # so they are updated in place
+        for offer_data in offers:
+            search_offer_payload(offer_data)
         
-        return {
-            "offers": enhanced_offers,
+        # Returned as-is: encoded once by orjson, no response_model pass
+        return ORJSONResponse({
+            "offers": offers,
             "pagination": {
                 "page": page,
                 "size": size,
                 "total": total,
                 "total_pages": total_pages,
-                "has_next": page < total_pages,
-                "has_prev": page > 1
+                "total_is_estimate": total_is_estimate,
+                "has_next": next_cursor is not None,
+                "has_prev": page > 1 or cursor is not None,
+                "next_cursor": next_cursor
             },
             "filters_applied": {
                 "search": q,
+                "sort_by": sort_by,
                 "category_id": category_id,
                 "business_id": business_id,
                 "discount_type": discount_type,
                 "min_discount": min_discount,
                 "max_discount": max_discount
             }
-        }
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error searching offers: {e}")
         raise HTTPException(
@@ -1433,7 +1445,7 @@ async def get_offer_details(
     
     try:
         # Get offer with all related data
-        result = supabase.table("offers").select(
+        result = await supabase.table("offers").select(
             "*, products(*, categories(*)), businesses(business_name, is_verified, avatar_url, business_address)"
         ).eq("id", offer_id).eq("is_active", True).execute()
         
@@ -1443,7 +1455,7 @@ async def get_offer_details(
                 detail="Offer not found or inactive"
             )
         
-        offer_data = convert_decimals_to_float(result.data[0])
+        offer_data = result.data[0]
         
         # Fix structure for frontend
         if 'products' in offer_data:
@@ -1454,48 +1466,22 @@ async def get_offer_details(
             del offer_data['businesses']
         
         # Add enhanced display information
-        offer_data['display_text'] = OfferCalculator.get_offer_display_text(offer_data)
-        offer_data['conditions_text'] = get_offer_conditions_text(offer_data)
+        offer_data.update(display_fields(offer_data))
+        offer_data['conditions_text'] = offer_conditions_text(offer_data)
         
-        # Add calculation examples for different quantities
+        # Add calculation examples for different quantities (memoized per
+        # offer version and price)
         item_price = float(offer_data['product']['price']) if offer_data['product']['price'] else 0
-        calculation_examples = []
-        
-        # Generate examples based on offer type
-        if offer_data['discount_type'] in ['percentage', 'fixed']:
-            quantities = [1, 2, 5]
-        elif offer_data['discount_type'] == 'quantity_discount':
-            min_qty = offer_data.get('minimum_quantity', 1)
-            quantities = [min_qty - 1, min_qty, min_qty + 2] if min_qty > 1 else [1, 3, 5]
-        elif offer_data['discount_type'] == 'bogo':
-            buy_qty = offer_data.get('buy_quantity', 1)
-            quantities = [buy_qty - 1, buy_qty, buy_qty * 2] if buy_qty > 1 else [1, 2, 4]
-        else:
-            quantities = [1, 2, 5]
-        
-        for qty in quantities:
-            if qty > 0:
-                calc_result = OfferCalculator.calculate_discount(
-                    offer_data=offer_data,
-                    quantity=qty,
-                    cart_total=item_price * qty,  # Simple cart total for examples
-                    item_price=item_price
-                )
-                calculation_examples.append({
-                    'quantity': qty,
-                    'calculation': calc_result
-                })
-        
-        offer_data['calculation_examples'] = calculation_examples
+        offer_data['calculation_examples'] = calculation_examples(offer_data, item_price)
         
         # Check if user has saved or claimed this offer
         if current_user:
             # Check if saved
-            saved_check = supabase.table("saved_offers").select("id").eq("user_id", str(current_user.id)).eq("offer_id", offer_id).execute()
+            saved_check = await supabase.table("saved_offers").select("id").eq("user_id", str(current_user.id)).eq("offer_id", offer_id).execute()
             offer_data['is_saved'] = len(saved_check.data) > 0
             
             # Check if claimed
-            claimed_check = supabase.table("claimed_offers").select("id, is_redeemed").eq("user_id", str(current_user.id)).eq("offer_id", offer_id).execute()
+            claimed_check = await supabase.table("claimed_offers").select("id, is_redeemed").eq("user_id", str(current_user.id)).eq("offer_id", offer_id).execute()
             offer_data['is_claimed'] = len(claimed_check.data) > 0
             if offer_data['is_claimed']:
                 offer_data['is_redeemed'] = claimed_check.data[0]['is_redeemed']
@@ -1534,7 +1520,7 @@ async def calculate_customer_discount(
         cart_total = calculation_request.get("cart_total")
         
         # Get offer data
-        result = supabase.table("offers").select(
+        result = await supabase.table("offers").select(
             "*, products(price)"
         ).eq("id", offer_id).eq("is_active", True).execute()
         
@@ -1557,7 +1543,7 @@ async def calculate_customer_discount(
         
         return {
             "calculation": calculation_result,
-            "offer_display_text": OfferCalculator.get_offer_display_text(offer_data),
+            "offer_display_text": display_fields(offer_data)["display_text"],
             "item_price": item_price,
             "quantity": quantity
         }
@@ -1570,66 +1556,3 @@ async def calculate_customer_discount(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Calculation failed: {str(e)}"
         )
-
-
-def get_offer_conditions_text(offer_data: Dict[str, Any]) -> Optional[str]:
-    """Generate human-readable conditions text for an offer"""
-    discount_type = offer_data.get('discount_type')
-    conditions = []
-    
-    if discount_type == 'minimum_purchase':
-        min_purchase = offer_data.get('minimum_purchase_amount', 0)
-        conditions.append(f"Minimum purchase of ${min_purchase:.2f} required")
-    
-    elif discount_type == 'quantity_discount':
-        min_qty = offer_data.get('minimum_quantity', 0)
-        conditions.append(f"Must purchase {min_qty} or more items")
-    
-    elif discount_type == 'bogo':
-        buy_qty = offer_data.get('buy_quantity', 1)
-        conditions.append(f"Must purchase at least {buy_qty} items to qualify")
-    
-    # Add general conditions
-    max_claims = offer_data.get('max_claims')
-    if max_claims:
-        current_claims = offer_data.get('current_claims', 0)
-        remaining = max_claims - current_claims
-        if remaining > 0:
-            conditions.append(f"Limited offer - {remaining} claims remaining")
-        else:
-            conditions.append("Offer no longer available")
-    
-    # Add expiry info
-    expiry_date = offer_data.get('expiry_date')
-    if expiry_date:
-        if isinstance(expiry_date, str):
-            expiry_dt = datetime.fromisoformat(expiry_date.replace('Z', '+00:00'))
-        else:
-            expiry_dt = expiry_date
-        
-        now = datetime.utcnow()
-        if expiry_dt > now:
-            days_remaining = (expiry_dt - now).days
-            if days_remaining == 0:
-                conditions.append("Expires today")
-            elif days_remaining == 1:
-                conditions.append("Expires tomorrow")
-            else:
-                conditions.append(f"Expires in {days_remaining} days")
-        else:
-            conditions.append("Expired")
-    
-    return " • ".join(conditions) if conditions else None
-
-
-def convert_decimals_to_float(data):
-    """Convert Decimal fields to float in a dictionary or list"""
-    from decimal import Decimal
-    if isinstance(data, dict):
-        return {key: convert_decimals_to_float(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [convert_decimals_to_float(item) for item in data]
-    elif isinstance(data, Decimal):
-        return float(data)
-    else:
-        return data
\ No newline at end of file
@@ -2,6 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db, check_database_health, supabase
 from app.core.config import settings
+from app.utils.image_worker import get_image_worker_metrics
+from app.utils.offer_index import offer_search_index
+from app.utils.nearby_index import nearby_offer_index
+from app.utils.geocoding import geocoder
+from app.utils.category_cache import category_cache
+from app.utils.response_cache import response_cache
 from datetime import datetime
 
 router = APIRouter(prefix="/health", tags=["Health"])
@@ -26,7 +32,7 @@ async def detailed_health_check(db: AsyncSession = Depends(get_db)):
     supabase_healthy = True
     try:
         # Simple test to check if Supabase client is working
-        supabase.table("profiles").select("id").limit(1).execute()
+        await supabase.table("profiles").select("id").limit(1).execute()
     except Exception:
         supabase_healthy = False
     
@@ -37,7 +43,13 @@ async def detailed_health_check(db: AsyncSession = Depends(get_db)):
         "checks": {
             "database": "healthy" if db_healthy else "unhealthy",
             "supabase": "healthy" if supabase_healthy else "unhealthy"
-        }
+        },
+        "image_processing": get_image_worker_metrics(),
+        "offer_search_index": offer_search_index.get_stats(),
+        "nearby_index": nearby_offer_index.get_stats(),
+        "geocoding": geocoder.get_stats(),
+        "category_cache": category_cache.get_stats(),
+        "response_cache": response_cache.get_stats()
     }
     
     if not (db_healthy and supabase_healthy):
@@ -11,11 +11,17 @@ class Settings(BaseSettings):
     
     # Database Configuration
     database_url: str
+    db_request_timeout: int = 30  # Seconds per PostgREST/Storage request
     
     # Security
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    supabase_jwt_secret: Optional[str] = None  # Project JWT secret, enables local token verification
+    auth_cache_ttl_seconds: int = 60  # How long verified tokens/profiles are reused
+    auth_cache_max_entries: int = 10000
+    auth_revocation_ttl_seconds: int = 3600  # Longest a revoked access token could still be valid (Supabase JWT expiry)
+    business_cache_ttl_seconds: int = 300  # How long a user's business context is reused
     
     # App Configuration
     app_name: str = "Offers API"
@@ -25,10 +31,56 @@ class Settings(BaseSettings):
     frontend_url: str = "https://yourapp.com"  # Update this to your actual domain
     api_base_url: str = "https://api.yourapp.com"  # Your API domain
     
+    # Offline redemption: base64url Ed25519 seed used to sign claim tokens
+    claim_token_private_key: Optional[str] = None
+    offline_redemption_max_age_seconds: int = 72 * 3600  # Oldest scanned_at accepted from a device
+    
+    # In-memory offer search index for /customer/offers/search (off by default)
+    offer_search_index_enabled: bool = False
+    offer_search_index_refresh_seconds: float = 30.0  # Incremental refresh from updated_at
+    offer_search_index_rebuild_seconds: float = 900.0  # Full reload, drops deleted/expired offers
+    
+    # In-memory nearby offer grid for /customer/offers/nearby (off by default)
+    nearby_index_enabled: bool = False
+    nearby_index_refresh_seconds: float = 30.0
+    nearby_index_rebuild_seconds: float = 900.0
+    
+    # Geocoding for /customer/offers/search-by-address
+    google_maps_api_key: Optional[str] = None
+    geocode_cache_ttl_seconds: float = 7 * 24 * 3600  # Addresses rarely move
+    geocode_negative_cache_ttl_seconds: float = 300.0  # "Not found" results
+    geocode_cache_max_entries: int = 10000
+    geocode_persistent_cache: bool = False  # Share results via the geocode_cache table
+    geocode_request_timeout: float = 10.0
+    geocode_max_connections: int = 20
+    
+    # Category cache; categories change rarely
+    category_cache_ttl_seconds: float = 3600.0  # Bounds staleness across workers
+    offer_categories_cache_ttl_seconds: float = 60.0  # /customer/offers/categories also depends on offers
+    category_cache_max_age_seconds: int = 300  # Cache-Control max-age for browsers/CDNs
+    
+    # Response cache for hot public customer endpoints (off by default)
+    response_cache_enabled: bool = False
+    response_cache_backend: str = "memory"  # "memory" (per worker) or "redis" (shared)
+    response_cache_redis_url: str = "redis://localhost:6379/0"
+    response_cache_prefix: str = "rc:"
+    response_cache_max_entries: int = 5000
+    response_cache_ttl_seconds: float = 30.0  # Fresh for this long
+    response_cache_stale_seconds: float = 120.0  # Then served stale while one request recomputes
+    
     # QR Code Settings
     qr_code_size: int = 10  # Box size for QR codes
     qr_code_border: int = 4  # Border size for QR codes
     
+    # Image Processing
+    image_worker_processes: int = 2  # Processes used for image validation/compression
+    max_image_upload_bytes: int = 10 * 1024 * 1024  # Largest accepted upload before processing
+    
+    # Storage Uploads
+    storage_max_concurrent_uploads: int = 4
+    storage_upload_retries: int = 3
+    storage_upload_chunk_size: int = 256 * 1024
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -6,7 +6,7 @@ if sys.platform == "win32":
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 from sqlalchemy.ext.declarative import declarative_base
-from supabase import create_client, Client
+from supabase import AsyncClient, AsyncClientOptions
 from app.core.config import settings
 import logging
 
@@ -20,15 +20,31 @@ Base = declarative_base()
 if not all([settings.supabase_url, settings.supabase_anon_key, settings.supabase_service_role_key]):
     raise ValueError("Missing required Supabase configuration. Check your .env file.")
 
-# Initialize Supabase clients
-supabase: Client = create_client(settings.supabase_url, settings.supabase_anon_key)
-supabase_admin: Client = create_client(settings.supabase_url, settings.supabase_service_role_key)
+
+def _create_async_client(supabase_key: str) -> AsyncClient:
+    """
+    Build an async Supabase client.
+
+    Every query awaits a shared httpx.AsyncClient (one keep-alive pool per
+    client), so PostgREST round trips no longer block the event loop and
+    concurrent requests overlap their I/O.
+    """
+    options = AsyncClientOptions(
+        postgrest_client_timeout=settings.db_request_timeout,
+        storage_client_timeout=settings.db_request_timeout,
+    )
+    return AsyncClient(settings.supabase_url, supabase_key, options)
+
+
+# Initialize Supabase clients (all calls must be awaited)
+supabase: AsyncClient = _create_async_client(settings.supabase_anon_key)
+supabase_admin: AsyncClient = _create_async_client(settings.supabase_service_role_key)
 
 # Simple database health check using Supabase
 async def check_database_health() -> bool:
     try:
         # Test connection by querying profiles table
-        result = supabase.table("profiles").select("id").limit(1).execute()
+        result = await supabase.table("profiles").select("id").limit(1).execute()
         logger.info("✅ Database connection successful")
         return True
     except Exception as e:
@@ -39,23 +55,31 @@ async def init_db():
     """Initialize database connection and verify tables exist"""
     try:
         # Test connection by checking if profiles table exists
-        response = supabase.table("profiles").select("id").limit(1).execute()
+        response = await supabase.table("profiles").select("id").limit(1).execute()
         logger.info("✅ Database connection successful")
-        
+
         # Check if sample categories exist
-        categories_response = supabase.table("categories").select("*").execute()
+        categories_response = await supabase.table("categories").select("*").execute()
         logger.info(f"✅ Found {len(categories_response.data)} categories")
-        
+
         return True
     except Exception as e:
         logger.error(f"❌ Database connection failed: {e}")
         return False
 
-def get_supabase() -> Client:
+async def close_database_clients():
+    """Close the pooled HTTP connections held by the Supabase clients"""
+    for client in (supabase, supabase_admin):
+        try:
+            await client.postgrest.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing database client: {e}")
+
+def get_supabase() -> AsyncClient:
     """Get Supabase client for regular operations"""
     return supabase
 
-def get_supabase_admin() -> Client:
+def get_supabase_admin() -> AsyncClient:
     """Get Supabase admin client for privileged operations"""
     return supabase_admin
 
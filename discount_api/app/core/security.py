@@ -3,10 +3,18 @@ from typing import Optional, Union, Any
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
+import httpx
 from app.core.config import settings
+from app.utils.cache import TTLCache
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Algorithms Supabase Auth signs access tokens with
+SUPABASE_JWT_ALGORITHMS = {"HS256", "RS256", "ES256"}
+
+# Signing keys published by Supabase Auth (asymmetric projects)
+_jwks_cache = TTLCache(maxsize=1, ttl=3600)
+
 def create_access_token(
     subject: Union[str, Any], expires_delta: Optional[timedelta] = None
 ) -> str:
@@ -53,4 +61,57 @@ def create_token_response(user_id: str) -> dict:
         "access_token": access_token,
         "token_type": "bearer",
         "expires_in": settings.access_token_expire_minutes * 60
-    }
\ No newline at end of file
+    }
+
+async def _get_supabase_jwks() -> list:
+    """Fetch (and cache) the project's JSON Web Key Set"""
+    keys = _jwks_cache.get("keys")
+    if keys is not None:
+        return keys
+
+    try:
+        async with httpx.AsyncClient(timeout=5) as client:
+            response = await client.get(f"{settings.supabase_url}/auth/v1/.well-known/jwks.json")
+            response.raise_for_status()
+            keys = response.json().get("keys", [])
+        _jwks_cache.set("keys", keys)
+    except Exception as e:
+        print(f"Failed to fetch Supabase JWKS: {e}")
+        keys = []
+        # Retry soon rather than hammering the endpoint on every request
+        _jwks_cache.set("keys", keys, ttl=60)
+
+    return keys
+
+
+async def decode_supabase_token(token: str) -> Optional[dict]:
+    """
+    Verify a Supabase access token locally and return its claims.
+
+    Returns None if the token is invalid or expired. Raises LookupError if no
+    key is available to verify it (no JWT secret configured and no matching
+    JWKS key), in which case the caller should fall back to Supabase Auth.
+    """
+    try:
+        header = jwt.get_unverified_header(token)
+    except JWTError:
+        return None
+
+    algorithm = header.get("alg")
+    if algorithm not in SUPABASE_JWT_ALGORITHMS:
+        return None
+
+    if algorithm == "HS256":
+        if not settings.supabase_jwt_secret:
+            raise LookupError("SUPABASE_JWT_SECRET is not configured")
+        key = settings.supabase_jwt_secret
+    else:
+        keys = await _get_supabase_jwks()
+        key = next((k for k in keys if k.get("kid") == header.get("kid")), None)
+        if key is None:
+            raise LookupError(f"No JWKS key found for kid {header.get('kid')}")
+
+    try:
+        return jwt.decode(token, key, algorithms=[algorithm], audience="authenticated")
+    except JWTError:
+        return None
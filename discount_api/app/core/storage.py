@@ -0,0 +1,140 @@
+# app/core/storage.py
+"""
+Async Supabase Storage client for uploads
+"""
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class StorageUploadError(Exception):
+    """Raised when an object could not be stored after all retries"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class StorageClient:
+    """
+    Uploads objects to Supabase Storage over a shared keep-alive
+    httpx.AsyncClient. Bodies are streamed in fixed-size chunks, transient
+    failures are retried with backoff, and the number of concurrent uploads
+    is capped so large bursts cannot exhaust connections or memory.
+    """
+
+    def __init__(
+        self,
+        base_url: str = settings.supabase_url,
+        service_key: str = settings.supabase_service_role_key,
+        max_concurrent_uploads: int = settings.storage_max_concurrent_uploads,
+        max_retries: int = settings.storage_upload_retries,
+        chunk_size: int = settings.storage_upload_chunk_size,
+    ):
+        self._base_url = f"{base_url}/storage/v1"
+        self._service_key = service_key
+        self._max_concurrent_uploads = max_concurrent_uploads
+        self._max_retries = max_retries
+        self._chunk_size = chunk_size
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.db_request_timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self._max_concurrent_uploads,
+                    max_keepalive_connections=self._max_concurrent_uploads,
+                ),
+                headers={"Authorization": f"Bearer {self._service_key}"},
+            )
+            self._slots = asyncio.Semaphore(self._max_concurrent_uploads)
+        return self._client
+
+    async def _iter_chunks(self, data: bytes) -> AsyncIterator[bytes]:
+        view = memoryview(data)
+        for start in range(0, len(view), self._chunk_size):
+            yield bytes(view[start:start + self._chunk_size])
+
+    def public_url(self, bucket: str, path: str) -> str:
+        return f"{self._base_url}/object/public/{bucket}/{path}"
+
+    async def upload(
+        self,
+        bucket: str,
+        path: str,
+        data: bytes,
+        content_type: str,
+        cache_control: str = "3600",
+        upsert: bool = False,
+    ) -> Dict:
+        """Stream `data` to {bucket}/{path} and return Storage's JSON response"""
+        client = self._get_client()
+        url = f"{self._base_url}/object/{bucket}/{path}"
+        headers = {
+            "Content-Type": content_type,
+            "Content-Length": str(len(data)),
+            "Cache-Control": cache_control,
+            "x-upsert": "true" if upsert else "false",
+        }
+
+        last_error: Optional[StorageUploadError] = None
+        async with self._slots:
+            for attempt in range(1, self._max_retries + 1):
+                try:
+                    response = await client.post(url, content=self._iter_chunks(data), headers=headers)
+                except httpx.TransportError as e:
+                    last_error = StorageUploadError(f"Upload request failed: {e}")
+                else:
+                    if response.status_code in (200, 201):
+                        return response.json()
+                    last_error = StorageUploadError(
+                        f"Upload failed: {response.status_code} - {response.text}",
+                        status_code=response.status_code,
+                    )
+                    if response.status_code not in RETRYABLE_STATUS_CODES:
+                        raise last_error
+
+                if attempt < self._max_retries:
+                    delay = 0.5 * 2 ** (attempt - 1)
+                    logger.warning(f"Storage upload attempt {attempt} failed ({last_error}), retrying in {delay}s")
+                    await asyncio.sleep(delay)
+
+        raise last_error
+
+    async def remove(self, bucket: str, paths: List[str]) -> None:
+        """Delete objects from {bucket} in one request (missing paths are ignored)"""
+        if not paths:
+            return
+        client = self._get_client()
+        response = await client.request(
+            "DELETE", f"{self._base_url}/object/{bucket}", json={"prefixes": paths}
+        )
+        if response.status_code not in (200, 204):
+            raise StorageUploadError(
+                f"Delete failed: {response.status_code} - {response.text}",
+                status_code=response.status_code,
+            )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._slots = None
+
+
+storage_client = StorageClient()
+
+
+def get_storage_client() -> StorageClient:
+    """Get the shared storage client"""
+    return storage_client
@@ -1,9 +1,10 @@
 # app/schemas/business.py
-from pydantic import BaseModel, Field, ConfigDict, field_validator
+from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator
 from typing import Optional, Dict, Any, List, Union
 from datetime import datetime
 from decimal import Decimal
 import uuid
+from app.utils.image_variants import image_variant_urls
 
 
 # ============================================================================
@@ -120,6 +121,7 @@ class ProductResponse(ProductBase):
     updated_at: datetime
     category: Optional[CategoryResponse] = None
     business: Optional[Dict[str, Any]] = None
+    image_variants: Optional[Dict[str, Dict[str, str]]] = None  # {width: {format: url}}
     
     @field_validator('price', mode='before')
     @classmethod
@@ -128,6 +130,13 @@ class ProductResponse(ProductBase):
         if isinstance(v, Decimal):
             return float(v)
         return v
+    
+    @model_validator(mode='after')
+    def fill_image_variants(self):
+        """Derive responsive image URLs from image_url"""
+        if self.image_variants is None:
+            self.image_variants = image_variant_urls(self.image_url)
+        return self
 
 
 # ============================================================================
@@ -228,12 +237,21 @@ class ProductListResponse(BaseModel):
     has_next: bool
 
 
-class OfferListResponse(BaseModel):
-    offers: List[OfferResponse]
-    total: int
+class BusinessProductPagination(BaseModel):
     page: int
-    size: int
+    limit: int
+    total: int
+    pages: int
+    total_is_estimate: bool
     has_next: bool
+    next_cursor: Optional[str] = None
+
+
+class BusinessProductPage(BaseModel):
+    """GET /business/products; products are rows with category, business and image variants"""
+    success: bool = True
+    products: List[ProductResponse]
+    pagination: BusinessProductPagination
 
 
 # ============================================================================
@@ -490,6 +508,22 @@ class RedemptionReceipt(BaseModel):
     generated_at: datetime
 
 
+class ScanRedemptionRequest(ClaimVerificationRequest):
+    """Verify and redeem a scanned claim in one step"""
+    redemption_notes: Optional[str] = Field(None, max_length=500)
+
+
+class ScanRedemptionResponse(BaseModel):
+    """Result of a scan redemption"""
+    success: bool
+    message: str
+    error_code: Optional[str] = None
+    claim_id: Optional[str] = None
+    redeemed_at: Optional[datetime] = None
+    expiry_date: Optional[datetime] = None
+    receipt: Optional[RedemptionReceipt] = None
+
+
 class RedemptionAuditLog(BaseModel):
     """Audit log entry for redemption tracking"""
     id: uuid.UUID
@@ -504,7 +538,39 @@ class RedemptionAuditLog(BaseModel):
 
 
 # ============================================================================
-# BULK OPERATIONS SCHEMAS (Future Use)
+# OFFLINE REDEMPTION SCHEMAS
+# ============================================================================
+
+class OfflineRedemptionItem(BaseModel):
+    """A scan verified from a signed claim token, possibly on an offline device"""
+    claim_token: str = Field(..., min_length=1, description="Signed claim token or scanned QR content")
+    scanned_at: Optional[datetime] = None
+    redemption_notes: Optional[str] = Field(None, max_length=500)
+
+
+class OfflineRedemptionRequest(BaseModel):
+    """Batch of offline scans (a single live scan is a batch of one)"""
+    redemptions: List[OfflineRedemptionItem] = Field(..., min_items=1, max_items=200)
+
+
+class OfflineRedemptionResult(BaseModel):
+    """Outcome of verifying one offline scan"""
+    claim_id: Optional[str] = None
+    accepted: bool
+    message: str
+    error_code: Optional[str] = None
+
+
+class OfflineRedemptionResponse(BaseModel):
+    """Accepted scans have been stored as redemptions"""
+    total_processed: int
+    accepted: int
+    rejected: int
+    results: List[OfflineRedemptionResult]
+
+
+# ============================================================================
+# BULK OPERATIONS SCHEMAS
 # ============================================================================
 
 class BulkRedemptionRequest(BaseModel):
@@ -795,4 +861,34 @@ class BusinessSummary(BaseModel):
     """Simplified business info for offer responses"""
     business_name: str
     is_verified: bool
-    avatar_url: Optional[str] = None
\ No newline at end of file
+    avatar_url: Optional[str] = None
+
+
+# ============================================================================
+# OFFER LISTS
+# ============================================================================
+
+class OfferListResponse(BaseModel):
+    offers: List[OfferResponse]
+    total: int
+    page: int
+    size: int
+    has_next: bool
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
+
+
+class BusinessOfferPagination(BaseModel):
+    page: int
+    limit: int
+    total: int
+    totalPages: int
+    totalIsEstimate: bool
+    hasNext: bool
+    nextCursor: Optional[str] = None
+
+
+class BusinessOfferPage(BaseModel):
+    """GET /business/offers; offers are rows with product and business"""
+    offers: List[OfferResponse]
+    pagination: BusinessOfferPagination
@@ -23,11 +23,82 @@ class BusinessSummary(BaseModel):
 class ProductSearchResponse(ProductResponse):
     """Product response with business info for search"""
     business: Optional[BusinessSummary] = None
+    highlights: Optional[Dict[str, str]] = None  # name/description with <mark> around matches
 
 
 class OfferSearchResponse(OfferResponse):
     """Offer response with business info for search"""
     business: Optional[BusinessSummary] = None
+    highlights: Optional[Dict[str, str]] = None  # title/description with <mark> around matches
+
+
+class OfferDisplayFields(BaseModel):
+    """Display text stored on offers (see app/utils/offer_display.py)"""
+    display_text: Optional[str] = None
+    terms_text: Optional[str] = None
+    discount_text: Optional[str] = None
+    savings_amount: Optional[float] = None
+
+
+class OfferSearchResult(OfferDisplayFields, OfferSearchResponse):
+    """One offer in GET /customer/offers/search"""
+    conditions_text: Optional[str] = None
+
+
+class OfferSearchPagination(BaseModel):
+    page: int
+    size: int
+    total: int
+    total_pages: int
+    total_is_estimate: bool
+    has_next: bool
+    has_prev: bool
+    next_cursor: Optional[str] = None
+
+
+class OfferSearchFilters(BaseModel):
+    search: Optional[str] = None
+    sort_by: str
+    category_id: Optional[str] = None
+    business_id: Optional[str] = None
+    discount_type: Optional[str] = None
+    min_discount: Optional[float] = None
+    max_discount: Optional[float] = None
+
+
+class OfferSearchPage(BaseModel):
+    """GET /customer/offers/search; offers carry product, business and display text"""
+    offers: List[OfferSearchResult]
+    pagination: OfferSearchPagination
+    filters_applied: OfferSearchFilters
+
+
+class SearchLocation(BaseModel):
+    latitude: float
+    longitude: float
+
+
+class NearbyOffer(OfferDisplayFields, OfferResponse):
+    """One offer in GET /customer/offers/nearby, with its business flattened in"""
+    business_name: str
+    business_address: Optional[str] = None
+    business_avatar_url: Optional[str] = None
+    is_verified: bool = False
+    business_category_id: Optional[int] = None
+    latitude: float
+    longitude: float
+    distance_km: float
+    remaining_claims: Optional[int] = None
+    claim_percentage: float = 0
+
+
+class NearbyOffersResponse(BaseModel):
+    """GET /customer/offers/nearby; offers carry business info and distance_km"""
+    offers: List[NearbyOffer]
+    search_location: SearchLocation
+    search_radius_km: float
+    total_found: int
+    message: str
 
 
 # ============================================================================
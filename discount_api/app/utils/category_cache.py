@@ -0,0 +1,121 @@
+# app/utils/category_cache.py
+"""
+Read-through cache of categories, with ETags for HTTP revalidation
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.database import supabase_admin
+from app.utils.cache import TTLCache, content_etag
+
+
+class CategoryCache:
+    """
+    All categories, loaded in one query and kept until a category endpoint
+    invalidates them (or the TTL passes, which bounds how long other workers
+    serve a category changed elsewhere). Each invalidation bumps the version;
+    a load that started before an invalidation is not stored. The categories
+    that currently have offers depend on offers too, so they are cached
+    separately with a short TTL. Intended for use from the event loop only.
+    """
+
+    def __init__(
+        self,
+        ttl: float = settings.category_cache_ttl_seconds,
+        offer_categories_ttl: float = settings.offer_categories_cache_ttl_seconds,
+    ):
+        self._ttl = ttl
+        self._version = 0
+        self._loaded_at = 0.0
+        self._categories: Optional[List[Dict[str, Any]]] = None
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._etag = ""
+        self._lock = asyncio.Lock()
+        self._offer_categories = TTLCache(maxsize=1, ttl=offer_categories_ttl)
+        self._stats = {"hits": 0, "loads": 0}
+
+    def _fresh(self) -> bool:
+        return self._categories is not None and time.monotonic() - self._loaded_at < self._ttl
+
+    async def _load(self) -> None:
+        version = self._version
+        result = await supabase_admin.table("categories").select("*").order("name").execute()
+        categories = result.data or []
+        self._stats["loads"] += 1
+        if version != self._version:
+            # Invalidated while loading; don't cache what may be stale
+            return
+        self._categories = categories
+        self._by_id = {category["id"]: category for category in categories}
+        self._etag = content_etag(categories)
+        self._loaded_at = time.monotonic()
+
+    async def _ensure_loaded(self) -> None:
+        if self._fresh():
+            self._stats["hits"] += 1
+            return
+        async with self._lock:
+            # Concurrent misses share the load that got the lock first
+            if not self._fresh():
+                await self._load()
+
+    async def list_all(self) -> Tuple[List[Dict[str, Any]], str]:
+        """All categories ordered by name, and their ETag"""
+        await self._ensure_loaded()
+        if self._categories is None:
+            # Invalidated during the load; serve it uncached
+            result = await supabase_admin.table("categories").select("*").order("name").execute()
+            return result.data or [], content_etag(result.data or [])
+        return self._categories, self._etag
+
+    async def get(self, category_id: int) -> Tuple[Optional[Dict[str, Any]], str]:
+        """One category (None if missing) and its ETag"""
+        await self._ensure_loaded()
+        if self._categories is None:
+            result = await supabase_admin.table("categories").select("*").eq("id", category_id).execute()
+            category = result.data[0] if result.data else None
+        else:
+            category = self._by_id.get(category_id)
+        return category, content_etag(category)
+
+    async def with_offers(self) -> Tuple[List[Dict[str, Any]], str]:
+        """Categories that have active offers (all categories if none are reported)"""
+        cached = self._offer_categories.get("categories")
+        if cached is not None:
+            self._stats["hits"] += 1
+            return cached
+
+        result = await supabase_admin.rpc('get_categories_with_offers').execute()
+        if result.data:
+            categories = result.data
+        else:
+            categories, _ = await self.list_all()
+        cached = (categories, content_etag(categories))
+        self._offer_categories.set("categories", cached)
+        return cached
+
+    def invalidate(self) -> None:
+        """Drop everything cached; call after creating, updating or deleting a category"""
+        self._version += 1
+        self._categories = None
+        self._by_id = {}
+        self._offer_categories.clear()
+
+    async def warm(self) -> None:
+        try:
+            await self._ensure_loaded()
+        except Exception as e:
+            print(f"Category cache warm-up failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "version": self._version,
+            "categories": len(self._categories) if self._categories is not None else None,
+            "etag": self._etag or None,
+            **self._stats,
+        }
+
+
+category_cache = CategoryCache()
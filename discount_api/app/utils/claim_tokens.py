@@ -0,0 +1,134 @@
+# app/utils/claim_tokens.py
+"""
+Signed claim tokens for offline redemption
+
+A token carries the claim ID, offer ID, business ID and expiry, signed with
+Ed25519. Anyone holding the public key (the API, or a point-of-sale device
+that downloaded it from /business/redeem/token-key) can verify a scanned
+token without a database lookup; redemptions are then queued and reconciled
+in batch.
+
+Format: CT1.<base64url payload>.<base64url signature>
+Payload: len(claim_id) | claim_id | offer uuid (16) | business uuid (16) | expiry (uint32 unix)
+"""
+import base64
+import struct
+import uuid
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+from app.core.config import settings
+
+CLAIM_TOKEN_PREFIX = "CT1"
+CLAIM_TOKEN_ALGORITHM = "Ed25519"
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+@lru_cache(maxsize=1)
+def _signing_keys() -> Optional[Tuple[Ed25519PrivateKey, Ed25519PublicKey]]:
+    """Load the signing key from CLAIM_TOKEN_PRIVATE_KEY (base64 32-byte seed)"""
+    if not settings.claim_token_private_key:
+        return None
+    private_key = Ed25519PrivateKey.from_private_bytes(_b64decode(settings.claim_token_private_key.strip()))
+    return private_key, private_key.public_key()
+
+
+def claim_tokens_enabled() -> bool:
+    return _signing_keys() is not None
+
+
+def get_claim_token_public_key() -> Optional[str]:
+    """Raw public key, base64url encoded, for offline verifiers"""
+    keys = _signing_keys()
+    if not keys:
+        return None
+    return _b64encode(keys[1].public_bytes(Encoding.Raw, PublicFormat.Raw))
+
+
+def create_claim_token(claim_id: str, offer_id: str, business_id: str, expires_at: datetime) -> Optional[str]:
+    """Sign a claim token, or return None when signing is not configured"""
+    keys = _signing_keys()
+    if not keys:
+        return None
+
+    claim_bytes = claim_id.encode("ascii")
+    payload = (
+        struct.pack("B", len(claim_bytes)) + claim_bytes +
+        uuid.UUID(str(offer_id)).bytes +
+        uuid.UUID(str(business_id)).bytes +
+        struct.pack(">I", int(expires_at.timestamp()))
+    )
+    signature = keys[0].sign(payload)
+    return f"{CLAIM_TOKEN_PREFIX}.{_b64encode(payload)}.{_b64encode(signature)}"
+
+
+def verify_claim_token(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Check a token's signature and decode it.
+    Returns None for malformed or forged tokens; expiry is reported in the
+    result ("expired") so callers can give a specific error.
+    """
+    keys = _signing_keys()
+    if not keys or not token:
+        return None
+
+    try:
+        prefix, payload_part, signature_part = token.strip().split(".")
+        if prefix != CLAIM_TOKEN_PREFIX:
+            return None
+        payload = _b64decode(payload_part)
+        keys[1].verify(_b64decode(signature_part), payload)
+
+        claim_length = payload[0]
+        offset = 1 + claim_length
+        if len(payload) != offset + 36:
+            return None
+        expires_at = datetime.fromtimestamp(struct.unpack(">I", payload[offset + 32:])[0], tz=timezone.utc)
+    except (ValueError, IndexError, struct.error, InvalidSignature):
+        return None
+
+    return {
+        "claim_id": payload[1:offset].decode("ascii"),
+        "offer_id": str(uuid.UUID(bytes=payload[offset:offset + 16])),
+        "business_id": str(uuid.UUID(bytes=payload[offset + 16:offset + 32])),
+        "expires_at": expires_at,
+        "expired": expires_at < datetime.now(timezone.utc),
+    }
+
+
+def extract_claim_token(qr_content: str) -> Optional[str]:
+    """Find a claim token in scanned QR content (bare token or ?t= parameter)"""
+    qr_content = (qr_content or "").strip()
+    if qr_content.startswith(f"{CLAIM_TOKEN_PREFIX}."):
+        return qr_content
+    if "t=" in qr_content:
+        candidate = qr_content.split("t=", 1)[1].split("&")[0].split("#")[0]
+        if candidate.startswith(f"{CLAIM_TOKEN_PREFIX}."):
+            return candidate
+    return None
+
+
+def token_for_claim(claim_id: str, offer: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Sign a token for a claim given its offer row (needs id, business_id, expiry_date)"""
+    if not claim_tokens_enabled() or not offer:
+        return None
+    try:
+        expires_at = datetime.fromisoformat(str(offer["expiry_date"]).replace("Z", "+00:00"))
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return create_claim_token(claim_id, offer["id"], offer["business_id"], expires_at)
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"Could not sign claim token for {claim_id}: {e}")
+        return None
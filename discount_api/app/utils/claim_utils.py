@@ -2,11 +2,16 @@
 """
 Utilities for generating unique claim IDs and QR codes
 """
+import asyncio
+import hashlib
+import hmac
 import random
 import string
 import qrcode
+import qrcode.image.svg
 import io
 import base64
+from functools import lru_cache
 from typing import Tuple, Optional
 from app.core.config import settings
 
@@ -34,13 +39,10 @@ def generate_unique_claim_id() -> str:
 
 def generate_verification_url(claim_id: str, base_url: Optional[str] = None) -> str:
     """
-    Generate the verification URL for a claim
+    Generate the verification URL for a claim: {frontend_url}/verify/{claim_id},
+    the form the business verify endpoint and parse_qr_code_content read
     """
-    if not base_url:
-        # Use your API base URL - you'll need to update this
-        base_url = getattr(settings, 'frontend_url', 'https://yourapp.com')
-    
-    return f"{base_url}/verify/claim/{claim_id}"
+    return f"{base_url or settings.frontend_url}/verify/{claim_id}"
 
 def generate_qr_code(claim_id: str, base_url: Optional[str] = None) -> Tuple[str, str]:
     """
@@ -76,6 +78,49 @@ def generate_qr_code(claim_id: str, base_url: Optional[str] = None) -> Tuple[str
     
     return qr_data_url, verification_url
 
+QR_CODE_CACHE_SIZE = 1024
+QR_CODE_MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+def qr_code_image_url(claim_id: str, image_format: str = "png", token: Optional[str] = None) -> str:
+    """
+    Public URL of the rendered QR code for a claim.
+    Claims only store their unique_claim_id; images are served by
+    GET /customer/claimed-offers/{claim_id}/qr.{png|svg}. When a signed claim
+    token is given it is passed along and embedded in the QR code.
+    """
+    url = f"{settings.api_base_url}/api/v1/customer/claimed-offers/{claim_id}/qr.{image_format}"
+    return f"{url}?t={token}" if token else url
+
+
+@lru_cache(maxsize=QR_CODE_CACHE_SIZE)
+def render_qr_code(claim_id: str, image_format: str = "png", token: Optional[str] = None) -> bytes:
+    """
+    Render the QR code for a claim as PNG or SVG bytes, optionally carrying
+    a signed claim token for offline verification (see claim_tokens.py).
+    The output depends only on the inputs, so results are memoized.
+    """
+    if image_format not in QR_CODE_MEDIA_TYPES:
+        raise ValueError(f"Unsupported QR code format: {image_format}")
+    
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
+        box_size=settings.qr_code_size,
+        border=settings.qr_code_border,
+    )
+    verification_url = generate_verification_url(claim_id)
+    qr.add_data(f"{verification_url}?t={token}" if token else verification_url)
+    qr.make(fit=True)
+    
+    buffer = io.BytesIO()
+    if image_format == "svg":
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+    else:
+        qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    
+    return buffer.getvalue()
+
 def verify_claim_id_format(claim_id: str) -> bool:
     """
     Verify that a claim ID matches the expected format
@@ -97,21 +142,102 @@ def verify_claim_id_format(claim_id: str) -> bool:
     
     return all(pattern_checks)
 
-def ensure_unique_claim_id(supabase_client, max_attempts: int = 10) -> str:
+# ---------------------------------------------------------------------------
+# Collision-free claim IDs
+#
+# Claim IDs are a keyed permutation of a counter, encoded in the AB12CD34
+# alphabet. Counters come in blocks reserved from a database sequence
+# (migrations/002_claim_id_blocks.sql), so two workers never share a counter
+# and only one block reservation per CLAIM_ID_BLOCK_SIZE claims hits the
+# database. The unique_claim_id constraint stays as a safety net for IDs
+# issued by the old random generator.
+# ---------------------------------------------------------------------------
+
+CLAIM_ID_BLOCK_SIZE = 1000
+# Number of distinct AB12CD34 codes: 26^4 letter combinations x 10^4 digit combinations
+CLAIM_ID_SPACE = 26 ** 4 * 10 ** 4
+_FEISTEL_HALF_BITS = 17  # 2^34 >= CLAIM_ID_SPACE
+_FEISTEL_HALF_MASK = (1 << _FEISTEL_HALF_BITS) - 1
+_FEISTEL_ROUNDS = 4
+
+
+def _feistel_round(key: bytes, round_no: int, value: int) -> int:
+    digest = hmac.new(key, f"{round_no}:{value}".encode(), hashlib.sha256).digest()
+    return int.from_bytes(digest[:4], "big") & _FEISTEL_HALF_MASK
+
+
+def permute_claim_counter(counter: int, key: bytes) -> int:
     """
-    Generate a unique claim ID that doesn't already exist in the database
+    Map a counter in [0, CLAIM_ID_SPACE) to a unique, scrambled value in the
+    same range (a bijection, so distinct counters give distinct claim IDs).
+    Uses a balanced Feistel network over 34 bits with cycle-walking.
+    """
+    if not 0 <= counter < CLAIM_ID_SPACE:
+        raise ValueError("Claim ID counter out of range")
+    
+    value = counter
+    while True:
+        left, right = value >> _FEISTEL_HALF_BITS, value & _FEISTEL_HALF_MASK
+        for round_no in range(_FEISTEL_ROUNDS):
+            left, right = right, left ^ _feistel_round(key, round_no, right)
+        value = (left << _FEISTEL_HALF_BITS) | right
+        if value < CLAIM_ID_SPACE:
+            return value
+
+
+def encode_claim_id(value: int) -> str:
+    """Encode a value in [0, CLAIM_ID_SPACE) as Letter-Letter-Digit-Digit-Letter-Letter-Digit-Digit"""
+    letters, digits = divmod(value, 10 ** 4)
+    letter_chars = []
+    for _ in range(4):
+        letters, index = divmod(letters, 26)
+        letter_chars.append(string.ascii_uppercase[index])
+    digit_chars = f"{digits:04d}"
+    
+    return (
+        letter_chars[0] + letter_chars[1] + digit_chars[0:2] +
+        letter_chars[2] + letter_chars[3] + digit_chars[2:4]
+    )
+
+
+class ClaimIdGenerator:
+    """
+    Issues claim IDs from counter blocks reserved via next_claim_id_block().
+    One instance per worker; safe for concurrent use from the event loop.
     """
-    for _ in range(max_attempts):
-        claim_id = generate_unique_claim_id()
-        
-        # Check if this ID already exists
-        existing = supabase_client.table("claimed_offers").select("id").eq("unique_claim_id", claim_id).execute()
-        
-        if not existing.data:
-            return claim_id
     
-    # If we get here, we've failed to generate a unique ID
-    raise Exception("Failed to generate unique claim ID after maximum attempts")
+    def __init__(self, key: Optional[str] = None, block_size: int = CLAIM_ID_BLOCK_SIZE):
+        self._key = (key or settings.secret_key).encode()
+        self._block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._lock = asyncio.Lock()
+    
+    async def _reserve_block(self, supabase_client) -> None:
+        result = await supabase_client.rpc("next_claim_id_block").execute()
+        start = int(result.data) * self._block_size
+        if start + self._block_size > CLAIM_ID_SPACE:
+            raise Exception("Claim ID space exhausted")
+        self._next, self._end = start, start + self._block_size
+    
+    async def next_id(self, supabase_client) -> str:
+        async with self._lock:
+            if self._next >= self._end:
+                await self._reserve_block(supabase_client)
+            counter = self._next
+            self._next += 1
+        
+        return encode_claim_id(permute_claim_counter(counter, self._key))
+
+
+claim_id_generator = ClaimIdGenerator()
+
+
+async def ensure_unique_claim_id(supabase_client) -> str:
+    """
+    Issue a claim ID that is unique by construction (no existence checks)
+    """
+    return await claim_id_generator.next_id(supabase_client)
 
 def get_claim_display_info(claim_type: str, unique_claim_id: str, qr_code_url: str) -> dict:
     """
@@ -171,26 +297,7 @@ from typing import Tuple, Dict, Any
 from datetime import datetime
 
 
-def ensure_unique_claim_id(supabase_client, max_attempts: int = 10) -> str:
-    """Generate a unique claim ID that doesn't exist in the database"""
-    
-    for attempt in range(max_attempts):
-        # Generate a random claim ID (8 characters: letters and numbers)
-        claim_id = ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(8))
-        
-        # Check if it already exists
-        existing = supabase_client.table("claimed_offers").select("id").eq("unique_claim_id", claim_id).execute()
-        
-        if not existing.data:
-            return claim_id
-    
-    # If we couldn't generate a unique ID after max_attempts, use timestamp-based fallback
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    random_suffix = ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(4))
-    return f"{timestamp}{random_suffix}"
-
-
-def generate_qr_code(claim_id: str, base_url: str = "https://your-domain.com") -> Tuple[str, str]:
+def generate_qr_code(claim_id: str, base_url: Optional[str] = None) -> Tuple[str, str]:
     """Generate QR code for a claim ID and return data URL and verification URL"""
     
     try:
@@ -198,7 +305,7 @@ def generate_qr_code(claim_id: str, base_url: str = "https://your-domain.com") -
         from PIL import Image
         
         # Create verification URL
-        verification_url = f"{base_url}/verify/{claim_id}"
+        verification_url = generate_verification_url(claim_id, base_url)
         
         # Generate QR code
         qr = qrcode.QRCode(
@@ -226,7 +333,7 @@ def generate_qr_code(claim_id: str, base_url: str = "https://your-domain.com") -
         print("QR code libraries not available. Install: pip install qrcode[pil]")
         
         # Return a placeholder data URL and verification URL
-        verification_url = f"{base_url}/verify/{claim_id}"
+        verification_url = generate_verification_url(claim_id, base_url)
         placeholder_data_url = "data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMjAwIiBoZWlnaHQ9IjIwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48cmVjdCB3aWR0aD0iMjAwIiBoZWlnaHQ9IjIwMCIgZmlsbD0iI2Y4ZjlmYSIvPjx0ZXh0IHg9IjEwMCIgeT0iMTAwIiB0ZXh0LWFuY2hvcj0ibWlkZGxlIiBkeT0iLjNlbSIgZm9udC1mYW1pbHk9InNhbnMtc2VyaWYiIGZvbnQtc2l6ZT0iMTQiIGZpbGw9IiM2YjcyODAiPlFSIENvZGU8L3RleHQ+PC9zdmc+"
         
         return placeholder_data_url, verification_url
@@ -235,7 +342,7 @@ def generate_qr_code(claim_id: str, base_url: str = "https://your-domain.com") -
         print(f"Error generating QR code: {e}")
         
         # Return error placeholder
-        verification_url = f"{base_url}/verify/{claim_id}"
+        verification_url = generate_verification_url(claim_id, base_url)
         error_data_url = "data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMjAwIiBoZWlnaHQ9IjIwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48cmVjdCB3aWR0aD0iMjAwIiBoZWlnaHQ9IjIwMCIgZmlsbD0iI2ZlZjJmMiIvPjx0ZXh0IHg9IjEwMCIgeT0iMTAwIiB0ZXh0LWFuY2hvcj0ibWlkZGxlIiBkeT0iLjNlbSIgZm9udC1mYW1pbHk9InNhbnMtc2VyaWYiIGZvbnQtc2l6ZT0iMTIiIGZpbGw9IiNkYzI2MjYiPkVycm9yIEdlbmVyYXRpbmc8L3RleHQ+PHRleHQgeD0iMTAwIiB5PSIxMjAiIHRleHQtYW5jaG9yPSJtaWRkbGUiIGR5PSIuM2VtIiBmb250LWZhbWlseT0ic2Fucy1zZXJpZiIgZm9udC1zaXplPSIxMiIgZmlsbD0iI2RjMjYyNiI+UVIgQ29kZTwvdGV4dD48L3N2Zz4="
         
         return error_data_url, verification_url
@@ -254,7 +361,7 @@ def get_claim_display_info(claim_type: str, claim_id: str, qr_code_url: str = No
             **base_info,
             "instructions": "Show this QR code or claim ID to the merchant to redeem your offer",
             "qr_code": qr_code_url,
-            "verification_url": f"https://your-domain.com/verify/{claim_id}",
+            "verification_url": generate_verification_url(claim_id),
             "manual_entry_text": f"Claim ID: {claim_id}",
             "redemption_method": "Show QR code or provide claim ID to merchant",
             "display_priority": "qr_code"  # Show QR code prominently
@@ -1,12 +1,117 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
-from app.core.database import supabase
+from datetime import datetime, timezone
+from app.core.config import settings
+from app.core.database import supabase, supabase_admin
+from app.core.security import decode_supabase_token
 from app.schemas.user import UserProfile
+from app.utils.cache import TTLCache
+from jose import JWTError, jwt
+import hashlib
 import uuid
 
 security = HTTPBearer()
 
+# Verified access token -> (user id, session id), and user id -> profile
+_token_cache = TTLCache(maxsize=settings.auth_cache_max_entries, ttl=settings.auth_cache_ttl_seconds)
+# Sessions and tokens ended by logout or a password change, kept until the
+# token would have expired anyway. Tokens are verified locally, so without
+# this a logged-out token keeps authenticating until its exp.
+_revoked = TTLCache(maxsize=settings.auth_cache_max_entries, ttl=settings.auth_revocation_ttl_seconds)
+_profile_cache = TTLCache(maxsize=settings.auth_cache_max_entries, ttl=settings.auth_cache_ttl_seconds)
+# User id -> business context (id, name, category) for business endpoints
+_business_cache = TTLCache(maxsize=settings.auth_cache_max_entries, ttl=settings.business_cache_ttl_seconds)
+
+
+def invalidate_user_cache(user_id) -> None:
+    """Drop the cached profile for a user after it has been changed"""
+    _profile_cache.pop(str(user_id))
+
+
+def invalidate_business_cache(user_id) -> None:
+    """Drop the cached business context after a business is created or updated"""
+    _business_cache.pop(str(user_id))
+
+
+def _token_key(token: str) -> str:
+    return "token:" + hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _session_key(session_id: str) -> str:
+    return f"session:{session_id}"
+
+
+def revoke_token(token: str) -> None:
+    """
+    Stop accepting an access token, and every token of its session, on this
+    worker (after logout or a password change)
+    """
+    _token_cache.pop(token)
+    
+    # The token was just authenticated; its claims only set what to revoke
+    # and for how long
+    try:
+        claims = jwt.get_unverified_claims(token)
+    except JWTError:
+        claims = {}
+    
+    ttl = settings.auth_revocation_ttl_seconds
+    if claims.get("exp"):
+        ttl = min(ttl, claims["exp"] - datetime.now(timezone.utc).timestamp())
+    
+    _revoked.set(_token_key(token), True, ttl=ttl)
+    if claims.get("session_id"):
+        _revoked.set(_session_key(claims["session_id"]), True, ttl=ttl)
+
+
+def _is_revoked(session_id: Optional[str]) -> bool:
+    return session_id is not None and _session_key(session_id) in _revoked
+
+
+async def _resolve_user_id(token: str) -> Optional[str]:
+    """Return the user id for a valid, unrevoked access token, or None"""
+    if _token_key(token) in _revoked:
+        return None
+    
+    cached = _token_cache.get(token)
+    if cached:
+        user_id, session_id = cached
+        if _is_revoked(session_id):
+            _token_cache.pop(token)
+            return None
+        return user_id
+    
+    ttl = settings.auth_cache_ttl_seconds
+    session_id = None
+    try:
+        # Verify locally against the project secret/JWKS (no network round trip)
+        claims = await decode_supabase_token(token)
+        if not claims or not claims.get("sub"):
+            return None
+        
+        session_id = claims.get("session_id")
+        if _is_revoked(session_id):
+            return None
+        
+        user_id = claims["sub"]
+        if claims.get("exp"):
+            seconds_left = claims["exp"] - datetime.now(timezone.utc).timestamp()
+            ttl = min(ttl, seconds_left)
+    except LookupError:
+        # No verification key available, ask Supabase Auth instead
+        try:
+            supabase_user = await supabase.auth.get_user(token)
+        except Exception:
+            return None
+        if not supabase_user or not supabase_user.user:
+            return None
+        user_id = supabase_user.user.id
+    
+    _token_cache.set(token, (str(user_id), session_id), ttl=ttl)
+    return str(user_id)
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> UserProfile:
@@ -21,40 +126,42 @@ async def get_current_user(
     # Extract token
     token = credentials.credentials
     
-    # Verify with Supabase first
-    try:
-        supabase_user = supabase.auth.get_user(token)
-        if not supabase_user.user:
-            raise credentials_exception
-        
-        user_id = supabase_user.user.id
-    except Exception:
+    # Verify the token (locally when possible)
+    user_id = await _resolve_user_id(token)
+    if not user_id:
         raise credentials_exception
     
+    user = _profile_cache.get(user_id)
+    
     # Get user from database
-    try:
-        result = supabase.table("profiles").select("*").eq("id", user_id).execute()
-        
-        if not result.data:
-            raise credentials_exception
+    if user is None:
+        try:
+            result = await supabase.table("profiles").select("*").eq("id", user_id).execute()
             
-        user_data = result.data[0]
+            if not result.data:
+                raise credentials_exception
+                
+            user = UserProfile(**result.data[0])
         
-        if not user_data.get("is_active", True):
+        except HTTPException:
+            raise
+        except ValueError:
+            raise credentials_exception
+        except Exception:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Inactive user"
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error retrieving user"
             )
-            
-        return UserProfile(**user_data)
+        
+        _profile_cache.set(user_id, user)
     
-    except ValueError:
-        raise credentials_exception
-    except Exception:
+    if not user.is_active:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error retrieving user"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
         )
+        
+    return user
 
 async def get_current_active_user(
     current_user: UserProfile = Depends(get_current_user)
@@ -78,6 +185,35 @@ async def get_current_business_user(
         )
     return current_user
 
+async def get_current_business(
+    current_user: UserProfile = Depends(get_current_business_user)
+) -> dict:
+    """Get the current user's business (id, business_name, category_id)"""
+    user_id = str(current_user.id)
+    business = _business_cache.get(user_id)
+    if business is not None:
+        return business
+    
+    try:
+        result = await supabase_admin.table("businesses").select(
+            "id, business_name, category_id"
+        ).eq("user_id", user_id).execute()
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error retrieving business"
+        )
+    
+    if not result.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Business not found"
+        )
+    
+    business = result.data[0]
+    _business_cache.set(user_id, business)
+    return business
+
 async def get_current_admin_user(
     current_user: UserProfile = Depends(get_current_active_user)
 ) -> UserProfile:
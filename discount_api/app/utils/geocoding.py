@@ -1,40 +1,219 @@
-# Create app/utils/geocoding.py
+# app/utils/geocoding.py
+"""
+Address geocoding over a shared aiohttp session, with caching
+"""
+import asyncio
+import re
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
 import aiohttp
-import os
-from typing import Optional, Dict, Any
+
+from app.core.config import settings
+from app.core.database import supabase_admin
+from app.utils.cache import TTLCache
+
+GOOGLE_GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+_WHITESPACE = re.compile(r"\s+")
+_SEPARATOR_SPACING = re.compile(r"\s*,\s*")
+
+
+def normalize_address(address: str) -> str:
+    """Cache key for an address: case, spacing and stray commas don't matter"""
+    key = _WHITESPACE.sub(" ", address).strip().casefold()
+    key = _SEPARATOR_SPACING.sub(", ", key)
+    return key.strip(" ,.")
+
+
+class GeocodingProvider(ABC):
+    """
+    Turns an address into {"latitude", "longitude", "formatted_address",
+    "place_id", "address_components"}, or None when it cannot be found.
+    Transport failures should raise so they are not cached as "not found".
+    """
+
+    name = "provider"
+
+    @abstractmethod
+    async def geocode(self, session: aiohttp.ClientSession, address: str) -> Optional[Dict[str, Any]]:
+        ...
+
+
+class GoogleGeocodingProvider(GeocodingProvider):
+    """Google Geocoding API"""
+
+    name = "google"
+
+    def __init__(self, api_key: Optional[str] = settings.google_maps_api_key):
+        self._api_key = api_key
+
+    async def geocode(self, session: aiohttp.ClientSession, address: str) -> Optional[Dict[str, Any]]:
+        if not self._api_key:
+            return None
+
+        params = {"address": address, "key": self._api_key}
+        async with session.get(GOOGLE_GEOCODE_URL, params=params) as response:
+            response.raise_for_status()
+            data = await response.json()
+
+        if data["status"] == "ZERO_RESULTS":
+            return None
+        if data["status"] != "OK" or not data["results"]:
+            raise RuntimeError(f"Google geocoding returned {data['status']}")
+
+        result = data["results"][0]
+        location = result["geometry"]["location"]
+        return {
+            "latitude": location["lat"],
+            "longitude": location["lng"],
+            "formatted_address": result["formatted_address"],
+            "place_id": result.get("place_id"),
+            "address_components": result.get("address_components")
+        }
+
+
+class StaticGeocodingProvider(GeocodingProvider):
+    """Fixed address -> result table, for local development and tests"""
+
+    name = "static"
+
+    def __init__(self, results: Dict[str, Dict[str, Any]]):
+        self._results = {normalize_address(address): result for address, result in results.items()}
+
+    async def geocode(self, session: aiohttp.ClientSession, address: str) -> Optional[Dict[str, Any]]:
+        return self._results.get(normalize_address(address))
+
+
+class GeocodingService:
+    """
+    Geocodes through one keep-alive aiohttp session per worker. Results are
+    cached by normalized address in an LRU with a TTL ("not found" for a
+    shorter TTL), optionally backed by the geocode_cache table, and
+    concurrent lookups of the same address share a single provider call.
+    Intended for use from the event loop only.
+    """
+
+    def __init__(
+        self,
+        provider: Optional[GeocodingProvider] = None,
+        cache_size: int = settings.geocode_cache_max_entries,
+        ttl: float = settings.geocode_cache_ttl_seconds,
+        negative_ttl: float = settings.geocode_negative_cache_ttl_seconds,
+        persistent: bool = settings.geocode_persistent_cache,
+    ):
+        self._provider = provider or GoogleGeocodingProvider()
+        self._cache = TTLCache(maxsize=cache_size, ttl=ttl)
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._persistent = persistent
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats = {
+            "hits": 0,
+            "persistent_hits": 0,
+            "coalesced": 0,
+            "lookups": 0,
+            "errors": 0,
+        }
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=settings.geocode_request_timeout),
+                connector=aiohttp.TCPConnector(limit=settings.geocode_max_connections, ttl_dns_cache=300),
+            )
+        return self._session
+
+    async def _load_persistent(self, key: str) -> Optional[Dict[str, Any]]:
+        fresh_after = datetime.now(timezone.utc) - timedelta(seconds=self._ttl)
+        result = await supabase_admin.table("geocode_cache").select("result").eq(
+            "address_key", key
+        ).gte("updated_at", fresh_after.isoformat()).limit(1).execute()
+        return result.data[0]["result"] if result.data else None
+
+    async def _store_persistent(self, key: str, location: Dict[str, Any]) -> None:
+        await supabase_admin.table("geocode_cache").upsert({
+            "address_key": key,
+            "provider": self._provider.name,
+            "result": location,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }).execute()
+
+    async def _resolve(self, key: str, address: str) -> Optional[Dict[str, Any]]:
+        if self._persistent:
+            try:
+                location = await self._load_persistent(key)
+                if location is not None:
+                    self._stats["persistent_hits"] += 1
+                    self._cache.set(key, location)
+                    return location
+            except Exception as e:
+                print(f"Geocode cache read failed: {e}")
+
+        self._stats["lookups"] += 1
+        location = await self._provider.geocode(self._get_session(), address)
+        if location is None:
+            self._cache.set(key, None, ttl=self._negative_ttl)
+            return None
+
+        self._cache.set(key, location)
+        if self._persistent:
+            try:
+                await self._store_persistent(key, location)
+            except Exception as e:
+                print(f"Geocode cache write failed: {e}")
+        return location
+
+    async def geocode(self, address: str) -> Optional[Dict[str, Any]]:
+        """Coordinates and formatted address for `address`, or None"""
+        key = normalize_address(address)
+        if not key:
+            return None
+
+        if key in self._cache:
+            self._stats["hits"] += 1
+            location = self._cache.get(key)
+            return dict(location) if location is not None else None
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._resolve(key, address))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self._stats["coalesced"] += 1
+
+        try:
+            # Shielded so one caller disconnecting doesn't cancel the others
+            location = await asyncio.shield(task)
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"Geocoding error: {e}")
+            return None
+        return dict(location) if location is not None else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self._provider.name,
+            "cached": len(self._cache),
+            "in_flight": len(self._inflight),
+            "persistent": self._persistent,
+            **self._stats,
+        }
+
+    async def aclose(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+geocoder = GeocodingService()
+
 
 async def geocode_address(address: str) -> Optional[Dict[str, Any]]:
     """
-    Geocode an address using Google Geocoding API
+    Geocode an address (cached; see GeocodingService)
     """
-    api_key = os.getenv("GOOGLE_MAPS_API_KEY")
-    if not api_key:
-        return None
-    
-    url = "https://maps.googleapis.com/maps/api/geocode/json"
-    params = {
-        "address": address,
-        "key": api_key
-    }
-    
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    if data["status"] == "OK" and data["results"]:
-                        result = data["results"][0]
-                        location = result["geometry"]["location"]
-                        
-                        return {
-                            "latitude": location["lat"],
-                            "longitude": location["lng"],
-                            "formatted_address": result["formatted_address"],
-                            "place_id": result.get("place_id"),
-                            "address_components": result.get("address_components")
-                        }
-                return None
-    except Exception as e:
-        print(f"Geocoding error: {e}")
-        return None
\ No newline at end of file
+    return await geocoder.geocode(address)
@@ -4,115 +4,285 @@ Image processing utilities for file uploads
 """
 from PIL import Image
 import io
-from typing import Tuple, Dict, Any
+import time
+from typing import Tuple, Dict, Any, Optional
+from app.utils.image_variants import IMAGE_VARIANT_WIDTHS
+
+def _to_rgb(img: Image.Image) -> Image.Image:
+    """Flatten transparency onto white and convert to RGB for JPEG output"""
+    if img.mode in ['RGBA', 'LA', 'P']:
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])  # Use alpha channel as mask
+        return background
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def _fit_within(img: Image.Image, max_dimension: int) -> Image.Image:
+    """Downscale so neither side exceeds max_dimension"""
+    scale = max(img.size) / max_dimension
+    if scale <= 1:
+        return img
+    
+    # Cheap integer box reduction first, then a LANCZOS pass on the smaller image
+    factor = int(scale)
+    if factor >= 2:
+        img = img.reduce(factor)
+    if max(img.size) > max_dimension:
+        img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    return img
+
+
+def _encode_jpeg(img: Image.Image, quality: int) -> bytes:
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def _search_quality(img: Image.Image, max_size_bytes: int, low: int, high: int) -> Tuple[bytes, int, int]:
+    """
+    Highest JPEG quality in [low, high] whose encode fits max_size_bytes
+    
+    Returns (data, quality, encodes); if nothing fits, the encode at low.
+    """
+    # Fast path: the highest quality already fits
+    encodes = 1
+    data = _encode_jpeg(img, high)
+    if len(data) <= max_size_bytes or high <= low:
+        return data, high, encodes
+    
+    best = None
+    smallest = (data, high)
+    while low <= high - 1:
+        mid = (low + high - 1) // 2
+        encodes += 1
+        candidate = _encode_jpeg(img, mid)
+        if len(candidate) <= max_size_bytes:
+            best = (candidate, mid)
+            low = mid + 1
+        else:
+            smallest = (candidate, mid)
+            high = mid
+    
+    data, quality = best or smallest
+    return data, quality, encodes
+
+
+def _shrunk_dimension(img: Image.Image, encoded_size: int, max_size_bytes: int) -> int:
+    """Longest side expected to fit: JPEG size scales roughly with pixel count"""
+    ratio = (max_size_bytes / encoded_size) ** 0.5
+    return max(1, int(max(img.size) * min(ratio, 0.9)))
+
+
+def _decode(image_data: bytes, max_dimension: int) -> Tuple[Image.Image, Tuple[int, int]]:
+    """
+    Open an image, letting the JPEG decoder skip detail beyond max_dimension;
+    returns it with its full-size dimensions
+    """
+    img = Image.open(io.BytesIO(image_data))
+    original_dimensions = img.size
+    # 1/2, 1/4 or 1/8 scale, never below max_dimension
+    if img.format == 'JPEG':
+        img.draft('RGB', (max_dimension, max_dimension))
+    return img, original_dimensions
+
+
+def _compress_decoded(
+    img: Image.Image,
+    original_size: int,
+    original_format: Optional[str],
+    original_dimensions: Tuple[int, int],
+    max_size_bytes: int,
+    quality: int,
+    max_dimension: int,
+    min_quality: int,
+    cpu_start: float
+) -> Tuple[bytes, Dict[str, Any]]:
+    """compress_image on an already decoded RGB image (which it may downscale in place)"""
+    img = _fit_within(img, max_dimension)
+    
+    compressed_data, quality_used, attempts = _search_quality(img, max_size_bytes, min_quality, quality)
+    
+    if len(compressed_data) > max_size_bytes:
+        # Too large even at min_quality: pick the smaller dimension once
+        # from the overshoot and search quality again at that size
+        img = _fit_within(img, _shrunk_dimension(img, len(compressed_data), max_size_bytes))
+        compressed_data, quality_used, encodes = _search_quality(img, max_size_bytes, min_quality, quality)
+        attempts += encodes
+        
+        # Rarely still over budget; keep min_quality and only shrink
+        for _ in range(3):
+            if len(compressed_data) <= max_size_bytes:
+                break
+            img = _fit_within(img, _shrunk_dimension(img, len(compressed_data), max_size_bytes))
+            compressed_data, quality_used = _encode_jpeg(img, min_quality), min_quality
+            attempts += 1
+    
+    compression_info = {
+        "original_size": original_size,
+        "compressed_size": len(compressed_data),
+        "original_dimensions": original_dimensions,
+        "final_dimensions": img.size,  # of the image actually encoded
+        "original_format": original_format,
+        "final_format": "JPEG",
+        "quality_used": quality_used,
+        "compression_ratio": (1 - len(compressed_data)/original_size) * 100 if original_size > 0 else 0,
+        "attempts": attempts,
+        "cpu_time_ms": round((time.process_time() - cpu_start) * 1000, 1)
+    }
+    if len(compressed_data) > max_size_bytes:
+        compression_info["warning"] = "Could not compress to target size"
+    return compressed_data, compression_info
+
+
+def _compression_failed(image_data: bytes, error: Exception, cpu_start: float) -> Dict[str, Any]:
+    return {
+        "original_size": len(image_data),
+        "compressed_size": len(image_data),
+        "error": str(error),
+        "compression_ratio": 0,
+        "cpu_time_ms": round((time.process_time() - cpu_start) * 1000, 1)
+    }
+
 
 def compress_image(
     image_data: bytes, 
     max_size_bytes: int = 1024*1024, 
     quality: int = 85,
-    max_dimension: int = 1920
+    max_dimension: int = 1920,
+    min_quality: int = 40
 ) -> Tuple[bytes, Dict[str, Any]]:
     """
     Compress an image to fit within size limits
     
+    The image is decoded once (JPEGs are decoded at reduced scale with
+    Image.draft), downscaled with reduce + LANCZOS, and the JPEG quality is
+    found with a binary search over in-memory encodes. Only if even
+    min_quality is too large is the image shrunk, to a dimension estimated
+    once from the overshoot, and the quality searched once more there.
+    
+    CPU-bound: call through app.utils.image_worker from async code.
+    
     Args:
         image_data: Original image bytes
         max_size_bytes: Maximum size in bytes (default 1MB)
-        quality: JPEG quality (1-100, default 85)
+        quality: Highest JPEG quality to use (1-100, default 85)
         max_dimension: Maximum width/height in pixels
+        min_quality: Lowest JPEG quality the search may pick
     
     Returns:
         Tuple of (compressed_image_bytes, compression_info)
     """
+    cpu_start = time.process_time()
     try:
-        # Get original info
-        original_size = len(image_data)
-        img = Image.open(io.BytesIO(image_data))
-        original_dimensions = img.size
-        original_format = img.format
-        
-        # Convert to RGB if necessary (for JPEG compatibility)
-        if img.mode in ['RGBA', 'P']:
-            # Create white background for transparent images
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'RGBA':
-                background.paste(img, mask=img.split()[-1])  # Use alpha channel as mask
-            else:
-                background.paste(img)
-            img = background
+        img, original_dimensions = _decode(image_data, max_dimension)
+        return _compress_decoded(
+            _to_rgb(img), len(image_data), img.format, original_dimensions,
+            max_size_bytes, quality, max_dimension, min_quality, cpu_start
+        )
+    except Exception as e:
+        # Return original data if compression fails
+        return image_data, _compression_failed(image_data, e, cpu_start)
+
+
+def _encode_variants(img: Image.Image, widths: Tuple[int, ...], quality: int) -> Dict[str, bytes]:
+    """WebP and JPEG encodes of a decoded RGB image at each width (img is not modified)"""
+    variants = {}
+    for width in sorted(widths, reverse=True):
+        if img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=2.0)
         
-        # Progressive resize and compression
-        current_quality = quality
-        current_max_dimension = max_dimension
-        attempts = 0
-        max_attempts = 10
+        webp_output = io.BytesIO()
+        img.save(webp_output, format='WEBP', quality=quality, method=4)
+        variants[f"{width}.webp"] = webp_output.getvalue()
         
-        while current_quality > 20 and attempts < max_attempts:
-            attempts += 1
-            
-            # Resize if needed
-            if img.width > current_max_dimension or img.height > current_max_dimension:
-                img.thumbnail((current_max_dimension, current_max_dimension), Image.Resampling.LANCZOS)
-            
-            # Compress to JPEG
-            output = io.BytesIO()
-            img.save(output, format='JPEG', quality=current_quality, optimize=True)
-            compressed_data = output.getvalue()
-            
-            # Check if it fits
-            if len(compressed_data) <= max_size_bytes:
-                compression_info = {
-                    "original_size": original_size,
-                    "compressed_size": len(compressed_data),
-                    "original_dimensions": original_dimensions,
-                    "final_dimensions": img.size,
-                    "original_format": original_format,
-                    "final_format": "JPEG",
-                    "quality_used": current_quality,
-                    "compression_ratio": (1 - len(compressed_data)/original_size) * 100 if original_size > 0 else 0,
-                    "attempts": attempts
-                }
-                return compressed_data, compression_info
-            
-            # If still too large, reduce quality and/or size
-            current_quality -= 10
-            current_max_dimension = int(current_max_dimension * 0.8)  # Reduce dimensions by 20%
-            
-            # Reload image for next iteration if we changed dimensions significantly
-            if current_max_dimension < max_dimension * 0.7:
-                img = Image.open(io.BytesIO(image_data))
-                if img.mode in ['RGBA', 'P']:
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'RGBA':
-                        background.paste(img, mask=img.split()[-1])
-                    else:
-                        background.paste(img)
-                    img = background
-        
-        # If we get here, return the last attempt even if it's still too large
-        compression_info = {
-            "original_size": original_size,
-            "compressed_size": len(compressed_data),
-            "original_dimensions": original_dimensions,
-            "final_dimensions": img.size,
-            "original_format": original_format,
-            "final_format": "JPEG",
-            "quality_used": current_quality,
-            "compression_ratio": (1 - len(compressed_data)/original_size) * 100 if original_size > 0 else 0,
-            "attempts": attempts,
-            "warning": "Could not compress to target size"
-        }
-        return compressed_data, compression_info
+        jpeg_output = io.BytesIO()
+        img.save(jpeg_output, format='JPEG', quality=quality, optimize=True, progressive=True)
+        variants[f"{width}.jpg"] = jpeg_output.getvalue()
+    
+    return variants
+
+
+def create_image_variants(
+    image_data: bytes,
+    widths: Tuple[int, ...] = IMAGE_VARIANT_WIDTHS,
+    quality: int = 80
+) -> Dict[str, bytes]:
+    """
+    Create resized WebP and JPEG variants of an image from a single decode
+    
+    Widths are produced largest first, each resized from the previous one.
+    Images narrower than a width are not upscaled, so every variant key
+    always exists.
+    
+    Args:
+        image_data: Original image bytes
+        widths: Target widths in pixels
+        quality: Encoder quality for both formats
         
+    Returns:
+        Dictionary of "{width}.{webp|jpg}" -> encoded bytes
+    """
+    img, _ = _decode(image_data, max(widths))
+    return _encode_variants(_to_rgb(img), widths, quality)
+
+
+def process_product_image(
+    image_data: bytes,
+    compress: bool,
+    max_size_bytes: int = 1024*1024,
+    quality: int = 85,
+    max_dimension: int = 1920,
+    min_quality: int = 40,
+    widths: Tuple[int, ...] = IMAGE_VARIANT_WIDTHS,
+    variant_quality: int = 80
+) -> Tuple[bytes, Dict[str, Any], Dict[str, bytes]]:
+    """
+    The stored original and all responsive variants of an upload, from one decode
+    
+    Variants are encoded first (as create_image_variants does), then the
+    same decoded image is compressed as compress_image does when `compress`
+    is set; otherwise the uploaded bytes are kept. If decoding fails the
+    upload is kept without variants.
+    
+    CPU-bound: call through app.utils.image_worker from async code.
+    
+    Returns:
+        Tuple of (original_bytes, compression_info, variants)
+    """
+    cpu_start = time.process_time()
+    try:
+        img, original_dimensions = _decode(image_data, max(max_dimension, *widths))
+        original_format = img.format
+        rgb = _to_rgb(img)
     except Exception as e:
-        # Return original data if compression fails
-        error_info = {
+        return image_data, _compression_failed(image_data, e, cpu_start), {}
+    
+    try:
+        variants = _encode_variants(rgb, widths, variant_quality)
+    except Exception as e:
+        print(f"Variant generation failed, storing original only: {e}")
+        variants = {}
+    
+    if not compress:
+        return image_data, {
             "original_size": len(image_data),
             "compressed_size": len(image_data),
-            "error": str(e),
-            "compression_ratio": 0
-        }
-        return image_data, error_info
+            "compression_ratio": 0,
+            "message": "No compression needed"
+        }, variants
+    
+    try:
+        file_content, compression_info = _compress_decoded(
+            rgb, len(image_data), original_format, original_dimensions,
+            max_size_bytes, quality, max_dimension, min_quality, cpu_start
+        )
+    except Exception as e:
+        return image_data, _compression_failed(image_data, e, cpu_start), variants
+    return file_content, compression_info, variants
 
 def get_image_info(image_data: bytes) -> Dict[str, Any]:
     """
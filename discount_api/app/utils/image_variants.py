@@ -0,0 +1,45 @@
+# app/utils/image_variants.py
+"""
+Storage layout and URLs for responsive product image variants
+"""
+from typing import Any, Dict, Optional
+
+# Widths (px) generated for every uploaded product image, and their formats
+IMAGE_VARIANT_WIDTHS = (160, 480, 960, 1920)
+IMAGE_VARIANT_FORMATS = {"webp": "image/webp", "jpg": "image/jpeg"}
+
+# Images uploaded with variants are stored as {base}/original{ext}, next to
+# their variants at {base}/{width}.{format}
+ORIGINAL_IMAGE_NAME = "original"
+
+
+def variant_filename(width: int, image_format: str) -> str:
+    return f"{width}.{image_format}"
+
+
+def image_variant_urls(image_url: Optional[str]) -> Optional[Dict[str, Dict[str, str]]]:
+    """
+    Return {width: {format: url}} for an image uploaded with variants,
+    or None for images stored before variants existed (or hosted elsewhere)
+    """
+    if not image_url or "/product-images/" not in image_url:
+        return None
+    
+    base, _, filename = image_url.rpartition("/")
+    if filename.rsplit(".", 1)[0] != ORIGINAL_IMAGE_NAME:
+        return None
+    
+    return {
+        str(width): {
+            image_format: f"{base}/{variant_filename(width, image_format)}"
+            for image_format in IMAGE_VARIANT_FORMATS
+        }
+        for width in IMAGE_VARIANT_WIDTHS
+    }
+
+
+def add_image_variants(product: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Attach `image_variants` to a product row (in place) and return it"""
+    if product is not None:
+        product["image_variants"] = image_variant_urls(product.get("image_url"))
+    return product
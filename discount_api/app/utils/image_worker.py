@@ -0,0 +1,99 @@
+# app/utils/image_worker.py
+"""
+Process pool for CPU-bound image work (validation, compression)
+"""
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+_executor: Optional[ProcessPoolExecutor] = None
+_slots: Optional[asyncio.Semaphore] = None
+
+# Counters exposed via /health/detailed
+_metrics: Dict[str, Any] = {
+    "queued": 0,
+    "running": 0,
+    "completed": 0,
+    "failed": 0,
+    "total_cpu_time_ms": 0.0,
+    "last_cpu_time_ms": None,
+    "total_wall_time_ms": 0.0,
+}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor, _slots
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.image_worker_processes)
+        # Bound in-flight work to the pool size; extra uploads wait here
+        # (counted as queue depth) instead of piling up inside the pool
+        _slots = asyncio.Semaphore(settings.image_worker_processes)
+    return _executor
+
+
+def _timed_call(func: Callable, args: tuple, kwargs: dict):
+    """Runs in the worker process; returns the result and CPU time used"""
+    cpu_start = time.process_time()
+    result = func(*args, **kwargs)
+    return result, (time.process_time() - cpu_start) * 1000
+
+
+async def run_image_task(func: Callable, *args, **kwargs):
+    """
+    Run a picklable image function (e.g. compress_image) in the worker pool
+    without blocking the event loop.
+    """
+    executor = _get_executor()
+    loop = asyncio.get_running_loop()
+
+    wall_start = time.perf_counter()
+    _metrics["queued"] += 1
+    try:
+        await _slots.acquire()
+    finally:
+        _metrics["queued"] -= 1
+
+    _metrics["running"] += 1
+    try:
+        result, cpu_time_ms = await loop.run_in_executor(
+            executor, _timed_call, func, args, kwargs
+        )
+    except BaseException:
+        _metrics["failed"] += 1
+        raise
+    finally:
+        _metrics["running"] -= 1
+        _slots.release()
+
+    _metrics["completed"] += 1
+    _metrics["total_cpu_time_ms"] += cpu_time_ms
+    _metrics["last_cpu_time_ms"] = round(cpu_time_ms, 1)
+    _metrics["total_wall_time_ms"] += (time.perf_counter() - wall_start) * 1000
+    return result
+
+
+def get_image_worker_metrics() -> Dict[str, Any]:
+    """Queue depth, in-flight tasks and CPU time per task"""
+    completed = _metrics["completed"]
+    return {
+        "workers": settings.image_worker_processes,
+        "queue_depth": _metrics["queued"],
+        "running": _metrics["running"],
+        "completed": completed,
+        "failed": _metrics["failed"],
+        "last_cpu_time_ms": _metrics["last_cpu_time_ms"],
+        "avg_cpu_time_ms": round(_metrics["total_cpu_time_ms"] / completed, 1) if completed else None,
+        "avg_wall_time_ms": round(_metrics["total_wall_time_ms"] / completed, 1) if completed else None,
+    }
+
+
+def shutdown_image_workers() -> None:
+    """Stop the worker processes (called on application shutdown)"""
+    global _executor, _slots
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _slots = None
@@ -0,0 +1,171 @@
+# app/utils/nearby_index.py
+"""
+In-memory grid of live offers by business location for nearby search
+"""
+import heapq
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.offer_index import OfferIndexBase, parse_timestamp
+
+NEARBY_INDEX_COLUMNS = (
+    "*, businesses!inner(business_name, business_address, formatted_address, avatar_url, "
+    "is_verified, category_id, latitude, longitude)"
+)
+
+# Grid cell size; 0.05 degrees is ~5.5 km north-south
+CELL_DEGREES = 0.05
+LNG_CELLS = int(round(360 / CELL_DEGREES))
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def _cell(latitude: float, longitude: float) -> Tuple[int, int]:
+    return (
+        math.floor((latitude + 90) / CELL_DEGREES),
+        math.floor((longitude + 180) / CELL_DEGREES) % LNG_CELLS,
+    )
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points given in radians"""
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class NearbyOfferIndex(OfferIndexBase):
+    """
+    Live offers bucketed into a fixed lat/lng grid by their business's
+    location. A nearby query visits only the cells overlapping the search
+    radius' bounding box, then applies the active window, category and exact
+    distance to those candidates. Results have the same shape as the
+    nearby_offers() RPC.
+    """
+
+    columns = NEARBY_INDEX_COLUMNS
+    name = "Nearby offer index"
+
+    def __init__(
+        self,
+        refresh_interval: float = settings.nearby_index_refresh_seconds,
+        rebuild_interval: float = settings.nearby_index_rebuild_seconds,
+    ):
+        super().__init__(refresh_interval, rebuild_interval)
+
+    def _clear(self) -> None:
+        # offer id -> grid cell
+        self._offer_cells: Dict[str, Tuple[int, int]] = {}
+        # grid cell -> offer id -> (lat rad, lng rad, start, expiry, business category, record)
+        self._cells: Dict[Tuple[int, int], Dict[str, tuple]] = {}
+
+    def _remove(self, offer_id: str) -> None:
+        cell = self._offer_cells.pop(offer_id, None)
+        if cell is None:
+            return
+        entries = self._cells[cell]
+        del entries[offer_id]
+        if not entries:
+            del self._cells[cell]
+
+    def _upsert(self, row: Dict[str, Any]) -> None:
+        offer_id = str(row["id"])
+        self._remove(offer_id)
+
+        business = row.get("businesses") or {}
+        latitude, longitude = business.get("latitude"), business.get("longitude")
+        if not row.get("is_active") or latitude is None or longitude is None:
+            return
+        latitude, longitude = float(latitude), float(longitude)
+
+        record = {key: value for key, value in row.items() if key != "businesses"}
+        record.update({
+            "business_name": business.get("business_name"),
+            "business_address": business.get("formatted_address") or business.get("business_address"),
+            "business_avatar_url": business.get("avatar_url"),
+            "is_verified": business.get("is_verified"),
+            "business_category_id": business.get("category_id"),
+            "latitude": latitude,
+            "longitude": longitude,
+        })
+
+        cell = _cell(latitude, longitude)
+        self._cells.setdefault(cell, {})[offer_id] = (
+            math.radians(latitude),
+            math.radians(longitude),
+            parse_timestamp(row.get("start_date")),
+            parse_timestamp(row.get("expiry_date")),
+            business.get("category_id"),
+            record,
+        )
+        self._offer_cells[offer_id] = cell
+
+    def _cells_within(self, latitude: float, longitude: float, radius_km: float):
+        lat_span = radius_km / KM_PER_DEGREE
+        cos_lat = math.cos(math.radians(min(89.9, abs(latitude) + lat_span)))
+        lng_span = lat_span / cos_lat if cos_lat > 0 else 360
+
+        if lng_span >= 180:
+            # Polar or very wide search; every longitude is in range
+            lng_cells = range(LNG_CELLS)
+        else:
+            west = math.floor((longitude - lng_span + 180) / CELL_DEGREES)
+            east = math.floor((longitude + lng_span + 180) / CELL_DEGREES)
+            lng_cells = [j % LNG_CELLS for j in range(west, east + 1)]
+
+        south = math.floor((max(-90.0, latitude - lat_span) + 90) / CELL_DEGREES)
+        north = math.floor((min(90.0, latitude + lat_span) + 90) / CELL_DEGREES)
+        for i in range(south, north + 1):
+            for j in lng_cells:
+                entries = self._cells.get((i, j))
+                if entries:
+                    yield entries
+
+    def nearby(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: int = 20,
+        category_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Active offers within radius_km, nearest first, with distance_km"""
+        started = time.perf_counter()
+        now = time.time()
+        lat, lng = math.radians(latitude), math.radians(longitude)
+
+        candidates = []
+        for entries in self._cells_within(latitude, longitude, radius_km):
+            for offer_id, (offer_lat, offer_lng, start, expiry, business_category, record) in entries.items():
+                if not (start <= now <= expiry):
+                    continue
+                if category_id is not None and business_category != category_id:
+                    continue
+                distance = haversine_km(lat, lng, offer_lat, offer_lng)
+                if distance <= radius_km:
+                    candidates.append((distance, offer_id, record))
+
+        offers = []
+        for distance, _, record in heapq.nsmallest(limit, candidates, key=lambda c: (c[0], c[1])):
+            offers.append({**record, "distance_km": distance})
+
+        self._stats["searches"] += 1
+        self._stats["last_search_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return offers
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.nearby_index_enabled,
+            "ready": self._ready,
+            "offers": len(self._offer_cells),
+            "cells": len(self._cells),
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+            **self._stats,
+        }
+
+
+nearby_offer_index = NearbyOfferIndex()
@@ -0,0 +1,141 @@
+# app/utils/offer_display.py
+"""
+Display fields derived from an offer, computed once when it is saved
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.utils.cache import TTLCache
+from app.utils.offer_calculations import OfferCalculator
+
+# Stored on offers (migrations/013_offer_display_fields.sql); they depend
+# only on the offer's own columns
+DISPLAY_FIELDS = ("display_text", "terms_text", "discount_text", "savings_amount")
+
+# Rows saved before the columns existed are computed on read, once per
+# (offer id, updated_at)
+_display_cache = TTLCache(maxsize=20000, ttl=3600)
+_examples_cache = TTLCache(maxsize=5000, ttl=3600)
+
+
+def offer_terms_text(offer_data: Dict[str, Any]) -> Optional[str]:
+    """Type-specific purchase conditions ("Minimum purchase of $20.00 required")"""
+    discount_type = offer_data.get('discount_type')
+
+    if discount_type == 'minimum_purchase':
+        min_purchase = offer_data.get('minimum_purchase_amount') or 0
+        return f"Minimum purchase of ${float(min_purchase):.2f} required"
+    if discount_type == 'quantity_discount':
+        return f"Must purchase {offer_data.get('minimum_quantity') or 0} or more items"
+    if discount_type == 'bogo':
+        return f"Must purchase at least {offer_data.get('buy_quantity') or 1} items to qualify"
+    return None
+
+
+def compute_display_fields(offer_data: Dict[str, Any]) -> Dict[str, Any]:
+    """DISPLAY_FIELDS for an offer; business routes store them on create/update"""
+    discount_value = offer_data.get('discount_value') or 0
+    if offer_data.get('discount_type') == 'percentage':
+        savings = (offer_data.get('original_price') or 0) * discount_value / 100
+        savings_amount = round(savings, 2)
+        discount_text = f"{discount_value}% off"
+    else:
+        savings_amount = discount_value
+        discount_text = f"${discount_value} off"
+
+    return {
+        "display_text": OfferCalculator.get_offer_display_text(offer_data),
+        "terms_text": offer_terms_text(offer_data),
+        "discount_text": discount_text,
+        "savings_amount": savings_amount
+    }
+
+
+def display_fields(offer_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Stored display fields, or computed (and memoized) for older rows"""
+    if offer_data.get('display_text') is not None:
+        return {field: offer_data.get(field) for field in DISPLAY_FIELDS}
+
+    key = (offer_data.get('id'), offer_data.get('updated_at'))
+    fields = _display_cache.get(key) if key[0] else None
+    if fields is None:
+        fields = compute_display_fields(offer_data)
+        if key[0]:
+            _display_cache.set(key, fields)
+    return fields
+
+
+def offer_conditions_text(offer_data: Dict[str, Any], now: Optional[datetime] = None) -> Optional[str]:
+    """Stored terms plus the parts that change over time (claims left, expiry)"""
+    conditions = []
+    terms_text = display_fields(offer_data)["terms_text"]
+    if terms_text:
+        conditions.append(terms_text)
+
+    max_claims = offer_data.get('max_claims')
+    if max_claims:
+        remaining = max_claims - (offer_data.get('current_claims') or 0)
+        if remaining > 0:
+            conditions.append(f"Limited offer - {remaining} claims remaining")
+        else:
+            conditions.append("Offer no longer available")
+
+    expiry_date = offer_data.get('expiry_date')
+    if expiry_date:
+        if isinstance(expiry_date, str):
+            expiry_date = datetime.fromisoformat(expiry_date.replace('Z', '+00:00'))
+        if expiry_date.tzinfo is None:
+            expiry_date = expiry_date.replace(tzinfo=timezone.utc)
+
+        now = now or datetime.now(timezone.utc)
+        if expiry_date > now:
+            days_remaining = (expiry_date - now).days
+            if days_remaining == 0:
+                conditions.append("Expires today")
+            elif days_remaining == 1:
+                conditions.append("Expires tomorrow")
+            else:
+                conditions.append(f"Expires in {days_remaining} days")
+        else:
+            conditions.append("Expired")
+
+    return " • ".join(conditions) if conditions else None
+
+
+def calculation_examples(offer_data: Dict[str, Any], item_price: float) -> List[Dict[str, Any]]:
+    """
+    OfferCalculator results for three example quantities, memoized by
+    (offer id, updated_at, item price)
+    """
+    key = (offer_data.get('id'), offer_data.get('updated_at'), item_price)
+    if key[0]:
+        cached = _examples_cache.get(key)
+        if cached is not None:
+            return cached
+
+    discount_type = offer_data.get('discount_type')
+    if discount_type == 'quantity_discount':
+        min_qty = offer_data.get('minimum_quantity') or 1
+        quantities = [min_qty - 1, min_qty, min_qty + 2] if min_qty > 1 else [1, 3, 5]
+    elif discount_type == 'bogo':
+        buy_qty = offer_data.get('buy_quantity') or 1
+        quantities = [buy_qty - 1, buy_qty, buy_qty * 2] if buy_qty > 1 else [1, 2, 4]
+    else:
+        quantities = [1, 2, 5]
+
+    examples = []
+    for qty in quantities:
+        if qty > 0:
+            examples.append({
+                'quantity': qty,
+                'calculation': OfferCalculator.calculate_discount(
+                    offer_data=offer_data,
+                    quantity=qty,
+                    cart_total=item_price * qty,  # Simple cart total for examples
+                    item_price=item_price
+                )
+            })
+
+    if key[0]:
+        _examples_cache.set(key, examples)
+    return examples
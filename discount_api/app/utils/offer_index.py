@@ -0,0 +1,552 @@
+# app/utils/offer_index.py
+"""
+In-memory inverted index over live offers for /customer/offers/search
+"""
+import asyncio
+import heapq
+import re
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.database import supabase_admin
+
+# Same shape as the PostgREST search query, plus the business category used
+# by the category filter
+OFFER_INDEX_COLUMNS = (
+    "*, products!product_id(*, categories(*)), "
+    "businesses!inner(business_name, is_verified, avatar_url, category_id)"
+)
+OFFER_INDEX_PAGE_SIZE = 1000
+
+# Re-read this much before the watermark so rows committed slightly out of
+# updated_at order are not missed
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+# Term weight per field, summed into the relevance score
+FIELD_WEIGHTS = (("title", 4), ("business", 3), ("category", 2), ("description", 1))
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _fold(text: str) -> str:
+    text = text.lower()
+    if text.isascii():
+        return text
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text: Any) -> List[str]:
+    """Lowercase, accent-folded word tokens"""
+    if not text:
+        return []
+    return _TOKEN_RE.findall(_fold(str(text)))
+
+
+def parse_timestamp(value: Any) -> float:
+    if not value:
+        return 0.0
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _bit_positions(bits: int) -> List[int]:
+    digits = bin(bits)[:1:-1]
+    positions = []
+    i = digits.find("1")
+    while i != -1:
+        positions.append(i)
+        i = digits.find("1", i + 1)
+    return positions
+
+
+def highlight_text(text: Optional[str], prefixes: List[str]) -> Optional[str]:
+    """Wrap words starting with any query term in <mark></mark>"""
+    if not text or not prefixes:
+        return text
+
+    prefixes = tuple(prefixes)
+
+    def mark(match):
+        word = match.group(0)
+        if _fold(word).startswith(prefixes):
+            return f"<mark>{word}</mark>"
+        return word
+
+    return _TOKEN_RE.sub(mark, text)
+
+
+class OfferIndexBase(ABC):
+    """
+    Shared loading for in-memory offer indexes: built from `offers` on start,
+    refreshed from rows whose updated_at is past the watermark, and rebuilt
+    periodically to drop deleted and expired rows. Subclasses define the
+    columns to load and implement _clear/_upsert/_remove. Intended for use
+    from the event loop only.
+    """
+
+    columns = "*"
+    name = "Offer index"
+
+    def __init__(self, refresh_interval: float, rebuild_interval: float):
+        self._refresh_interval = refresh_interval
+        self._rebuild_interval = rebuild_interval
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._ready = False
+        self._watermark: Optional[datetime] = None
+        self._last_rebuild = 0.0
+        self._rebuild_requested = False
+        self._stats = {
+            "rebuilds": 0,
+            "refreshes": 0,
+            "failed_refreshes": 0,
+            "searches": 0,
+            "last_search_ms": None,
+        }
+        self._clear()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    @abstractmethod
+    def _clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def _upsert(self, row: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def _remove(self, offer_id: str) -> None:
+        ...
+
+    def remove_offer(self, offer_id: str) -> None:
+        """Drop a deleted offer now instead of at the next rebuild"""
+        self._remove(str(offer_id))
+
+    def request_refresh(self) -> None:
+        """Run the next incremental refresh now (e.g. after an offer is saved)"""
+        self._wakeup.set()
+
+    def request_rebuild(self) -> None:
+        """Reload everything now (e.g. after a business moves)"""
+        self._rebuild_requested = True
+        self._wakeup.set()
+
+    def _advance_watermark(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            if row.get("updated_at"):
+                updated_at = datetime.fromtimestamp(parse_timestamp(row["updated_at"]), tz=timezone.utc)
+                if self._watermark is None or updated_at > self._watermark:
+                    self._watermark = updated_at
+
+    async def _fetch(self, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        # Keyset pages on id: each page is an index range scan, and rows
+        # changing while we page can't shift later pages the way offsets do
+        rows: List[Dict[str, Any]] = []
+        last_id = None
+        while True:
+            query = supabase_admin.table("offers").select(self.columns)
+            if since is None:
+                query = query.eq("is_active", True).gte("expiry_date", datetime.utcnow().isoformat())
+            else:
+                # Include deactivated rows so they are dropped from the index
+                query = query.gte("updated_at", (since - WATERMARK_OVERLAP).isoformat())
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            result = await query.order("id").limit(OFFER_INDEX_PAGE_SIZE).execute()
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < OFFER_INDEX_PAGE_SIZE:
+                return rows
+            last_id = page[-1]["id"]
+
+    async def rebuild(self) -> None:
+        """Reload every live offer; the swap happens without awaiting"""
+        self._rebuild_requested = False
+        rows = await self._fetch()
+        self._clear()
+        self._watermark = None
+        for row in rows:
+            self._upsert(row)
+        self._advance_watermark(rows)
+        self._last_rebuild = time.monotonic()
+        self._ready = True
+        self._stats["rebuilds"] += 1
+
+    async def refresh(self) -> None:
+        """Apply offers changed since the watermark"""
+        if self._watermark is None:
+            await self.rebuild()
+            return
+        rows = await self._fetch(since=self._watermark)
+        for row in rows:
+            self._upsert(row)
+        self._advance_watermark(rows)
+        self._stats["refreshes"] += 1
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if (
+                    not self._ready
+                    or self._rebuild_requested
+                    or time.monotonic() - self._last_rebuild >= self._rebuild_interval
+                ):
+                    await self.rebuild()
+                else:
+                    await self.refresh()
+            except Exception as e:
+                self._stats["failed_refreshes"] += 1
+                print(f"{self.name} refresh failed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class OfferSearchIndex(OfferIndexBase):
+    """
+    Posting lists and filter sets are Python ints used as bitsets over
+    document slots, so filtering a query is a handful of ANDs. Relevance is
+    the sum, over query terms, of the weight of the best field the term
+    matched; it is computed per score tier with the same bit operations, and
+    only the slots on the requested page are materialized. Query terms match
+    as prefixes (search-as-you-type).
+    """
+
+    columns = OFFER_INDEX_COLUMNS
+    name = "Offer search index"
+
+    def __init__(
+        self,
+        refresh_interval: float = settings.offer_search_index_refresh_seconds,
+        rebuild_interval: float = settings.offer_search_index_rebuild_seconds,
+    ):
+        super().__init__(refresh_interval, rebuild_interval)
+
+    def _clear(self) -> None:
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._docs: List[Optional[Dict[str, Any]]] = []
+        self._doc_terms: List[Optional[List[Tuple[str, str]]]] = []
+        self._doc_keys: List[Optional[List[Tuple[str, str]]]] = []
+        # (start, expiry, discount_value, created_at) per slot
+        self._doc_meta: List[Optional[Tuple[float, float, float, float]]] = []
+        # field -> token -> bitset
+        self._postings: Dict[str, Dict[str, int]] = {field: {} for field, _ in FIELD_WEIGHTS}
+        self._vocabulary: Optional[List[str]] = None
+        self._filters: Dict[str, Dict[str, int]] = {"discount_type": {}, "category": {}, "business": {}}
+        self._available = 0
+        self._active_bits = 0
+        self._active_until = 0.0
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        """Drop caches derived from the documents"""
+        # prefix -> (matching tokens, [(weight, bitset) per field], union bitset)
+        self._prefixes: Dict[str, Tuple[List[str], List[Tuple[int, int]], int]] = {}
+        # meta column -> (live slots in ascending order of that column, values)
+        self._orders: Dict[int, Tuple[List[int], List[float]]] = {}
+        self._active_until = 0.0
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def _remove(self, offer_id: str) -> None:
+        slot = self._slots.pop(offer_id, None)
+        if slot is None:
+            return
+
+        mask = ~(1 << slot)
+        for field, token in self._doc_terms[slot]:
+            postings = self._postings[field]
+            remaining = postings[token] & mask
+            if remaining:
+                postings[token] = remaining
+            else:
+                del postings[token]
+                self._vocabulary = None
+        for name, key in self._doc_keys[slot]:
+            remaining = self._filters[name][key] & mask
+            if remaining:
+                self._filters[name][key] = remaining
+            else:
+                del self._filters[name][key]
+        self._available &= mask
+
+        self._docs[slot] = self._doc_terms[slot] = self._doc_keys[slot] = self._doc_meta[slot] = None
+        self._free.append(slot)
+        self._invalidate()
+
+    def _upsert(self, row: Dict[str, Any]) -> None:
+        offer_id = str(row["id"])
+        self._remove(offer_id)
+        if not row.get("is_active"):
+            return
+
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self._docs)
+            for column in (self._docs, self._doc_terms, self._doc_keys, self._doc_meta):
+                column.append(None)
+        bit = 1 << slot
+
+        business = dict(row.get("businesses") or {})
+        business_category_id = business.pop("category_id", None)
+        product = row.get("products") or {}
+        category = product.get("categories") or {}
+        fields = {
+            "title": row.get("title"),
+            "business": business.get("business_name"),
+            "category": category.get("name"),
+            "description": row.get("description"),
+        }
+
+        terms = []
+        for field, _ in FIELD_WEIGHTS:
+            postings = self._postings[field]
+            for token in set(tokenize(fields[field])):
+                if token not in postings:
+                    self._vocabulary = None
+                postings[token] = postings.get(token, 0) | bit
+                terms.append((field, token))
+
+        keys = [("discount_type", str(row.get("discount_type"))), ("business", str(row.get("business_id")))]
+        for category_id in {product.get("category_id"), business_category_id}:
+            if category_id is not None:
+                keys.append(("category", str(category_id)))
+        for name, key in keys:
+            self._filters[name][key] = self._filters[name].get(key, 0) | bit
+
+        max_claims = row.get("max_claims")
+        if max_claims is None or (row.get("current_claims") or 0) < max_claims:
+            self._available |= bit
+
+        self._slots[offer_id] = slot
+        self._docs[slot] = {**row, "businesses": business}
+        self._doc_terms[slot] = terms
+        self._doc_keys[slot] = keys
+        self._doc_meta[slot] = (
+            parse_timestamp(row.get("start_date")),
+            parse_timestamp(row.get("expiry_date")),
+            float(row.get("discount_value") or 0),
+            parse_timestamp(row.get("created_at")),
+        )
+        self._invalidate()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _live(self, now: float) -> int:
+        """Offers inside their start/expiry window, cached until the next boundary"""
+        if now < self._active_until:
+            return self._active_bits
+
+        bits = 0
+        next_change = float("inf")
+        for slot, meta in enumerate(self._doc_meta):
+            if meta is None:
+                continue
+            start, expiry = meta[0], meta[1]
+            if start <= now <= expiry:
+                bits |= 1 << slot
+                next_change = min(next_change, expiry)
+            elif start > now:
+                next_change = min(next_change, start)
+        self._active_bits = bits
+        self._active_until = next_change
+        return bits
+
+    def _expand(self, prefix: str) -> Tuple[List[str], List[Tuple[int, int]], int]:
+        """Tokens starting with `prefix`, per-field postings and their union"""
+        cached = self._prefixes.get(prefix)
+        if cached is not None:
+            return cached
+
+        if self._vocabulary is None:
+            self._vocabulary = sorted(set().union(*self._postings.values()))
+        vocabulary = self._vocabulary
+        i = bisect_left(vocabulary, prefix)
+        matches = []
+        while i < len(vocabulary) and vocabulary[i].startswith(prefix):
+            matches.append(vocabulary[i])
+            i += 1
+
+        by_field = []
+        union = 0
+        for field, weight in FIELD_WEIGHTS:
+            postings = self._postings[field]
+            bits = 0
+            for token in matches:
+                bits |= postings.get(token, 0)
+            by_field.append((weight, bits))
+            union |= bits
+
+        self._prefixes[prefix] = (matches, by_field, union)
+        return self._prefixes[prefix]
+
+    def _order(self, column: int) -> Tuple[List[int], List[float]]:
+        """Live slots sorted by a meta column, and their values; cached until the next change"""
+        cached = self._orders.get(column)
+        if cached is None:
+            meta = self._doc_meta
+            order = sorted(self._slots.values(), key=lambda slot: meta[slot][column])
+            cached = (order, [meta[slot][column] for slot in order])
+            self._orders[column] = cached
+        return cached
+
+    def _discount_range(self, min_discount: Optional[float], max_discount: Optional[float]) -> int:
+        order, values = self._order(2)
+        lo = bisect_left(values, min_discount) if min_discount is not None else 0
+        hi = bisect_right(values, max_discount) if max_discount is not None else len(values)
+        bits = 0
+        for slot in order[lo:hi]:
+            bits |= 1 << slot
+        return bits
+
+    def _page_by_column(self, bits: int, column: int, descending: bool, count: int) -> List[int]:
+        # Few matches: sort just those. Many: walk the cached column order,
+        # which reaches `count` matches quickly
+        if bits.bit_count() * 16 < len(self._slots):
+            meta = self._doc_meta
+            select = heapq.nlargest if descending else heapq.nsmallest
+            return select(count, _bit_positions(bits), key=lambda slot: meta[slot][column])
+
+        digits = bin(bits)[:1:-1]
+        size = len(digits)
+        order, _ = self._order(column)
+        slots = []
+        for slot in (reversed(order) if descending else order):
+            if slot < size and digits[slot] == "1":
+                slots.append(slot)
+                if len(slots) == count:
+                    break
+        return slots
+
+    def _page_by_relevance(self, bits: int, expansions: List[List[Tuple[int, int]]], count: int) -> List[int]:
+        # Split matches into tiers by score; a term scores the weight of the
+        # best field it matched in
+        tiers = {0: bits}
+        for by_field in expansions:
+            scored: Dict[int, int] = {}
+            for score, tier in tiers.items():
+                for weight, field_bits in by_field:
+                    hit = tier & field_bits
+                    if hit:
+                        scored[score + weight] = scored.get(score + weight, 0) | hit
+                        tier &= ~hit
+            tiers = scored
+
+        # Newest first within a tier
+        slots: List[int] = []
+        for score in sorted(tiers, reverse=True):
+            slots.extend(self._page_by_column(tiers[score], 3, True, count - len(slots)))
+            if len(slots) >= count:
+                break
+        return slots
+
+    def search(
+        self,
+        q: Optional[str] = None,
+        category_id: Optional[str] = None,
+        business_id: Optional[str] = None,
+        discount_type: Optional[str] = None,
+        min_discount: Optional[float] = None,
+        max_discount: Optional[float] = None,
+        available_only: bool = True,
+        sort_by: str = "discount_value",
+        sort_order: str = "desc",
+        offset: int = 0,
+        limit: int = 20,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Returns (total, offers) with offers in PostgREST row shape. Each row
+        is a shallow copy with title/description highlights when q is given.
+        """
+        started = time.perf_counter()
+        bits = self._live(time.time())
+        if available_only:
+            bits &= self._available
+        if discount_type:
+            bits &= self._filters["discount_type"].get(discount_type, 0)
+        if category_id:
+            bits &= self._filters["category"].get(str(category_id), 0)
+        if business_id:
+            bits &= self._filters["business"].get(str(business_id), 0)
+        if bits and (min_discount is not None or max_discount is not None):
+            bits &= self._discount_range(min_discount, max_discount)
+
+        terms = tokenize(q)
+        expansions = []
+        for term in terms:
+            if not bits:
+                break
+            _, by_field, union = self._expand(term)
+            bits &= union
+            expansions.append(by_field)
+
+        total = bits.bit_count()
+        count = offset + limit
+        if not bits or offset >= total:
+            page_slots = []
+        elif sort_by == "relevance" and terms:
+            page_slots = self._page_by_relevance(bits, expansions, count)[offset:]
+        else:
+            if sort_by == "relevance":
+                sort_by, sort_order = "discount_value", "desc"
+            column = {"expiry_date": 1, "discount_value": 2, "created_at": 3}[sort_by]
+            page_slots = self._page_by_column(bits, column, sort_order == "desc", count)[offset:]
+
+        offers = []
+        for slot in page_slots:
+            offer = dict(self._docs[slot])
+            if terms:
+                offer["highlights"] = {
+                    "title": highlight_text(offer.get("title"), terms),
+                    "description": highlight_text(offer.get("description") or "", terms),
+                }
+            offers.append(offer)
+
+        self._stats["searches"] += 1
+        self._stats["last_search_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return total, offers
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.offer_search_index_enabled,
+            "ready": self._ready,
+            "offers": len(self._slots),
+            "terms": len(self._vocabulary) if self._vocabulary is not None else None,
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+            **self._stats,
+        }
+
+
+offer_search_index = OfferSearchIndex()
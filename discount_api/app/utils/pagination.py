@@ -0,0 +1,157 @@
+# app/utils/pagination.py
+"""
+Keyset (cursor) pagination for PostgREST list queries
+"""
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+
+def count_method(include_total: bool) -> str:
+    """
+    PostgREST count mode: exact only when asked for, otherwise the planner's
+    estimate (exact below the max-rows limit, so small lists stay accurate)
+    """
+    return "exact" if include_total else "estimated"
+
+
+def encode_cursor(data: Dict[str, Any]) -> str:
+    payload = json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(payload)
+        if not isinstance(data, dict):
+            raise ValueError("cursor is not an object")
+        return data
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _quote(value: Any) -> str:
+    """Quote a value for a PostgREST logic tree (timestamps contain ':' etc.)"""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _after(sort_column: str, descending: bool, value: Any, row_id: str, id_column: str) -> str:
+    """
+    Rows strictly after (value, row_id) in ORDER BY sort_column, id_column,
+    both in the same direction, with Postgres' default NULLS LAST for ASC and
+    NULLS FIRST for DESC
+    """
+    op = "lt" if descending else "gt"
+    row_id = _quote(row_id)
+    if sort_column == id_column:
+        return f"{id_column}.{op}.{row_id}"
+
+    if value is None:
+        tie = f"and({sort_column}.is.null,{id_column}.{op}.{row_id})"
+        return f"{sort_column}.not.is.null,{tie}" if descending else tie
+
+    value = _quote(value)
+    condition = f"{sort_column}.{op}.{value},and({sort_column}.eq.{value},{id_column}.{op}.{row_id})"
+    if not descending:
+        condition += f",{sort_column}.is.null"
+    return condition
+
+
+def apply_keyset(
+    query,
+    sort_column: str,
+    descending: bool,
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+    id_column: str = "id",
+):
+    """
+    Order by (sort_column, id_column) and fetch limit + 1 rows after the
+    cursor, so next_page() can tell whether another page exists.
+
+    `offset` supports the deprecated page parameter and only applies when no
+    cursor is given.
+    """
+    if cursor:
+        data = decode_cursor(cursor)
+        if data.get("k") != sort_column or "id" not in data:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor does not match the requested sort order"
+            )
+        query = query.or_(_after(sort_column, descending, data.get("v"), data["id"], id_column))
+        offset = 0
+
+    query = query.order(sort_column, desc=descending)
+    if sort_column != id_column:
+        query = query.order(id_column, desc=descending)
+    return query.range(offset, offset + limit)
+
+
+def next_page(
+    rows: List[Dict[str, Any]],
+    limit: int,
+    sort_column: str,
+    id_column: str = "id",
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Trim the extra row fetched by apply_keyset() and build the next cursor"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor({"k": sort_column, "v": last.get(sort_column), "id": str(last[id_column])})
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Cursor for orderings without a stable key (relevance ranking)"""
+    return encode_cursor({"o": offset})
+
+
+def decode_offset_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Offset from an encode_offset_cursor() cursor, or None for other cursors"""
+    if not cursor:
+        return None
+    offset = decode_cursor(cursor).get("o")
+    if offset is None:
+        return None
+    if not isinstance(offset, int) or offset < 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return offset
+
+
+def apply_offset(query, limit: int, cursor: Optional[str] = None, offset: int = 0):
+    """
+    Offset paging for orderings without a stable key (relevance ranking).
+    Fetches limit + 1 rows; returns (query, offset).
+    """
+    cursor_offset = decode_offset_cursor(cursor)
+    if cursor and cursor_offset is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor does not match the requested sort order"
+        )
+    if cursor_offset is not None:
+        offset = cursor_offset
+    return query.range(offset, offset + limit), offset
+
+
+def next_offset_page(
+    rows: List[Dict[str, Any]],
+    limit: int,
+    offset: int,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Trim the extra row fetched by apply_offset() and build the next cursor"""
+    if len(rows) <= limit:
+        return rows, None
+    return rows[:limit], encode_offset_cursor(offset + limit)
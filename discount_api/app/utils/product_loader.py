@@ -0,0 +1,49 @@
+# app/utils/product_loader.py
+"""
+Batched product lookups for offer listings
+"""
+from typing import Any, Dict, Iterable, Optional
+
+from app.core.database import supabase
+from app.utils.image_variants import add_image_variants
+
+
+class ProductLoader:
+    """
+    Per-request data loader for products.
+
+    Collects product IDs, removes duplicates and fetches all missing products
+    with a single `in_("id", [...])` query, so enriching a page of offers costs
+    one round trip regardless of page size. Results are memoized for the
+    lifetime of the loader (i.e. one request).
+    """
+
+    def __init__(self, client=None, columns: str = "*, categories(*)"):
+        self._client = client or supabase
+        self._columns = columns
+        self._cache: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    async def load_many(self, product_ids: Iterable[Optional[str]]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Return a mapping of product ID -> product row (None if not found)"""
+        requested = [str(pid) for pid in product_ids if pid]
+        missing = [pid for pid in dict.fromkeys(requested) if pid not in self._cache]
+
+        if missing:
+            result = await self._client.table("products").select(self._columns).in_("id", missing).execute()
+            found = {str(product["id"]): add_image_variants(product) for product in result.data or []}
+            for pid in missing:
+                self._cache[pid] = found.get(pid)
+
+        return {pid: self._cache.get(pid) for pid in requested}
+
+    async def load(self, product_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return a single product row, sharing the loader's cache"""
+        if not product_id:
+            return None
+        products = await self.load_many([product_id])
+        return products.get(str(product_id))
+
+
+def get_product_loader() -> ProductLoader:
+    """FastAPI dependency that creates a fresh loader for each request"""
+    return ProductLoader()
@@ -0,0 +1,350 @@
+# app/utils/response_cache.py
+"""
+Response cache for hot public GET endpoints, with pluggable backends
+"""
+import asyncio
+import hashlib
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from app.core.config import settings
+from app.utils.cache import TTLCache
+from app.utils.serialization import dumps, loads
+
+# Tag for every cached response that lists or embeds offers
+OFFERS_TAG = "offers"
+
+
+def product_tag(product_id: Any) -> str:
+    return f"product:{product_id}"
+
+
+class ResponseCacheBackend(ABC):
+    """
+    Storage for cached responses and tag versions. Invalidating a tag bumps
+    its version; entries remember the versions they were stored under and are
+    ignored once any of them moves on.
+    """
+
+    name = "backend"
+
+    @abstractmethod
+    async def get(self, key: str, tags: Sequence[str]) -> Tuple[Optional[bytes], List[int]]:
+        """The stored entry (or None) and the current version of each tag"""
+
+    @abstractmethod
+    async def versions(self, tags: Sequence[str]) -> List[int]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def bump(self, tags: Sequence[str]) -> None:
+        ...
+
+    async def aclose(self) -> None:
+        pass
+
+
+class MemoryResponseCacheBackend(ResponseCacheBackend):
+    """Per-worker LRU; invalidations only reach this worker"""
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = settings.response_cache_max_entries):
+        self._entries = TTLCache(maxsize=maxsize)
+        self._versions: Dict[str, int] = {}
+
+    async def get(self, key: str, tags: Sequence[str]) -> Tuple[Optional[bytes], List[int]]:
+        return self._entries.get(key), await self.versions(tags)
+
+    async def versions(self, tags: Sequence[str]) -> List[int]:
+        return [self._versions.get(tag, 0) for tag in tags]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._entries.set(key, value, ttl=ttl)
+
+    async def bump(self, tags: Sequence[str]) -> None:
+        for tag in tags:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+
+class RedisResponseCacheBackend(ResponseCacheBackend):
+    """
+    Shared cache on Redis (or anything speaking its protocol). Uses only
+    MGET, SET PX and INCR, so any client with redis.asyncio's mget/set/incr
+    signatures can stand in for it.
+    """
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "rc:"):
+        self._redis = client
+        self._prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "rc:") -> "RedisResponseCacheBackend":
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the redis package")
+        return cls(redis_asyncio.from_url(url), prefix)
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self._prefix}tag:{tag}"
+
+    async def get(self, key: str, tags: Sequence[str]) -> Tuple[Optional[bytes], List[int]]:
+        values = await self._redis.mget([self._prefix + key] + [self._tag_key(tag) for tag in tags])
+        return values[0], [int(version or 0) for version in values[1:]]
+
+    async def versions(self, tags: Sequence[str]) -> List[int]:
+        if not tags:
+            return []
+        values = await self._redis.mget([self._tag_key(tag) for tag in tags])
+        return [int(version or 0) for version in values]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._redis.set(self._prefix + key, value, px=max(1, int(ttl * 1000)))
+
+    async def bump(self, tags: Sequence[str]) -> None:
+        for tag in tags:
+            await self._redis.incr(self._tag_key(tag))
+
+    async def aclose(self) -> None:
+        close = getattr(self._redis, "aclose", None) or getattr(self._redis, "close", None)
+        if close is not None:
+            await close()
+
+
+class CacheRule:
+    """
+    A cacheable GET path: `pattern` is matched against the full path, and
+    `tags(match)` names what invalidates it
+    """
+
+    def __init__(
+        self,
+        pattern: str,
+        ttl: float,
+        tags: Callable[[re.Match], Sequence[str]] = lambda match: (OFFERS_TAG,),
+        stale_ttl: float = settings.response_cache_stale_seconds,
+    ):
+        self.pattern = re.compile(pattern)
+        self.ttl = ttl
+        self.tags = tags
+        self.stale_ttl = stale_ttl
+
+
+def cache_key(path: str, query_string: bytes) -> str:
+    """Path plus sorted query parameters, so parameter order doesn't matter"""
+    params = sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True))
+    normalized = f"{path}?{urlencode(params)}"
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Cached responses are fresh for the rule's TTL, then served stale for up
+    to stale_ttl while one background request recomputes them. Concurrent
+    misses for the same key in a worker share a single computation. Only
+    200 JSON responses without cookies are stored; backend errors fall
+    through to the endpoint.
+    """
+
+    def __init__(self, backend: ResponseCacheBackend):
+        self.backend = backend
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "invalidations": 0,
+            "errors": 0,
+        }
+
+    async def invalidate(self, *tags: str) -> None:
+        """Drop cached responses carrying any of `tags`; never raises"""
+        try:
+            await self.backend.bump(tags)
+            self._stats["invalidations"] += 1
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"Response cache invalidation failed: {e}")
+
+    async def _lookup(self, key: str, tags: Sequence[str]) -> Optional[Dict[str, Any]]:
+        try:
+            value, versions = await self.backend.get(key, tags)
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"Response cache read failed: {e}")
+            return None
+        if value is None:
+            return None
+        try:
+            entry = loads(value)
+        except ValueError:
+            return None
+        if entry["versions"] != versions:
+            return None
+        return entry
+
+    async def _compute(self, app, scope, key: str, rule: CacheRule, tags: Sequence[str]) -> Dict[str, Any]:
+        # Versions are read before the endpoint runs, so an invalidation
+        # that lands mid-computation leaves the stored entry already stale
+        try:
+            versions = await self.backend.versions(tags)
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"Response cache read failed: {e}")
+            versions = None
+
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                return {"type": "http.disconnect"}
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        response: Dict[str, Any] = {"status": 500, "headers": [], "body": b""}
+        chunks: List[bytes] = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in message.get("headers", [])
+                ]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        # Routing writes into the scope; keep the caller's copy untouched
+        await app(dict(scope), receive, send)
+        response["body"] = b"".join(chunks)
+
+        if versions is not None and self._storable(response):
+            now = time.time()
+            entry = {
+                "status": response["status"],
+                "headers": response["headers"],
+                "body": response["body"].decode("utf-8"),
+                "stored_at": now,
+                "fresh_until": now + rule.ttl,
+                "versions": versions,
+            }
+            try:
+                await self.backend.set(key, dumps(entry), rule.ttl + rule.stale_ttl)
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"Response cache write failed: {e}")
+        return response
+
+    @staticmethod
+    def _storable(response: Dict[str, Any]) -> bool:
+        if response["status"] != 200:
+            return False
+        headers = {name.lower(): value for name, value in response["headers"]}
+        if "set-cookie" in headers or "no-store" in headers.get("cache-control", ""):
+            return False
+        if not headers.get("content-type", "").startswith("application/json"):
+            return False
+        try:
+            response["body"].decode("utf-8")
+        except UnicodeDecodeError:
+            return False
+        return True
+
+    def _single_flight(self, app, scope, key: str, rule: CacheRule, tags: Sequence[str]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._compute(app, scope, key, rule, tags))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self._stats["coalesced"] += 1
+        return task
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        # Background refreshes have no awaiting caller to report errors to
+        if not task.cancelled() and task.exception() is not None:
+            self._stats["errors"] += 1
+            print(f"Response cache refresh failed: {task.exception()}")
+
+    async def respond(self, app, scope, send, rule: CacheRule, match: re.Match) -> None:
+        key = cache_key(scope["path"], scope.get("query_string", b""))
+        tags = list(rule.tags(match))
+        entry = await self._lookup(key, tags)
+
+        if entry is not None:
+            now = time.time()
+            if now < entry["fresh_until"]:
+                self._stats["hits"] += 1
+                state = "HIT"
+            else:
+                self._stats["stale_hits"] += 1
+                state = "STALE"
+                self._single_flight(app, scope, key, rule, tags)
+            age = max(0, int(now - entry["stored_at"]))
+            await self._send(send, entry["status"], entry["headers"], entry["body"].encode("utf-8"), state, age)
+            return
+
+        self._stats["misses"] += 1
+        # Shielded so one client disconnecting doesn't cancel the others
+        response = await asyncio.shield(self._single_flight(app, scope, key, rule, tags))
+        await self._send(send, response["status"], response["headers"], response["body"], "MISS", 0)
+
+    @staticmethod
+    async def _send(send, status_code: int, headers: List[List[str]], body: bytes, state: str, age: int) -> None:
+        raw_headers = [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers
+            if name.lower() not in ("x-cache", "age")
+        ]
+        raw_headers.append((b"x-cache", state.encode("latin-1")))
+        raw_headers.append((b"age", str(age).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status_code, "headers": raw_headers})
+        await send({"type": "http.response.body", "body": body})
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.response_cache_enabled,
+            "backend": self.backend.name,
+            "in_flight": len(self._inflight),
+            **self._stats,
+        }
+
+
+class ResponseCacheMiddleware:
+    """ASGI middleware serving GET requests that match a CacheRule from the cache"""
+
+    def __init__(self, app, cache: ResponseCache, rules: Sequence[CacheRule]):
+        self.app = app
+        self.cache = cache
+        self.rules = rules
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "GET":
+            for rule in self.rules:
+                match = rule.pattern.match(scope["path"])
+                if match:
+                    await self.cache.respond(self.app, scope, send, rule, match)
+                    return
+        await self.app(scope, receive, send)
+
+
+def create_backend() -> ResponseCacheBackend:
+    if settings.response_cache_backend == "redis":
+        return RedisResponseCacheBackend.from_url(settings.response_cache_redis_url, settings.response_cache_prefix)
+    return MemoryResponseCacheBackend()
+
+
+response_cache = ResponseCache(create_backend() if settings.response_cache_enabled else MemoryResponseCacheBackend())
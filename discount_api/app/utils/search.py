@@ -0,0 +1,51 @@
+# app/utils/search.py
+"""
+Helpers for indexed offer/product search (see migrations/008_search_index.sql)
+"""
+from typing import Any, Dict, List, Optional
+
+MAX_SEARCH_QUERY_LENGTH = 200
+
+# search_offers() / search_products() return a `rank` column, higher is better
+RELEVANCE_SORT = "relevance"
+
+
+def normalize_search_query(q: Optional[str]) -> Optional[str]:
+    """Collapse whitespace and cap length; blank queries become None"""
+    if q is None:
+        return None
+    q = " ".join(q.split())[:MAX_SEARCH_QUERY_LENGTH]
+    return q or None
+
+
+def search_source(client, table: str, q: Optional[str], columns: str, count: Optional[str] = "exact"):
+    """
+    Select builder over `table`, or over its ranked search function when a
+    query is given. Further filters, ordering and range apply either way.
+    """
+    if q:
+        return client.rpc(f"search_{table}", {"p_query": q}, count=count).select(columns)
+    return client.table(table).select(columns, count=count)
+
+
+def order_by_relevance(query):
+    """Best match first; id breaks ties so offset pages don't overlap"""
+    return query.order("rank", desc=True).order("id")
+
+
+async def attach_search_highlights(client, kind: str, rows: List[Dict[str, Any]], q: str) -> None:
+    """Add a `highlights` dict to each row of a result page (kind: 'offer' or 'product')"""
+    ids = [str(row["id"]) for row in rows if row.get("id")]
+    if not ids:
+        return
+
+    try:
+        result = await client.rpc(f"{kind}_search_highlights", {"p_ids": ids, "p_query": q}).execute()
+    except Exception as e:
+        # Highlights are cosmetic; return unhighlighted results
+        print(f"Error fetching search highlights: {e}")
+        return
+
+    highlights = {str(row["id"]): row["highlights"] for row in result.data or []}
+    for row in rows:
+        row["highlights"] = highlights.get(str(row.get("id")))
@@ -0,0 +1,50 @@
+# app/utils/serialization.py
+"""
+JSON serialization for API responses and Supabase payloads, using orjson
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def json_default(obj: Any) -> Any:
+    """Types orjson doesn't encode natively (datetime, date, UUID and enums it does)"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(data: Any) -> bytes:
+    return orjson.dumps(data, default=json_default, option=JSON_OPTIONS)
+
+
+def loads(data: Any) -> Any:
+    return orjson.loads(data)
+
+
+def to_jsonable(data: Any) -> Any:
+    """
+    Plain JSON types for `data` (Decimal -> float, UUID/datetime -> str),
+    e.g. for insert/update payloads sent to Supabase
+    """
+    return orjson.loads(dumps(data))
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response encoded by orjson in one pass. Returning one directly from
+    an endpoint also skips FastAPI's jsonable_encoder/response_model walk,
+    which is what the large list endpoints do.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Rebuild the redemption_daily_rollup table from claimed_offers
+
+Usage:
+    python backfill_redemption_rollup.py                 # all businesses
+    python backfill_redemption_rollup.py <business_id>   # one business
+"""
+import asyncio
+import sys
+from app.core.database import supabase_admin, close_database_clients
+
+async def backfill(business_id=None):
+    target = f"business {business_id}" if business_id else "all businesses"
+    print(f"🔄 Rebuilding redemption rollup for {target}...")
+    
+    try:
+        result = await supabase_admin.rpc("backfill_redemption_rollup", {
+            "p_business_id": business_id
+        }).execute()
+        print(f"✅ Rollup rebuilt: {result.data} rows written")
+        return True
+    except Exception as e:
+        print(f"❌ Backfill failed: {e}")
+        return False
+    finally:
+        await close_database_clients()
+
+if __name__ == "__main__":
+    business_id = sys.argv[1] if len(sys.argv) > 1 else None
+    success = asyncio.run(backfill(business_id))
+    sys.exit(0 if success else 1)
@@ -1,7 +1,5 @@
 import sys
 import asyncio
-import json
-from decimal import Decimal
 
 # Fix for Windows psycopg3 compatibility
 if sys.platform == "win32":
@@ -9,32 +7,20 @@ if sys.platform == "win32":
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.encoders import jsonable_encoder
 from contextlib import asynccontextmanager
 from app.core.config import settings
-from app.core.database import check_database_health
+from app.core.database import check_database_health, close_database_clients
 from app.api.routes import auth, health, business, categories, customer
-
-
-# Custom JSON encoder to handle Decimal objects
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
-
-
-# Monkey patch the default encoder
-def custom_jsonable_encoder(obj, **kwargs):
-    """Custom JSON encoder that handles Decimal objects"""
-    if isinstance(obj, dict):
-        return {key: custom_jsonable_encoder(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [custom_jsonable_encoder(item) for item in obj]
-    elif isinstance(obj, Decimal):
-        return float(obj)
-    else:
-        return jsonable_encoder(obj, **kwargs)
+from app.core.storage import storage_client
+from app.utils.image_worker import shutdown_image_workers
+from app.utils.offer_index import offer_search_index
+from app.utils.nearby_index import nearby_offer_index
+from app.utils.geocoding import geocoder
+from app.utils.category_cache import category_cache
+from app.utils.serialization import ORJSONResponse
+from app.utils.response_cache import (
+    CacheRule, ResponseCacheMiddleware, product_tag, response_cache
+)
 
 
 @asynccontextmanager
@@ -53,10 +39,26 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️  Database check failed: {e}")
     
+    # Categories are read on nearly every page load
+    await category_cache.warm()
+    
+    # In-memory offer search and nearby indexes, built in the background
+    if settings.offer_search_index_enabled:
+        offer_search_index.start()
+    if settings.nearby_index_enabled:
+        nearby_offer_index.start()
+    
     yield
     
     # Shutdown
     print(f"Shutting down {settings.app_name}...")
+    await offer_search_index.stop()
+    await nearby_offer_index.stop()
+    await geocoder.aclose()
+    await response_cache.backend.aclose()
+    await close_database_clients()
+    await storage_client.aclose()
+    shutdown_image_workers()
 
 
 # Create FastAPI application
@@ -65,9 +67,26 @@ app = FastAPI(
     description="API for offers and deals management platform",
     version="1.0.0",
     debug=settings.debug,
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+# Cache hot public customer endpoints. Added before CORS so it runs inside
+# it and cached responses never carry another origin's CORS headers.
+if settings.response_cache_enabled:
+    app.add_middleware(
+        ResponseCacheMiddleware,
+        cache=response_cache,
+        rules=[
+            CacheRule(r"^/api/v1/customer/offers/(trending|expiring-soon|search)/?$", settings.response_cache_ttl_seconds),
+            CacheRule(
+                r"^/api/v1/customer/products/(?P<product_id>[^/]+)/?$",
+                settings.response_cache_ttl_seconds,
+                tags=lambda match: (product_tag(match["product_id"]),)
+            ),
+        ]
+    )
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
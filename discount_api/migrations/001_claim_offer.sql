@@ -0,0 +1,137 @@
+-- migrations/001_claim_offer.sql
+-- Atomic offer claiming.
+--
+-- Replaces the read / check / insert / increment / re-select sequence in
+-- POST /customer/offers/{offer_id}/claim with a single RPC call. The
+-- conditional UPDATE on offers takes the row lock, so concurrent claims on
+-- the same offer are serialized and max_claims can no longer be oversold.
+--
+-- Errors are raised with a stable message the API maps to HTTP responses:
+--   offer_not_found, offer_not_started, offer_expired, offer_sold_out,
+--   already_claimed, claim_id_conflict
+--
+-- The old endpoint's check-then-insert let concurrent requests claim the
+-- same offer twice, so existing duplicates are removed before the unique
+-- index is built. To review them first, run:
+--
+--   SELECT user_id, offer_id, count(*)
+--     FROM public.claimed_offers
+--    GROUP BY user_id, offer_id
+--   HAVING count(*) > 1;
+
+-- Keep one claim per (user, offer): a redeemed one if any, else the
+-- earliest. Each removed duplicate also gives back its claim slot.
+WITH ranked AS (
+  SELECT id, offer_id,
+         row_number() OVER (
+           PARTITION BY user_id, offer_id
+           ORDER BY is_redeemed DESC, claimed_at, id
+         ) AS rn
+    FROM public.claimed_offers
+), removed AS (
+  DELETE FROM public.claimed_offers c
+   USING ranked r
+   WHERE c.id = r.id
+     AND r.rn > 1
+  RETURNING c.offer_id
+)
+UPDATE public.offers o
+   SET current_claims = GREATEST(o.current_claims - d.removed, 0)
+  FROM (SELECT offer_id, count(*) AS removed FROM removed GROUP BY offer_id) d
+ WHERE o.id = d.offer_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS claimed_offers_user_offer_idx
+  ON public.claimed_offers (user_id, offer_id);
+
+CREATE OR REPLACE FUNCTION public.claim_offer(
+  p_offer_id uuid,
+  p_user_id uuid,
+  p_claim_type text,
+  p_unique_claim_id text,
+  p_qr_code_url text DEFAULT NULL,
+  p_redirect_url text DEFAULT NULL
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_offer public.offers%ROWTYPE;
+  v_claim public.claimed_offers%ROWTYPE;
+  v_redirect_url text;
+BEGIN
+  -- Reserve a slot; the row lock is held until the transaction ends
+  UPDATE public.offers
+     SET current_claims = current_claims + 1
+   WHERE id = p_offer_id
+     AND is_active
+     AND start_date <= now()
+     AND expiry_date >= now()
+     AND (max_claims IS NULL OR current_claims < max_claims)
+  RETURNING * INTO v_offer;
+
+  IF NOT FOUND THEN
+    SELECT * INTO v_offer FROM public.offers WHERE id = p_offer_id AND is_active;
+    IF NOT FOUND THEN
+      RAISE EXCEPTION 'offer_not_found';
+    ELSIF v_offer.start_date > now() THEN
+      RAISE EXCEPTION 'offer_not_started';
+    ELSIF v_offer.expiry_date < now() THEN
+      RAISE EXCEPTION 'offer_expired';
+    ELSE
+      RAISE EXCEPTION 'offer_sold_out';
+    END IF;
+  END IF;
+
+  IF p_claim_type = 'online' THEN
+    SELECT COALESCE(p_redirect_url, NULLIF(b.business_website, ''), 'https://merchant-website-placeholder.com')
+      INTO v_redirect_url
+      FROM public.businesses b
+     WHERE b.id = v_offer.business_id;
+  END IF;
+
+  BEGIN
+    INSERT INTO public.claimed_offers (
+      user_id, offer_id, claim_type, unique_claim_id, qr_code_url, merchant_redirect_url
+    ) VALUES (
+      p_user_id, p_offer_id, p_claim_type, p_unique_claim_id,
+      CASE WHEN p_claim_type = 'in_store' THEN p_qr_code_url END,
+      v_redirect_url
+    )
+    RETURNING * INTO v_claim;
+  EXCEPTION WHEN unique_violation THEN
+    -- Raising here also rolls back the current_claims increment above
+    IF EXISTS (
+      SELECT 1 FROM public.claimed_offers WHERE user_id = p_user_id AND offer_id = p_offer_id
+    ) THEN
+      RAISE EXCEPTION 'already_claimed';
+    END IF;
+    RAISE EXCEPTION 'claim_id_conflict';
+  END;
+
+  RETURN to_jsonb(v_claim) || jsonb_build_object(
+    'offers',
+    to_jsonb(v_offer) || jsonb_build_object(
+      'products', (
+        SELECT to_jsonb(p) || jsonb_build_object('categories', to_jsonb(c))
+          FROM public.products p
+          LEFT JOIN public.categories c ON c.id = p.category_id
+         WHERE p.id = v_offer.product_id
+      ),
+      'businesses', (
+        SELECT jsonb_build_object(
+                 'business_name', b.business_name,
+                 'is_verified', b.is_verified,
+                 'avatar_url', b.avatar_url
+               )
+          FROM public.businesses b
+         WHERE b.id = v_offer.business_id
+      )
+    )
+  );
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.claim_offer(uuid, uuid, text, text, text, text) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.claim_offer(uuid, uuid, text, text, text, text) TO service_role;
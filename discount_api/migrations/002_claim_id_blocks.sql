@@ -0,0 +1,21 @@
+-- migrations/002_claim_id_blocks.sql
+-- Counter blocks for claim ID generation.
+--
+-- Each API worker reserves a block of CLAIM_ID_BLOCK_SIZE counter values with
+-- one call to next_claim_id_block() and encodes them locally
+-- (app/utils/claim_utils.py), so issuing a claim ID needs no uniqueness
+-- probes. The sequence makes blocks disjoint across workers and restarts.
+
+CREATE SEQUENCE IF NOT EXISTS public.claim_id_block_seq AS bigint MINVALUE 0 START WITH 0;
+
+CREATE OR REPLACE FUNCTION public.next_claim_id_block()
+RETURNS bigint
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  SELECT nextval('public.claim_id_block_seq');
+$$;
+
+REVOKE ALL ON FUNCTION public.next_claim_id_block() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.next_claim_id_block() TO service_role;
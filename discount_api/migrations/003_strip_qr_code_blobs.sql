@@ -0,0 +1,12 @@
+-- migrations/003_strip_qr_code_blobs.sql
+-- QR codes are rendered on demand from unique_claim_id
+-- (GET /api/v1/customer/claimed-offers/{claim_id}/qr.png), so the inline
+-- base64 PNGs previously stored per claim are dropped. This keeps several KB
+-- per row out of every claim listing and out of table storage.
+
+UPDATE public.claimed_offers
+   SET qr_code_url = NULL
+ WHERE qr_code_url LIKE 'data:%';
+
+COMMENT ON COLUMN public.claimed_offers.qr_code_url IS
+  'Deprecated: QR codes are rendered from unique_claim_id; no longer written by the API';
@@ -0,0 +1,53 @@
+-- migrations/004_redemption_stats.sql
+-- Redemption statistics aggregated in the database.
+--
+-- GET /business/redeem/stats previously downloaded every claim in the period
+-- and aggregated in Python. get_redemption_stats() returns one row per
+-- (UTC day, claim_type, is_redeemed) with the claim count and the savings
+-- those claims represent, so the response is built from a few dozen rows.
+
+CREATE INDEX IF NOT EXISTS claimed_offers_offer_claimed_at_idx
+  ON public.claimed_offers (offer_id, claimed_at);
+
+CREATE INDEX IF NOT EXISTS offers_business_id_idx
+  ON public.offers (business_id);
+
+CREATE OR REPLACE FUNCTION public.get_redemption_stats(
+  p_business_id uuid,
+  p_start timestamptz
+)
+RETURNS TABLE (
+  day date,
+  claim_type text,
+  is_redeemed boolean,
+  claims bigint,
+  savings numeric
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  SELECT
+    (co.claimed_at AT TIME ZONE 'UTC')::date AS day,
+    COALESCE(co.claim_type, 'in_store') AS claim_type,
+    co.is_redeemed,
+    count(*) AS claims,
+    COALESCE(sum(
+      CASE
+        WHEN o.discount_type = 'percentage' AND o.original_price IS NOT NULL
+          THEN o.original_price * o.discount_value / 100
+        WHEN o.discount_type = 'fixed'
+          THEN o.discount_value
+        ELSE 0
+      END
+    ), 0) AS savings
+  FROM public.claimed_offers co
+  JOIN public.offers o ON o.id = co.offer_id
+  WHERE o.business_id = p_business_id
+    AND co.claimed_at >= p_start
+  GROUP BY 1, 2, 3;
+$$;
+
+REVOKE ALL ON FUNCTION public.get_redemption_stats(uuid, timestamptz) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_redemption_stats(uuid, timestamptz) TO service_role;
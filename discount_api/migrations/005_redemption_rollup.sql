@@ -0,0 +1,186 @@
+-- migrations/005_redemption_rollup.sql
+-- Per-business, per-offer, per-day claim/redemption rollup.
+--
+-- Rows are keyed by the day a claim was made (UTC), matching how
+-- /business/redeem/stats has always bucketed claims. They are maintained
+-- incrementally by a trigger on claimed_offers, so the claim_offer() insert
+-- and every redemption update (complete, bulk, scan) keep the rollup current
+-- in the same transaction without extra round trips from the API.
+--
+-- Backfill / rebuild: SELECT public.backfill_redemption_rollup();
+-- (or python backfill_redemption_rollup.py)
+
+CREATE TABLE IF NOT EXISTS public.redemption_daily_rollup (
+  business_id uuid NOT NULL,
+  offer_id uuid NOT NULL,
+  day date NOT NULL,
+  claim_type text NOT NULL,
+  claims integer NOT NULL DEFAULT 0,
+  redemptions integer NOT NULL DEFAULT 0,
+  savings numeric NOT NULL DEFAULT 0,
+  CONSTRAINT redemption_daily_rollup_pkey PRIMARY KEY (business_id, day, offer_id, claim_type),
+  CONSTRAINT redemption_daily_rollup_offer_id_fkey FOREIGN KEY (offer_id) REFERENCES public.offers(id) ON DELETE CASCADE
+);
+
+ALTER TABLE public.redemption_daily_rollup ENABLE ROW LEVEL SECURITY;
+
+-- Savings a redeemed claim provides (same rules the API has always used)
+CREATE OR REPLACE FUNCTION public.offer_claim_savings(
+  p_discount_type text,
+  p_discount_value numeric,
+  p_original_price numeric
+)
+RETURNS numeric
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT CASE
+    WHEN p_discount_type = 'percentage' AND p_original_price IS NOT NULL
+      THEN p_original_price * p_discount_value / 100
+    WHEN p_discount_type = 'fixed'
+      THEN COALESCE(p_discount_value, 0)
+    ELSE 0
+  END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.apply_redemption_rollup()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_row public.claimed_offers%ROWTYPE;
+  v_claims integer := 0;
+  v_redemptions integer := 0;
+  v_business_id uuid;
+  v_savings numeric;
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    v_row := NEW;
+    v_claims := 1;
+    v_redemptions := CASE WHEN NEW.is_redeemed THEN 1 ELSE 0 END;
+  ELSIF TG_OP = 'DELETE' THEN
+    v_row := OLD;
+    v_claims := -1;
+    v_redemptions := CASE WHEN OLD.is_redeemed THEN -1 ELSE 0 END;
+  ELSE
+    IF NEW.is_redeemed IS NOT DISTINCT FROM OLD.is_redeemed THEN
+      RETURN NULL;
+    END IF;
+    v_row := NEW;
+    v_redemptions := CASE WHEN NEW.is_redeemed THEN 1 ELSE -1 END;
+  END IF;
+
+  SELECT o.business_id, public.offer_claim_savings(o.discount_type, o.discount_value, o.original_price)
+    INTO v_business_id, v_savings
+    FROM public.offers o
+   WHERE o.id = v_row.offer_id;
+
+  IF v_business_id IS NULL THEN
+    RETURN NULL;
+  END IF;
+
+  INSERT INTO public.redemption_daily_rollup AS r (
+    business_id, offer_id, day, claim_type, claims, redemptions, savings
+  ) VALUES (
+    v_business_id,
+    v_row.offer_id,
+    (v_row.claimed_at AT TIME ZONE 'UTC')::date,
+    COALESCE(v_row.claim_type, 'in_store'),
+    v_claims,
+    v_redemptions,
+    v_redemptions * v_savings
+  )
+  ON CONFLICT (business_id, day, offer_id, claim_type) DO UPDATE
+    SET claims = r.claims + EXCLUDED.claims,
+        redemptions = r.redemptions + EXCLUDED.redemptions,
+        savings = r.savings + EXCLUDED.savings;
+
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS claimed_offers_redemption_rollup ON public.claimed_offers;
+CREATE TRIGGER claimed_offers_redemption_rollup
+  AFTER INSERT OR DELETE OR UPDATE OF is_redeemed ON public.claimed_offers
+  FOR EACH ROW EXECUTE FUNCTION public.apply_redemption_rollup();
+
+-- Rebuild the rollup from claimed_offers (all businesses, or one)
+CREATE OR REPLACE FUNCTION public.backfill_redemption_rollup(p_business_id uuid DEFAULT NULL)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_rows integer;
+BEGIN
+  -- Block concurrent claim/redeem writes while rebuilding so no delta is lost
+  LOCK TABLE public.claimed_offers IN SHARE ROW EXCLUSIVE MODE;
+
+  DELETE FROM public.redemption_daily_rollup
+   WHERE p_business_id IS NULL OR business_id = p_business_id;
+
+  INSERT INTO public.redemption_daily_rollup (
+    business_id, offer_id, day, claim_type, claims, redemptions, savings
+  )
+  SELECT
+    o.business_id,
+    co.offer_id,
+    (co.claimed_at AT TIME ZONE 'UTC')::date,
+    COALESCE(co.claim_type, 'in_store'),
+    count(*),
+    count(*) FILTER (WHERE co.is_redeemed),
+    COALESCE(sum(public.offer_claim_savings(o.discount_type, o.discount_value, o.original_price))
+             FILTER (WHERE co.is_redeemed), 0)
+  FROM public.claimed_offers co
+  JOIN public.offers o ON o.id = co.offer_id
+  WHERE p_business_id IS NULL OR o.business_id = p_business_id
+  GROUP BY 1, 2, 3, 4;
+
+  GET DIAGNOSTICS v_rows = ROW_COUNT;
+  RETURN v_rows;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.backfill_redemption_rollup(uuid) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.backfill_redemption_rollup(uuid) TO service_role;
+
+-- Stats now read the rollup, summed per (day, claim_type) in the database:
+-- at most two rows per day, well under PostgREST's max-rows cap
+DROP FUNCTION IF EXISTS public.get_redemption_stats(uuid, timestamptz);
+
+CREATE OR REPLACE FUNCTION public.get_redemption_rollup(
+  p_business_id uuid,
+  p_since date
+)
+RETURNS TABLE (
+  day date,
+  claim_type text,
+  claims bigint,
+  redemptions bigint,
+  savings numeric
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  SELECT
+    r.day,
+    r.claim_type,
+    sum(r.claims)::bigint AS claims,
+    sum(r.redemptions)::bigint AS redemptions,
+    sum(r.savings) AS savings
+  FROM public.redemption_daily_rollup r
+  WHERE r.business_id = p_business_id
+    AND r.day >= p_since
+  GROUP BY r.day, r.claim_type
+  ORDER BY r.day, r.claim_type;
+$$;
+
+REVOKE ALL ON FUNCTION public.get_redemption_rollup(uuid, date) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_redemption_rollup(uuid, date) TO service_role;
+
+SELECT public.backfill_redemption_rollup();
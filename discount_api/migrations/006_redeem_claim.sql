@@ -0,0 +1,97 @@
+-- migrations/006_redeem_claim.sql
+-- Single-round-trip redemption for POST /business/redeem/scan.
+--
+-- Verifies ownership and expiry and marks the claim redeemed with one
+-- conditional UPDATE (is_redeemed = false), so two concurrent scans of the
+-- same code cannot both succeed. Returns the data needed for a receipt, or
+-- {"error_code": ...} describing why the claim could not be redeemed:
+--   CLAIM_NOT_FOUND, UNAUTHORIZED_BUSINESS, ALREADY_REDEEMED, OFFER_EXPIRED
+
+CREATE OR REPLACE FUNCTION public.redeem_claim(
+  p_unique_claim_id text,
+  p_business_id uuid,
+  p_redemption_notes text DEFAULT NULL
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_claim public.claimed_offers%ROWTYPE;
+  v_business_id uuid;
+  v_expiry timestamptz;
+BEGIN
+  UPDATE public.claimed_offers co
+     SET is_redeemed = true,
+         redeemed_at = now(),
+         redemption_notes = p_redemption_notes
+    FROM public.offers o
+   WHERE co.unique_claim_id = p_unique_claim_id
+     AND o.id = co.offer_id
+     AND o.business_id = p_business_id
+     AND o.expiry_date >= now()
+     AND NOT co.is_redeemed
+  RETURNING co.* INTO v_claim;
+
+  IF NOT FOUND THEN
+    SELECT * INTO v_claim
+      FROM public.claimed_offers
+     WHERE unique_claim_id = p_unique_claim_id;
+
+    IF NOT FOUND THEN
+      RETURN jsonb_build_object('error_code', 'CLAIM_NOT_FOUND');
+    END IF;
+
+    SELECT o.business_id, o.expiry_date INTO v_business_id, v_expiry
+      FROM public.offers o
+     WHERE o.id = v_claim.offer_id;
+
+    IF v_business_id IS DISTINCT FROM p_business_id THEN
+      RETURN jsonb_build_object('error_code', 'UNAUTHORIZED_BUSINESS');
+    ELSIF v_claim.is_redeemed THEN
+      RETURN jsonb_build_object(
+        'error_code', 'ALREADY_REDEEMED',
+        'redeemed_at', v_claim.redeemed_at,
+        'redemption_notes', v_claim.redemption_notes
+      );
+    ELSE
+      RETURN jsonb_build_object('error_code', 'OFFER_EXPIRED', 'expiry_date', v_expiry);
+    END IF;
+  END IF;
+
+  RETURN to_jsonb(v_claim) || jsonb_build_object(
+    'offers', (
+      SELECT jsonb_build_object(
+               'title', o.title,
+               'description', o.description,
+               'discount_type', o.discount_type,
+               'discount_value', o.discount_value,
+               'original_price', o.original_price,
+               'discounted_price', o.discounted_price,
+               'products', (SELECT jsonb_build_object('name', p.name) FROM public.products p WHERE p.id = o.product_id)
+             )
+        FROM public.offers o
+       WHERE o.id = v_claim.offer_id
+    ),
+    'profiles', (
+      SELECT jsonb_build_object('first_name', pr.first_name, 'last_name', pr.last_name, 'email', pr.email)
+        FROM public.profiles pr
+       WHERE pr.id = v_claim.user_id
+    ),
+    'businesses', (
+      SELECT jsonb_build_object(
+               'business_name', b.business_name,
+               'business_address', b.business_address,
+               'phone_number', b.phone_number,
+               'business_website', b.business_website
+             )
+        FROM public.businesses b
+       WHERE b.id = p_business_id
+    )
+  );
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.redeem_claim(text, uuid, text) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.redeem_claim(text, uuid, text) TO service_role;
@@ -0,0 +1,63 @@
+-- migrations/007_offline_redemptions.sql
+-- Batch reconciliation of redemptions accepted offline.
+--
+-- POST /business/redeem/offline verifies signed claim tokens without touching
+-- the database, then writes the scans that pass with one
+-- reconcile_offline_redemptions() call per request. Each item is applied with the
+-- same conditional update as /redeem/scan (owner business, not yet redeemed)
+-- and reported back as 'redeemed' or 'conflict' (unknown claim, other
+-- business, or already redeemed elsewhere).
+--
+-- scanned_at comes from the device clock, so it is capped at now() and must
+-- fall between the claim's creation and the offer's current expiry_date
+-- (which may be earlier than the expiry signed into the token); otherwise
+-- the item is reported as 'scanned_before_claim' or 'expired'.
+--
+-- p_redemptions: [{"unique_claim_id", "business_id", "scanned_at", "redemption_notes"}, ...]
+
+CREATE OR REPLACE FUNCTION public.reconcile_offline_redemptions(p_redemptions jsonb)
+RETURNS TABLE (unique_claim_id text, status text)
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  WITH items AS (
+    SELECT DISTINCT ON (r.unique_claim_id)
+           r.unique_claim_id,
+           r.business_id,
+           LEAST(COALESCE(r.scanned_at, now()), now()) AS scanned_at,
+           r.redemption_notes
+      FROM jsonb_to_recordset(p_redemptions)
+           AS r(unique_claim_id text, business_id uuid, scanned_at timestamptz, redemption_notes text)
+     ORDER BY r.unique_claim_id, r.scanned_at
+  ),
+  redeemed AS (
+    UPDATE public.claimed_offers co
+       SET is_redeemed = true,
+           redeemed_at = i.scanned_at,
+           redemption_notes = i.redemption_notes
+      FROM items i, public.offers o
+     WHERE co.unique_claim_id = i.unique_claim_id
+       AND o.id = co.offer_id
+       AND o.business_id = i.business_id
+       AND NOT co.is_redeemed
+       AND i.scanned_at >= co.claimed_at
+       AND i.scanned_at <= o.expiry_date
+    RETURNING co.unique_claim_id
+  )
+  SELECT i.unique_claim_id,
+         CASE
+           WHEN r.unique_claim_id IS NOT NULL THEN 'redeemed'
+           WHEN o.id IS NULL OR co.is_redeemed THEN 'conflict'
+           WHEN i.scanned_at > o.expiry_date THEN 'expired'
+           WHEN i.scanned_at < co.claimed_at THEN 'scanned_before_claim'
+           ELSE 'conflict'
+         END
+    FROM items i
+    LEFT JOIN redeemed r ON r.unique_claim_id = i.unique_claim_id
+    LEFT JOIN public.claimed_offers co ON co.unique_claim_id = i.unique_claim_id
+    LEFT JOIN public.offers o ON o.id = co.offer_id AND o.business_id = i.business_id;
+$$;
+
+REVOKE ALL ON FUNCTION public.reconcile_offline_redemptions(jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.reconcile_offline_redemptions(jsonb) TO service_role;
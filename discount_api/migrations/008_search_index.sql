@@ -0,0 +1,134 @@
+-- migrations/008_search_index.sql
+-- Indexed full-text and fuzzy search for offers and products.
+--
+-- The customer search endpoints filtered with title/name/description ILIKE
+-- '%q%', which cannot use a btree index and scans every row. Search now goes
+-- through search_offers() / search_products(), which match
+--   * a weighted tsvector (title/name 'A', description 'B') against
+--     websearch_to_tsquery(), served by an expression GIN index, and
+--   * word similarity on the title/name (pg_trgm), served by a trigram GIN
+--     index, for typos and partial words ("piza", "burg").
+-- Each row carries a `rank` column (higher is a better match) that callers
+-- order by, with id as the tie-breaker; PostgREST can still filter, embed,
+-- count, order and paginate the result like a table.
+--
+-- The functions return the row types of offer_search_results /
+-- product_search_results: `rank` followed by every column of the table.
+-- Those views only describe the shape (and carry the table's foreign keys
+-- for embedding); they return no rows. Migrations that add columns to
+-- offers or products re-create them so the new columns come through.
+--
+-- The tsvector is an index expression rather than a stored column so that
+-- select=* responses do not grow a search_vector field.
+--
+-- The search functions are plain SQL without SECURITY DEFINER or SET so the
+-- planner can inline them into the PostgREST query (filters and LIMIT are
+-- pushed down) and RLS applies as for a direct table read. pg_trgm objects
+-- are therefore schema-qualified.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+
+CREATE OR REPLACE FUNCTION public.search_document(p_title text, p_description text)
+RETURNS tsvector
+LANGUAGE sql
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+  SELECT setweight(to_tsvector('english'::regconfig, coalesce(p_title, '')), 'A')
+      || setweight(to_tsvector('english'::regconfig, coalesce(p_description, '')), 'B')
+$$;
+
+CREATE INDEX IF NOT EXISTS offers_search_document_idx
+  ON public.offers USING gin (public.search_document(title, description));
+
+CREATE INDEX IF NOT EXISTS offers_title_trgm_idx
+  ON public.offers USING gin (title extensions.gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS products_search_document_idx
+  ON public.products USING gin (public.search_document(name, description));
+
+CREATE INDEX IF NOT EXISTS products_name_trgm_idx
+  ON public.products USING gin (name extensions.gin_trgm_ops);
+
+CREATE OR REPLACE VIEW public.offer_search_results
+WITH (security_invoker = true) AS
+  SELECT 0::real AS rank, o.* FROM public.offers o WHERE false;
+
+CREATE OR REPLACE VIEW public.product_search_results
+WITH (security_invoker = true) AS
+  SELECT 0::real AS rank, p.* FROM public.products p WHERE false;
+
+DROP FUNCTION IF EXISTS public.search_offers(text);
+DROP FUNCTION IF EXISTS public.search_products(text);
+
+CREATE FUNCTION public.search_offers(p_query text)
+RETURNS SETOF public.offer_search_results
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT ts_rank_cd(public.search_document(o.title, o.description), q)
+           + extensions.word_similarity(p_query, o.title) AS rank,
+         o.*
+    FROM public.offers o,
+         websearch_to_tsquery('english'::regconfig, p_query) q
+   WHERE public.search_document(o.title, o.description) @@ q
+      OR p_query OPERATOR(extensions.<%) o.title
+$$;
+
+CREATE FUNCTION public.search_products(p_query text)
+RETURNS SETOF public.product_search_results
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT ts_rank_cd(public.search_document(p.name, p.description), q)
+           + extensions.word_similarity(p_query, p.name) AS rank,
+         p.*
+    FROM public.products p,
+         websearch_to_tsquery('english'::regconfig, p_query) q
+   WHERE public.search_document(p.name, p.description) @@ q
+      OR p_query OPERATOR(extensions.<%) p.name
+$$;
+
+-- Highlighted title/name and description snippets for one page of results.
+-- Matched words are wrapped in <mark></mark>; fuzzy-only matches come back
+-- unmarked.
+CREATE OR REPLACE FUNCTION public.offer_search_highlights(p_ids uuid[], p_query text)
+RETURNS TABLE (id uuid, highlights jsonb)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT o.id,
+         jsonb_build_object(
+           'title', ts_headline('english'::regconfig, o.title, q,
+                                'HighlightAll=true, StartSel=<mark>, StopSel=</mark>'),
+           'description', ts_headline('english'::regconfig, coalesce(o.description, ''), q,
+                                      'MaxWords=35, MinWords=15, StartSel=<mark>, StopSel=</mark>')
+         )
+    FROM public.offers o,
+         websearch_to_tsquery('english'::regconfig, p_query) q
+   WHERE o.id = ANY(p_ids)
+$$;
+
+CREATE OR REPLACE FUNCTION public.product_search_highlights(p_ids uuid[], p_query text)
+RETURNS TABLE (id uuid, highlights jsonb)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT p.id,
+         jsonb_build_object(
+           'name', ts_headline('english'::regconfig, p.name, q,
+                               'HighlightAll=true, StartSel=<mark>, StopSel=</mark>'),
+           'description', ts_headline('english'::regconfig, coalesce(p.description, ''), q,
+                                      'MaxWords=35, MinWords=15, StartSel=<mark>, StopSel=</mark>')
+         )
+    FROM public.products p,
+         websearch_to_tsquery('english'::regconfig, p_query) q
+   WHERE p.id = ANY(p_ids)
+$$;
+
+GRANT SELECT ON public.offer_search_results, public.product_search_results TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.search_document(text, text) TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.search_offers(text) TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.search_products(text) TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.offer_search_highlights(uuid[], text) TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.product_search_highlights(uuid[], text) TO anon, authenticated, service_role;
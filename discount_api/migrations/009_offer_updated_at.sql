@@ -0,0 +1,35 @@
+-- migrations/009_offer_updated_at.sql
+-- offers.updated_at, kept current on every change.
+--
+-- The in-memory offer search index (app/utils/offer_index.py) refreshes
+-- incrementally by reading offers with updated_at past its watermark. The
+-- column is added if missing, and the trigger stamps every UPDATE (the API
+-- only sets it on some paths; claim_offer() bumps current_claims without
+-- touching it) so claim counts and edits reach the index.
+
+ALTER TABLE public.offers
+  ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();
+
+-- search_offers() returns rows shaped like this view (migration 008)
+CREATE OR REPLACE VIEW public.offer_search_results
+WITH (security_invoker = true) AS
+  SELECT 0::real AS rank, o.* FROM public.offers o WHERE false;
+
+CREATE OR REPLACE FUNCTION public.touch_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.updated_at := now();
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS offers_touch_updated_at ON public.offers;
+CREATE TRIGGER offers_touch_updated_at
+  BEFORE UPDATE ON public.offers
+  FOR EACH ROW
+  EXECUTE FUNCTION public.touch_updated_at();
+
+CREATE INDEX IF NOT EXISTS offers_updated_at_idx
+  ON public.offers (updated_at);
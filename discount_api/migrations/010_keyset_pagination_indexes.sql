@@ -0,0 +1,27 @@
+-- migrations/010_keyset_pagination_indexes.sql
+-- Indexes for keyset (cursor) pagination.
+--
+-- List endpoints now page with ORDER BY <sort key>, id and a
+-- "(key, id) after the cursor" filter instead of OFFSET. With an index on
+-- (filter, key, id) each page is an index range scan that starts at the
+-- cursor, so page 500 costs the same as page 1.
+
+CREATE INDEX IF NOT EXISTS products_business_created_at_id_idx
+  ON public.products (business_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS offers_business_created_at_id_idx
+  ON public.offers (business_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS offers_discount_value_id_idx
+  ON public.offers (discount_value, id)
+  WHERE is_active;
+
+CREATE INDEX IF NOT EXISTS claimed_offers_user_claimed_at_id_idx
+  ON public.claimed_offers (user_id, claimed_at, id);
+
+CREATE INDEX IF NOT EXISTS claimed_offers_redeemed_at_id_idx
+  ON public.claimed_offers (redeemed_at, id)
+  WHERE is_redeemed;
+
+CREATE INDEX IF NOT EXISTS businesses_business_name_id_idx
+  ON public.businesses (business_name, id);
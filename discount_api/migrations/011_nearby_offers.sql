@@ -0,0 +1,86 @@
+-- migrations/011_nearby_offers.sql
+-- Indexed radius search for /customer/offers/nearby and /search-by-address.
+--
+-- businesses stores plain latitude/longitude numerics, so every nearby
+-- search computed distances for every business, and the category filter
+-- was applied in Python after a second query. business_location() turns the
+-- pair into a PostGIS geography point; a GiST index over that expression
+-- lets ST_DWithin find businesses inside the radius with an index scan.
+-- nearby_offers() applies radius, category, active window, ordering and
+-- limit in the one query.
+--
+-- The point is an index expression rather than a stored column so that
+-- select=* on businesses does not grow a geography field.
+
+CREATE EXTENSION IF NOT EXISTS postgis WITH SCHEMA extensions;
+
+CREATE OR REPLACE FUNCTION public.business_location(p_latitude numeric, p_longitude numeric)
+RETURNS extensions.geography
+LANGUAGE sql
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+  SELECT CASE
+           WHEN p_latitude IS NOT NULL AND p_longitude IS NOT NULL THEN
+             extensions.ST_SetSRID(
+               extensions.ST_MakePoint(p_longitude::float8, p_latitude::float8), 4326
+             )::extensions.geography
+         END
+$$;
+
+CREATE INDEX IF NOT EXISTS businesses_location_idx
+  ON public.businesses USING gist (public.business_location(latitude, longitude));
+
+CREATE INDEX IF NOT EXISTS businesses_category_id_idx
+  ON public.businesses (category_id);
+
+CREATE INDEX IF NOT EXISTS offers_business_active_window_idx
+  ON public.offers (business_id, expiry_date, start_date)
+  WHERE is_active;
+
+CREATE OR REPLACE FUNCTION public.nearby_offers(
+  p_latitude float8,
+  p_longitude float8,
+  p_radius_km float8,
+  p_limit integer DEFAULT 20,
+  p_category_id integer DEFAULT NULL
+)
+RETURNS jsonb
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public, extensions
+AS $$
+  WITH origin AS (
+    SELECT ST_SetSRID(ST_MakePoint(p_longitude, p_latitude), 4326)::geography AS point
+  ),
+  nearby AS (
+    SELECT to_jsonb(o) || jsonb_build_object(
+             'business_name', b.business_name,
+             'business_address', COALESCE(b.formatted_address, b.business_address),
+             'business_avatar_url', b.avatar_url,
+             'is_verified', b.is_verified,
+             'business_category_id', b.category_id,
+             'latitude', b.latitude,
+             'longitude', b.longitude,
+             'distance_km', ST_Distance(public.business_location(b.latitude, b.longitude), origin.point) / 1000
+           ) AS offer,
+           ST_Distance(public.business_location(b.latitude, b.longitude), origin.point) AS distance
+      FROM origin
+      JOIN public.businesses b
+        ON ST_DWithin(public.business_location(b.latitude, b.longitude), origin.point, p_radius_km * 1000)
+      JOIN public.offers o
+        ON o.business_id = b.id
+       AND o.is_active
+       AND o.start_date <= now()
+       AND o.expiry_date >= now()
+     WHERE p_category_id IS NULL OR b.category_id = p_category_id
+     ORDER BY distance, o.id
+     LIMIT p_limit
+  )
+  SELECT COALESCE(jsonb_agg(offer ORDER BY distance), '[]'::jsonb)
+    FROM nearby
+$$;
+
+REVOKE ALL ON FUNCTION public.nearby_offers(float8, float8, float8, integer, integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.nearby_offers(float8, float8, float8, integer, integer) TO service_role;
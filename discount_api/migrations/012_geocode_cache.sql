@@ -0,0 +1,20 @@
+-- migrations/012_geocode_cache.sql
+-- Shared geocoding results for /customer/offers/search-by-address.
+--
+-- Each API worker keeps an in-memory LRU of geocoded addresses
+-- (app/utils/geocoding.py). With GEOCODE_PERSISTENT_CACHE enabled, results
+-- are also stored here keyed by the normalized address, so they survive
+-- restarts and are shared between workers instead of each one paying the
+-- geocoder's latency (and quota) for the same popular addresses.
+-- Only successful lookups are stored; the API ignores rows older than its
+-- cache TTL and overwrites them on the next lookup.
+
+CREATE TABLE IF NOT EXISTS public.geocode_cache (
+  address_key text NOT NULL,
+  provider text NOT NULL,
+  result jsonb NOT NULL,
+  updated_at timestamptz NOT NULL DEFAULT now(),
+  CONSTRAINT geocode_cache_pkey PRIMARY KEY (address_key)
+);
+
+ALTER TABLE public.geocode_cache ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,24 @@
+-- migrations/013_offer_display_fields.sql
+-- Stored display fields for offers.
+--
+-- Offer listings used to run OfferCalculator for every offer on every
+-- request to build display_text, the type-specific purchase conditions and
+-- the savings/discount text. These depend only on the offer's own columns,
+-- so the business routes now compute them (app/utils/offer_display.py)
+-- when an offer is created or updated and store them here; listing
+-- endpoints just read them. The time-dependent parts of conditions_text
+-- (claims left, days to expiry) are still added on read.
+--
+-- Existing rows stay NULL until their next update; the API computes their
+-- fields on read, once per (id, updated_at).
+
+ALTER TABLE public.offers
+  ADD COLUMN IF NOT EXISTS display_text text,
+  ADD COLUMN IF NOT EXISTS terms_text text,
+  ADD COLUMN IF NOT EXISTS discount_text text,
+  ADD COLUMN IF NOT EXISTS savings_amount numeric;
+
+-- search_offers() returns rows shaped like this view (migration 008)
+CREATE OR REPLACE VIEW public.offer_search_results
+WITH (security_invoker = true) AS
+  SELECT 0::real AS rank, o.* FROM public.offers o WHERE false;
@@ -35,12 +35,12 @@ async def test_connections():
         from app.core.database import supabase
         
         # Test a simple table operation
-        result = supabase.table("profiles").select("*").limit(1).execute()
+        result = await supabase.table("profiles").select("*").limit(1).execute()
         print(f"✅ Supabase operations: SUCCESS - Found {len(result.data)} profiles")
         
         # Test if we can query other tables (like categories)
         try:
-            categories_result = supabase.table("categories").select("*").limit(3).execute()
+            categories_result = await supabase.table("categories").select("*").limit(3).execute()
             print(f"✅ Categories table: SUCCESS - Found {len(categories_result.data)} categories")
         except Exception as e:
             print(f"ℹ️  Categories table: {e}")
@@ -52,7 +52,7 @@ async def test_connections():
     # Test Supabase connection
     print("\n🔐 Testing Supabase connection...")
     try:
-        result = supabase.table("profiles").select("id").limit(1).execute()
+        result = await supabase.table("profiles").select("id").limit(1).execute()
         print("✅ Supabase connection: SUCCESS")
         print(f"   Found {len(result.data)} profiles in test query")
     except Exception as e:
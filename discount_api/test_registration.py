@@ -24,7 +24,7 @@ async def test_registration():
     try:
         # Step 1: Test Supabase Auth registration
         print("\n🔐 Step 1: Testing Supabase Auth...")
-        auth_response = supabase.auth.sign_up({
+        auth_response = await supabase.auth.sign_up({
             "email": test_email,
             "password": test_password,
             "options": {
@@ -48,7 +48,7 @@ async def test_registration():
         
         # Step 2: Check if profile exists
         print(f"\n📊 Step 2: Checking if profile exists for user {user_id}...")
-        existing_profile = supabase.table("profiles").select("*").eq("id", user_id).execute()
+        existing_profile = await supabase.table("profiles").select("*").eq("id", user_id).execute()
         
         print(f"   Existing profiles found: {len(existing_profile.data)}")
         if existing_profile.data:
@@ -65,7 +65,7 @@ async def test_registration():
                 "phone": "1234567890"
             }
             
-            result = supabase.table("profiles").update(profile_data).eq("id", user_id).execute()
+            result = await supabase.table("profiles").update(profile_data).eq("id", user_id).execute()
             print(f"✅ Profile updated: {len(result.data)} records")
             if result.data:
                 print(f"   Updated profile: {result.data[0]}")
@@ -79,7 +79,7 @@ async def test_registration():
                 "phone": "1234567890"
             }
             
-            result = supabase.table("profiles").insert(profile_data).execute()
+            result = await supabase.table("profiles").insert(profile_data).execute()
             print(f"✅ Profile created: {len(result.data)} records")
             if result.data:
                 print(f"   New profile: {result.data[0]}")
@@ -90,7 +90,7 @@ async def test_registration():
         print(f"\n🧹 Cleaning up test user...")
         try:
             # Delete profile first
-            supabase.table("profiles").delete().eq("id", user_id).execute()
+            await supabase.table("profiles").delete().eq("id", user_id).execute()
             print("✅ Test profile deleted")
         except Exception as e:
             print(f"⚠️  Profile cleanup warning: {e}")
@@ -0,0 +1,19 @@
+# tests/conftest.py
+"""
+Unit tests for app.utils. Settings are required at import time, so
+placeholder values are provided when no environment is configured; the
+tests never reach Supabase.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+for name, value in {
+    "SUPABASE_URL": "http://localhost:54321",
+    "SUPABASE_ANON_KEY": "test.anon.key",
+    "SUPABASE_SERVICE_ROLE_KEY": "test.service.key",
+    "DATABASE_URL": "postgresql://localhost/test",
+    "SECRET_KEY": "test-secret",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,22 @@
+# tests/test_claim_utils.py
+from app.core.config import settings
+from app.utils.claim_utils import (
+    generate_qr_code, generate_verification_url, get_claim_display_info, parse_qr_code_content
+)
+
+CLAIM_ID = "AB12CD34"
+
+
+def test_verification_urls_share_one_form():
+    expected = f"{settings.frontend_url}/verify/{CLAIM_ID}"
+
+    assert generate_verification_url(CLAIM_ID) == expected
+    assert get_claim_display_info("in_store", CLAIM_ID, "qr.png")["verification_url"] == expected
+    assert generate_qr_code(CLAIM_ID)[1] == expected
+
+
+def test_verification_url_parses_back_to_the_claim_id():
+    url = generate_verification_url(CLAIM_ID)
+
+    assert parse_qr_code_content(url) == CLAIM_ID
+    assert parse_qr_code_content(f"{url}?t=signed.token") == CLAIM_ID
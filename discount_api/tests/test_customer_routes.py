@@ -0,0 +1,73 @@
+# tests/test_customer_routes.py
+"""
+Every customer endpoint is registered on the mounted router and reachable
+ahead of /offers/{offer_id}. Requests here stop at validation or auth, so
+they never reach Supabase.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+
+CUSTOMER_ROUTES = [
+    ("GET", "/api/v1/customer/search/products"),
+    ("GET", "/api/v1/customer/search/offers"),
+    ("GET", "/api/v1/customer/offers/trending"),
+    ("GET", "/api/v1/customer/offers/expiring-soon"),
+    ("POST", "/api/v1/customer/offers/{offer_id}/save"),
+    ("DELETE", "/api/v1/customer/offers/{offer_id}/save"),
+    ("GET", "/api/v1/customer/saved-offers"),
+    ("POST", "/api/v1/customer/offers/{offer_id}/claim"),
+    ("GET", "/api/v1/customer/claimed-offers/{claim_id}/qr.{image_format}"),
+    ("GET", "/api/v1/customer/claimed-offers/{claim_id}/qr"),
+    ("GET", "/api/v1/customer/claimed-offers"),
+    ("GET", "/api/v1/customer/offers/{offer_id}/status"),
+    ("GET", "/api/v1/customer/businesses"),
+    ("GET", "/api/v1/customer/products/{product_id}"),
+    ("GET", "/api/v1/customer/offers/nearby"),
+    ("POST", "/api/v1/customer/offers/search-by-address"),
+    ("GET", "/api/v1/customer/offers/categories"),
+    ("GET", "/api/v1/customer/offers/search"),
+    ("GET", "/api/v1/customer/offers/{offer_id}"),
+    ("POST", "/api/v1/customer/offers/{offer_id}/calculate"),
+]
+
+# Not entered as a context manager, so the lifespan (database check,
+# index warm-up) doesn't run
+client = TestClient(app)
+
+
+def test_customer_routes_are_registered_once():
+    registered = [
+        (method, route.path)
+        for route in app.routes
+        if route.path.startswith("/api/v1/customer/")
+        for method in getattr(route, "methods", ())
+    ]
+    assert sorted(registered) == sorted(CUSTOMER_ROUTES)
+
+
+@pytest.mark.parametrize("method, path", [
+    ("POST", "/api/v1/customer/offers/o1/save"),
+    ("DELETE", "/api/v1/customer/offers/o1/save"),
+    ("GET", "/api/v1/customer/saved-offers"),
+    ("POST", "/api/v1/customer/offers/o1/claim"),
+    ("GET", "/api/v1/customer/claimed-offers"),
+    ("GET", "/api/v1/customer/claimed-offers/CLM1/qr"),
+    ("GET", "/api/v1/customer/offers/o1/status"),
+])
+def test_authenticated_routes_require_credentials(method, path):
+    response = client.request(method, path, json={"claim_type": "online"})
+    assert response.status_code in (401, 403)
+
+
+def test_nearby_is_not_routed_as_an_offer_id():
+    response = client.get("/api/v1/customer/offers/nearby")
+    assert response.status_code == 422
+    missing = {error["loc"][-1] for error in response.json()["detail"]}
+    assert {"lat", "lng"} <= missing
+
+
+def test_search_by_address_requires_an_address():
+    response = client.post("/api/v1/customer/offers/search-by-address", json={"address": "  "})
+    assert response.status_code == 400
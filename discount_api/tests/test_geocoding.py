@@ -0,0 +1,94 @@
+# tests/test_geocoding.py
+import asyncio
+
+from app.utils.geocoding import GeocodingService, StaticGeocodingProvider
+
+DOWNTOWN = {
+    "latitude": 40.7128,
+    "longitude": -74.006,
+    "formatted_address": "New York, NY, USA",
+    "place_id": "downtown",
+    "address_components": [],
+}
+
+
+def make_geocoder(**kwargs) -> GeocodingService:
+    provider = StaticGeocodingProvider({"1 Main St, New York": DOWNTOWN})
+    return GeocodingService(provider=provider, cache_size=100, ttl=60, persistent=False, **kwargs)
+
+
+def test_cache_hit_uses_normalized_address():
+    async def scenario():
+        geocoder = make_geocoder()
+        try:
+            first = await geocoder.geocode("1 Main St, New York")
+            second = await geocoder.geocode("  1 main st ,new york. ")
+            return first, second, geocoder.get_stats()
+        finally:
+            await geocoder.aclose()
+
+    first, second, stats = asyncio.run(scenario())
+    assert first == DOWNTOWN
+    assert second == DOWNTOWN
+    assert stats["lookups"] == 1
+    assert stats["hits"] == 1
+
+
+def test_results_are_copies():
+    async def scenario():
+        geocoder = make_geocoder()
+        try:
+            (await geocoder.geocode("1 Main St, New York"))["latitude"] = 0
+            return await geocoder.geocode("1 Main St, New York")
+        finally:
+            await geocoder.aclose()
+
+    assert asyncio.run(scenario())["latitude"] == DOWNTOWN["latitude"]
+
+
+def test_not_found_is_cached_for_negative_ttl():
+    async def scenario():
+        geocoder = make_geocoder(negative_ttl=0.05)
+        try:
+            assert await geocoder.geocode("Nowhere") is None
+            assert await geocoder.geocode("nowhere") is None
+            cached_lookups = geocoder.get_stats()["lookups"]
+
+            await asyncio.sleep(0.1)
+            assert await geocoder.geocode("Nowhere") is None
+            return cached_lookups, geocoder.get_stats()["lookups"]
+        finally:
+            await geocoder.aclose()
+
+    cached_lookups, expired_lookups = asyncio.run(scenario())
+    assert cached_lookups == 1
+    assert expired_lookups == 2
+
+
+def test_concurrent_lookups_share_one_provider_call():
+    async def scenario():
+        geocoder = make_geocoder()
+        try:
+            results = await asyncio.gather(*(geocoder.geocode("1 Main St, New York") for _ in range(5)))
+            return results, geocoder.get_stats()
+        finally:
+            await geocoder.aclose()
+
+    results, stats = asyncio.run(scenario())
+    assert results == [DOWNTOWN] * 5
+    assert stats["lookups"] == 1
+    assert stats["coalesced"] == 4
+    assert stats["in_flight"] == 0
+
+
+def test_blank_address_is_not_looked_up():
+    async def scenario():
+        geocoder = make_geocoder()
+        try:
+            return await geocoder.geocode(" , "), geocoder.get_stats()
+        finally:
+            await geocoder.aclose()
+
+    location, stats = asyncio.run(scenario())
+    assert location is None
+    assert stats["lookups"] == 0
@@ -0,0 +1,48 @@
+# tests/test_image_utils.py
+import io
+import os
+
+from PIL import Image
+
+from app.utils.image_utils import compress_image, create_image_variants, process_product_image
+from app.utils.image_variants import IMAGE_VARIANT_WIDTHS
+
+
+def make_jpeg(width: int, height: int) -> bytes:
+    # Noise, so the encode is large enough to need compressing
+    img = Image.frombytes("RGB", (width, height), os.urandom(width * height * 3))
+    output = io.BytesIO()
+    img.save(output, format="JPEG", quality=95)
+    return output.getvalue()
+
+
+def test_process_product_image_matches_separate_steps():
+    data = make_jpeg(2400, 1600)
+
+    file_content, info, variants = process_product_image(data, True, max_size_bytes=400_000)
+    compressed, compressed_info = compress_image(data, max_size_bytes=400_000)
+
+    assert file_content == compressed
+    assert info["final_dimensions"] == compressed_info["final_dimensions"]
+    assert info["original_dimensions"] == (2400, 1600)
+    assert len(file_content) <= 400_000
+    assert variants == create_image_variants(data)
+    assert len(variants) == 2 * len(IMAGE_VARIANT_WIDTHS)
+
+
+def test_process_product_image_keeps_small_uploads():
+    data = make_jpeg(300, 200)
+
+    file_content, info, variants = process_product_image(data, False)
+
+    assert file_content is data
+    assert info["message"] == "No compression needed"
+    assert Image.open(io.BytesIO(variants["160.jpg"])).width == 160
+
+
+def test_process_product_image_keeps_undecodable_data():
+    file_content, info, variants = process_product_image(b"not an image", True)
+
+    assert file_content == b"not an image"
+    assert "error" in info
+    assert variants == {}
@@ -0,0 +1,157 @@
+# tests/test_page_models.py
+"""
+The list endpoints return ORJSONResponse directly, so FastAPI never checks
+their payloads against the declared page models; these tests do.
+"""
+import asyncio
+import copy
+
+from app.api.routes.business import business_offer_payload, business_product_payload
+from app.api.routes.customer import enrich_offers_with_product_data, nearby_offer_payload, search_offer_payload
+from app.schemas.business import BusinessOfferPage, BusinessProductPage, OfferListResponse
+from app.schemas.customer import NearbyOffersResponse, OfferSearchPage, OfferSearchResponse
+
+IMAGE_URL = "https://example.supabase.co/storage/v1/object/public/product-images/businesses/u1/abc/original.jpg"
+
+CATEGORY = {"id": 3, "name": "Groceries", "description": None, "created_at": "2026-01-01T00:00:00+00:00"}
+
+PRODUCT = {
+    "id": "6f1d7a8e-2b4c-4d3e-9f10-112233445566",
+    "business_id": "0c9a1b2d-3e4f-4a5b-8c6d-778899aabbcc",
+    "name": "Sourdough loaf",
+    "description": "Baked daily",
+    "price": 6.5,
+    "image_url": IMAGE_URL,
+    "category_id": 3,
+    "is_active": True,
+    "created_at": "2026-01-02T09:00:00+00:00",
+    "updated_at": "2026-01-02T09:00:00+00:00",
+    "categories": CATEGORY,
+}
+
+OFFER = {
+    "id": "9a8b7c6d-5e4f-4a3b-8c2d-1e0f9a8b7c6d",
+    "business_id": PRODUCT["business_id"],
+    "product_id": PRODUCT["id"],
+    "title": "Two for one sourdough",
+    "description": None,
+    "discount_type": "bogo",
+    "discount_value": 0,
+    "original_price": None,
+    "discounted_price": None,
+    "start_date": "2026-01-01T00:00:00+00:00",
+    "expiry_date": "2099-01-01T00:00:00+00:00",
+    "max_claims": 50,
+    "current_claims": 12,
+    "terms_conditions": None,
+    "minimum_purchase_amount": None,
+    "minimum_quantity": None,
+    "buy_quantity": 1,
+    "get_quantity": 1,
+    "get_discount_percentage": 100,
+    "offer_parameters": None,
+    "is_active": True,
+    "created_at": "2026-01-02T09:00:00+00:00",
+    "updated_at": "2026-01-02T09:00:00+00:00",
+    "display_text": None,
+}
+
+
+def test_business_product_page():
+    products = [business_product_payload(copy.deepcopy(PRODUCT), "Corner Bakery")]
+    page = BusinessProductPage.model_validate({
+        "success": True,
+        "products": products,
+        "pagination": {
+            "page": 1, "limit": 10, "total": 1, "pages": 1,
+            "total_is_estimate": True, "has_next": False, "next_cursor": None,
+        },
+    })
+
+    product = page.products[0]
+    assert product.category.name == "Groceries"
+    assert product.business == {"business_name": "Corner Bakery"}
+    assert product.image_variants["480"]["webp"].endswith("/abc/480.webp")
+
+
+def test_business_offer_page():
+    row = copy.deepcopy(OFFER)
+    row["products"] = copy.deepcopy(PRODUCT)
+    row["businesses"] = {"business_name": "Corner Bakery"}
+    page = BusinessOfferPage.model_validate({
+        "offers": [business_offer_payload(row)],
+        "pagination": {
+            "page": 1, "limit": 10, "total": 1, "totalPages": 1,
+            "totalIsEstimate": True, "hasNext": False, "nextCursor": None,
+        },
+    })
+
+    assert page.offers[0].product.name == "Sourdough loaf"
+
+
+def test_offer_search_page():
+    row = copy.deepcopy(OFFER)
+    row["rank"] = 0.42
+    row["products"] = copy.deepcopy(PRODUCT)
+    row["businesses"] = {"business_name": "Corner Bakery", "is_verified": True, "avatar_url": None}
+    row["highlights"] = {"title": "Two for one <mark>sourdough</mark>"}
+    page = OfferSearchPage.model_validate({
+        "offers": [search_offer_payload(row)],
+        "pagination": {
+            "page": 1, "size": 20, "total": 1, "total_pages": 1, "total_is_estimate": False,
+            "has_next": False, "has_prev": False, "next_cursor": None,
+        },
+        "filters_applied": {"search": "sourdough", "sort_by": "relevance"},
+    })
+
+    offer = page.offers[0]
+    assert offer.business.business_name == "Corner Bakery"
+    assert offer.product.image_variants is not None
+    assert offer.display_text
+    assert "38 claims remaining" in offer.conditions_text
+
+
+def test_nearby_offers_response():
+    row = copy.deepcopy(OFFER)
+    row.update({
+        "business_name": "Corner Bakery",
+        "business_address": "1 Main St, New York, NY",
+        "business_avatar_url": None,
+        "is_verified": False,
+        "business_category_id": 3,
+        "latitude": 40.7128,
+        "longitude": -74.006,
+        "distance_km": 1.23456,
+    })
+    response = NearbyOffersResponse.model_validate({
+        "offers": [nearby_offer_payload(row)],
+        "search_location": {"latitude": 40.71, "longitude": -74.0},
+        "search_radius_km": 10.0,
+        "total_found": 1,
+        "message": "Found 1 offers within 10.0km",
+    })
+
+    offer = response.offers[0]
+    assert offer.distance_km == 1.23
+    assert offer.remaining_claims == 38
+    assert offer.claim_percentage == 24
+
+
+class StaticProductLoader:
+    async def load_many(self, product_ids):
+        return {str(product_id): copy.deepcopy(PRODUCT) for product_id in product_ids}
+
+
+def test_trending_offers_carry_their_product():
+    row = copy.deepcopy(OFFER)
+    row["businesses"] = {"business_name": "Corner Bakery", "is_verified": True, "avatar_url": None}
+    enriched = asyncio.run(enrich_offers_with_product_data([row], StaticProductLoader()))
+
+    offer_data = enriched[0]
+    offer_data["business"] = offer_data.pop("businesses")
+    page = OfferListResponse(offers=[OfferSearchResponse(**offer_data)], total=1, page=1, size=10, has_next=False)
+
+    offer = page.model_dump()["offers"][0]
+    assert offer["discount_type"] == "bogo"
+    assert offer["business"]["business_name"] == "Corner Bakery"
+    assert offer["product"]["image_variants"]["160"]["jpg"].endswith("/abc/160.jpg")
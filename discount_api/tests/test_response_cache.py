@@ -0,0 +1,149 @@
+# tests/test_response_cache.py
+import asyncio
+import json
+import time
+
+from app.utils.response_cache import (
+    OFFERS_TAG, CacheRule, RedisResponseCacheBackend, ResponseCache, ResponseCacheMiddleware, product_tag
+)
+
+
+class FakeRedis:
+    """The MGET / SET PX / INCR subset RedisResponseCacheBackend uses, in memory"""
+
+    def __init__(self):
+        self._values = {}
+        self._expires = {}
+
+    def _get(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and time.monotonic() >= expires:
+            self._values.pop(key, None)
+            self._expires.pop(key, None)
+        return self._values.get(key)
+
+    async def mget(self, keys):
+        return [self._get(key) for key in keys]
+
+    async def set(self, key, value, px=None):
+        self._values[key] = value
+        if px is None:
+            self._expires.pop(key, None)
+        else:
+            self._expires[key] = time.monotonic() + px / 1000
+
+    async def incr(self, key):
+        value = int(self._get(key) or 0) + 1
+        self._values[key] = str(value).encode()
+        return value
+
+    async def aclose(self):
+        pass
+
+
+def make_app():
+    """ASGI app answering with how many times it has been called"""
+    calls = {"count": 0}
+
+    async def app(scope, receive, send):
+        calls["count"] += 1
+        body = json.dumps({"path": scope["path"], "count": calls["count"]}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json")],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    return app, calls
+
+
+def make_middleware(ttl=0.05, stale_ttl=5):
+    app, calls = make_app()
+    cache = ResponseCache(RedisResponseCacheBackend(FakeRedis(), "rc:"))
+    middleware = ResponseCacheMiddleware(app, cache, [
+        CacheRule(r"^/api/v1/customer/offers/trending/?$", ttl, stale_ttl=stale_ttl),
+        CacheRule(
+            r"^/api/v1/customer/products/(?P<product_id>[^/]+)/?$",
+            ttl,
+            tags=lambda match: (product_tag(match["product_id"]),),
+            stale_ttl=stale_ttl,
+        ),
+    ])
+    return middleware, cache, calls
+
+
+async def get(middleware, path, query_string=b""):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": query_string, "headers": []}
+    await middleware(scope, receive, send)
+    headers = dict(messages[0]["headers"])
+    return headers[b"x-cache"].decode(), json.loads(messages[1]["body"])
+
+
+async def settle(cache):
+    """Wait for background refreshes to finish"""
+    while cache.get_stats()["in_flight"]:
+        await asyncio.sleep(0.01)
+
+
+def test_miss_then_hit():
+    async def scenario():
+        middleware, cache, calls = make_middleware(ttl=60)
+        first = await get(middleware, "/api/v1/customer/offers/trending", b"limit=10&page=1")
+        second = await get(middleware, "/api/v1/customer/offers/trending", b"page=1&limit=10")
+        return first, second, calls["count"], cache.get_stats()
+
+    first, second, count, stats = asyncio.run(scenario())
+    assert first == ("MISS", {"path": "/api/v1/customer/offers/trending", "count": 1})
+    assert second == ("HIT", first[1])
+    assert count == 1
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_stale_while_revalidate():
+    async def scenario():
+        middleware, cache, calls = make_middleware(ttl=0.05)
+        await get(middleware, "/api/v1/customer/offers/trending")
+        await asyncio.sleep(0.1)
+
+        stale = await get(middleware, "/api/v1/customer/offers/trending")
+        await settle(cache)
+        refreshed = await get(middleware, "/api/v1/customer/offers/trending")
+        return stale, refreshed, calls["count"], cache.get_stats()
+
+    stale, refreshed, count, stats = asyncio.run(scenario())
+    assert stale == ("STALE", {"path": "/api/v1/customer/offers/trending", "count": 1})
+    assert refreshed == ("HIT", {"path": "/api/v1/customer/offers/trending", "count": 2})
+    assert count == 2
+    assert stats["stale_hits"] == 1
+
+
+def test_invalidation_only_drops_tagged_entries():
+    async def scenario():
+        middleware, cache, calls = make_middleware(ttl=60)
+        await get(middleware, "/api/v1/customer/offers/trending")
+        await get(middleware, "/api/v1/customer/products/p1")
+
+        await cache.invalidate(OFFERS_TAG)
+        offers = await get(middleware, "/api/v1/customer/offers/trending")
+        product = await get(middleware, "/api/v1/customer/products/p1")
+
+        await cache.invalidate(product_tag("p1"))
+        product_after = await get(middleware, "/api/v1/customer/products/p1")
+        return offers, product, product_after, calls["count"]
+
+    offers, product, product_after, count = asyncio.run(scenario())
+    assert offers == ("MISS", {"path": "/api/v1/customer/offers/trending", "count": 3})
+    assert product == ("HIT", {"path": "/api/v1/customer/products/p1", "count": 2})
+    assert product_after == ("MISS", {"path": "/api/v1/customer/products/p1", "count": 4})
+    assert count == 4
+
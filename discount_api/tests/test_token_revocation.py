@@ -0,0 +1,61 @@
+# tests/test_token_revocation.py
+import asyncio
+import time
+
+import pytest
+from jose import jwt
+
+from app.core.config import settings
+from app.utils import dependencies
+from app.utils.dependencies import _resolve_user_id, revoke_token
+
+JWT_SECRET = "test-jwt-secret"
+USER_ID = "3f0c2d1e-5b6a-4c7d-8e9f-0a1b2c3d4e5f"
+
+
+@pytest.fixture(autouse=True)
+def local_verification(monkeypatch):
+    monkeypatch.setattr(settings, "supabase_jwt_secret", JWT_SECRET)
+    dependencies._token_cache.clear()
+    dependencies._revoked.clear()
+
+
+def make_token(session_id: str, **claims) -> str:
+    payload = {
+        "sub": USER_ID,
+        "aud": "authenticated",
+        "exp": int(time.time()) + 3600,
+        "session_id": session_id,
+        **claims,
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm="HS256")
+
+
+def test_revoked_token_is_rejected_after_cache_eviction():
+    token = make_token("s1")
+
+    assert asyncio.run(_resolve_user_id(token)) == USER_ID
+    revoke_token(token)
+    assert asyncio.run(_resolve_user_id(token)) is None
+
+
+def test_revocation_covers_the_whole_session():
+    first = make_token("s1", iat=int(time.time()) - 60)
+    refreshed = make_token("s1")
+    other_session = make_token("s2")
+
+    # Cached before the revocation, so the cache path is checked too
+    assert asyncio.run(_resolve_user_id(refreshed)) == USER_ID
+    revoke_token(first)
+
+    assert asyncio.run(_resolve_user_id(refreshed)) is None
+    assert asyncio.run(_resolve_user_id(other_session)) == USER_ID
+
+
+def test_revocation_expires_with_the_token():
+    token = make_token("s1", exp=int(time.time()) + 1)
+    revoke_token(token)
+
+    key = dependencies._session_key("s1")
+    expires_at, _ = dependencies._revoked._data[key]
+    assert expires_at - time.monotonic() <= 1